@@ -0,0 +1,82 @@
+"""CPU and memory cost of rendering the chemical preview canvas, up to the body sent to Benchling.
+
+Previously each render built every block, then CanvasBuilder converted each one to its update model by
+serializing it to a dict and back, and the update repeated the canvas's unchanged fields. Now the blocks are
+converted once into a template, each render fills in the two Markdown blocks showing the chemical, and the
+update only holds the fields that change.
+
+Run with: python -m benchmarks.canvas_rendering
+"""
+
+import json
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from benchling_sdk.apps.canvas.framework import CanvasBuilder
+from benchling_sdk.models import AppCanvas, AppCanvasUpdate, MarkdownUiBlock, MarkdownUiBlockType
+
+from local_app.benchling_app.views.canvas_data import preview_data
+from local_app.benchling_app.views.chemical_preview import _PREVIEW_TEMPLATE, _preview_blocks
+
+_ITERATIONS = 5000
+_CHEMICAL = {
+    "cid": "2244",
+    "name": "Aspirin",
+    "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O",
+    "molecularWeight": "180.16",
+    "monoisotopic": "180.04225873",
+}
+_PREVIEW = f"**Name**: {_CHEMICAL['name']}\n\n**Structure**: {_CHEMICAL['smiles']}"
+_IMAGE = f"![{_CHEMICAL['name']}](https://example.com/structures/{_CHEMICAL['cid']}.png)"
+
+
+def main() -> None:
+    canvas = AppCanvas.from_dict({
+        "id": "cnvs_1",
+        "app": {"id": "app_id"},
+        "featureId": "feature_id",
+        "resourceId": "resource_id",
+        "sessionId": "sesn_1",
+        "enabled": False,
+        "blocks": [],
+        "data": None,
+    })
+
+    def before() -> dict[str, Any]:
+        # The blocks as the preview built them, with the chemical's values
+        blocks = _preview_blocks()
+        blocks[1] = MarkdownUiBlock(id="chemical_preview", type=MarkdownUiBlockType.MARKDOWN, value=_PREVIEW)
+        blocks[2] = MarkdownUiBlock(id="chemical_image", type=MarkdownUiBlockType.MARKDOWN, value=_IMAGE)
+        return CanvasBuilder.from_canvas(canvas)\
+            .with_blocks(blocks)\
+            .with_data(preview_data(_CHEMICAL))\
+            .with_enabled()\
+            .to_update()\
+            .to_dict()
+
+    def after() -> dict[str, Any]:
+        return AppCanvasUpdate(
+            blocks=_PREVIEW_TEMPLATE.updates({"chemical_preview": _PREVIEW, "chemical_image": _IMAGE}),
+            data=json.dumps(preview_data(_CHEMICAL)),
+            enabled=True,
+        ).to_dict()
+
+    print(f"body size: before {len(json.dumps(before()))} B, after {len(json.dumps(after()))} B")
+    for name, fn in [("before", before), ("after", after)]:
+        elapsed = timeit.timeit(fn, number=_ITERATIONS)
+        allocated = _allocated_kib(fn)
+        print(f"{name:6} {elapsed / _ITERATIONS * 1e6:7.1f} us/render, {allocated:5.1f} KiB allocated")
+
+
+def _allocated_kib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+if __name__ == "__main__":
+    main()
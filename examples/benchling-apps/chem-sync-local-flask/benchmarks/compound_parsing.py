@@ -0,0 +1,100 @@
+"""CPU and memory cost of reading a large compound record from PubChem, and of each later cache hit.
+
+Previously the full record, including every atom, bond and coordinate, was cached, and each property was
+found by rescanning every prop. Now the props are indexed in a single pass, and only the few values the App
+reads are cached. Cache hits are measured against a SQLite cache, where each hit decodes the cached JSON.
+
+Run with: python -m benchmarks.compound_parsing
+"""
+
+import json
+import tempfile
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from local_app.lib.cache import SqliteCache
+from local_app.lib.pub_chem import _compact
+
+_ITERATIONS = 200
+_COMPOUND_PATH = Path(__file__).parent.parent / "tests/files/pubchem/compound.json"
+# Roughly the size of a small protein-like compound, rather than aspirin's 21 atoms
+_ATOMS = 5000
+
+
+def main() -> None:
+    body = _large_compound_body()
+    print(f"record size: {len(body) / 1024:.0f} KiB")
+
+    def before() -> dict[str, Any]:
+        compound_json = json.loads(body)["PC_Compounds"][0]
+        return {
+            "smiles": _get_compound_string_prop(compound_json, label="SMILES", name="Absolute"),
+            "monoisotopic": _get_compound_string_prop(compound_json, label="Weight", name="MonoIsotopic"),
+            "molecularWeight": _get_compound_string_prop(compound_json, label="Molecular Weight"),
+        }
+
+    def after() -> dict[str, Any]:
+        return _compact(json.loads(body))
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SqliteCache(Path(directory) / "cache.db", max_entries=10, ttl_seconds=3600)
+        cache.set("before", json.loads(body))
+        cache.set("after", after())
+        benchmarks: list[tuple[str, Callable[[], Any]]] = [
+            ("parse, before", before),
+            ("parse, after", after),
+            ("cache hit, before", lambda: cache.get("before")),
+            ("cache hit, after", lambda: cache.get("after")),
+        ]
+        for name, fn in benchmarks:
+            elapsed = timeit.timeit(fn, number=_ITERATIONS)
+            print(f"{name:18} {elapsed / _ITERATIONS * 1e3:8.3f} ms/record")
+    print(f"{'cached, before':18} {_retained_kib(lambda: json.loads(body)):8.0f} KiB/record")
+    print(f"{'cached, after':18} {_retained_kib(after):8.0f} KiB/record")
+
+
+def _large_compound_body() -> str:
+    compound_json = json.loads(_COMPOUND_PATH.read_text())
+    compound = compound_json["PC_Compounds"][0]
+    compound["atoms"] = {"aid": list(range(1, _ATOMS + 1)), "element": [6] * _ATOMS}
+    compound["bonds"] = {
+        "aid1": list(range(1, _ATOMS)),
+        "aid2": list(range(2, _ATOMS + 1)),
+        "order": [1] * (_ATOMS - 1),
+    }
+    compound["coords"][0]["aid"] = list(range(1, _ATOMS + 1))
+    compound["coords"][0]["conformers"][0] = {
+        "x": [i * 0.866 for i in range(_ATOMS)],
+        "y": [i * 0.5 for i in range(_ATOMS)],
+    }
+    return json.dumps(compound_json)
+
+
+def _retained_kib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    result = fn()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / 1024
+
+
+# The previous implementation, for comparison
+def _get_compound_string_prop(
+    compound_json: dict[str, Any], label: str, name: str | None = None,
+) -> str | None:
+    matching_props = [
+        p
+        for p in compound_json["props"]
+        if p["urn"]["label"] == label and (not name or (p["urn"]["name"] == name))
+    ]
+    if matching_props:
+        return matching_props[0]["value"]["sval"]
+    return None
+
+
+if __name__ == "__main__":
+    main()
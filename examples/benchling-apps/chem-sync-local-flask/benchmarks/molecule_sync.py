@@ -0,0 +1,111 @@
+"""Throughput of syncing a library of compounds to Benchling, one molecule per request and in bulk.
+
+Molecules used to be created with one request each, so a library took a round trip per compound. Bulk
+creation submits batches as async tasks and polls them until they finish. The stand-in for Benchling adds
+a simulated round trip to every request and simulated server time per molecule created. Real round trips
+to a tenant are usually longer, which favours bulk creation further.
+
+Run with: python -m benchmarks.molecule_sync
+"""
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import ClassVar
+
+from benchling_sdk.apps.config.mock_config import MockConfigItemStore
+from benchling_sdk.apps.framework import App
+from benchling_sdk.apps.helpers.manifest_helpers import manifest_from_file
+from benchling_sdk.auth.api_key_auth import ApiKeyAuth
+from benchling_sdk.benchling import Benchling
+
+from local_app.benchling_app.molecules import bulk_create_molecules, create_molecule
+
+_COMPOUNDS = 1000
+_ROUND_TRIP_SECONDS = 0.01
+_SERVER_SECONDS_PER_MOLECULE = 0.002
+_MANIFEST_PATH = Path(__file__).parent.parent / "manifest.yaml"
+
+
+class _StandInBenchling(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    ids = itertools.count()
+    # Task ID to the time it finishes and the molecules it creates
+    tasks: ClassVar[dict[str, tuple[float, list[dict]]]] = {}
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Create one molecule, or start a task creating a batch of them."""
+        time.sleep(_ROUND_TRIP_SECONDS)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.endswith("/molecules:bulk-create"):
+            molecules = [self._molecule(molecule) for molecule in body["molecules"]]
+            task_id = f"task_{next(self.ids)}"
+            finishes_at = time.monotonic() + len(molecules) * _SERVER_SECONDS_PER_MOLECULE
+            self.tasks[task_id] = (finishes_at, molecules)
+            self._respond(202, {"taskId": task_id})
+        else:
+            time.sleep(_SERVER_SECONDS_PER_MOLECULE)
+            self._respond(201, self._molecule(body))
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Return a task's status."""
+        time.sleep(_ROUND_TRIP_SECONDS)
+        finishes_at, molecules = self.tasks[self.path.rsplit("/", 1)[1]]
+        if time.monotonic() < finishes_at:
+            self._respond(200, {"status": "RUNNING"})
+        else:
+            self._respond(200, {"status": "SUCCEEDED", "response": {"molecules": molecules}})
+
+    def _molecule(self, molecule_create: dict) -> dict:
+        return {"id": f"mol_{next(self.ids)}", "name": molecule_create["name"]}
+
+    def _respond(self, status: int, response_json: dict) -> None:
+        body = json.dumps(response_json).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Don't log each request."""
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInBenchling)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    benchling = Benchling(f"http://127.0.0.1:{server.server_port}", ApiKeyAuth("api_key"))
+    config_store = MockConfigItemStore.from_manifest(manifest_from_file(_MANIFEST_PATH))
+    app = App("app_id", benchling, config_store)
+    chemical_results = [
+        {
+            "cid": str(cid),
+            "name": f"compound {cid}",
+            "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O",
+            "molecularWeight": "180.16",
+            "monoisotopic": "180.04225873",
+        }
+        for cid in range(_COMPOUNDS)
+    ]
+
+    def one_per_request() -> None:
+        for chemical_result in chemical_results:
+            create_molecule(app, chemical_result)
+
+    def bulk() -> None:
+        assert len(bulk_create_molecules(app, chemical_results)) == _COMPOUNDS
+
+    for name, fn in [("one molecule per request", one_per_request), ("bulk create", bulk)]:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:26} {elapsed:7.2f} s, {_COMPOUNDS / elapsed:7.1f} molecules/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Latency of get_by_cid against a local stand-in for PubChem, with a new connection per request and pooled.
+
+Previously each request to PubChem was made with httpx.get, which creates a new client (including
+loading CA certificates) and opens a new connection every time. Now requests share one client, reusing
+keep-alive connections. The stand-in server is plain HTTP on localhost, so this understates the saving
+against PubChem, where a new connection also needs a TLS handshake.
+
+Run with: python -m benchmarks.pubchem_client
+"""
+
+import threading
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+from local_app.lib import pub_chem
+
+_ITERATIONS = 200
+_PUBCHEM_FILES_PATH = Path(__file__).parent.parent / "tests/files/pubchem"
+
+
+class _StandInPubChem(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which otherwise stalls on delayed ACKs
+    disable_nagle_algorithm = True
+    compound = (_PUBCHEM_FILES_PATH / "compound.json").read_bytes()
+    title = (_PUBCHEM_FILES_PATH / "title.json").read_bytes()
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Respond with the title or compound record for any CID."""
+        body = self.title if self.path.endswith("/property/Title/JSON") else self.compound
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Don't log each request."""
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInPubChem)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_uri = f"http://127.0.0.1:{server.server_port}/rest/pug/compound/"
+    pub_chem.PUBCHEM_BASE_URI = base_uri
+
+    def before() -> None:
+        httpx.get(f"{base_uri}cid/2244/JSON").json()
+        httpx.get(f"{base_uri}cid/2244/property/Title/JSON").json()
+
+    def after() -> None:
+        # A fresh cache each time, so every call goes to the server
+        pub_chem._response_cache.cache_clear()  # noqa: SLF001
+        pub_chem.get_by_cid("2244")
+
+    benchmarks = [
+        ("new connection per request", before),
+        ("pooled client", after),
+    ]
+    for name, fn in benchmarks:
+        fn()
+        elapsed = timeit.timeit(fn, number=_ITERATIONS)
+        print(f"{name:28} {elapsed / _ITERATIONS * 1e3:8.3f} ms/get_by_cid")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Per-request cost of verifying a webhook, with and without cached public keys.
+
+Keys are served by a stand-in JWKS server on localhost, so "uncached" excludes the latency to
+Benchling that each uncached verification would pay in practice.
+
+Run with: python -m benchmarks.verify_webhook
+"""
+
+import base64
+import json
+import threading
+import time
+import timeit
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+from benchling_sdk.apps.helpers.webhook_helpers import jwks_by_app_definition, verify
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwcrypto.jwk import JWK, JWKSet  # type: ignore[import-untyped]
+
+from local_app.benchling_app.verification import verify_webhook
+
+_ITERATIONS = 500
+
+
+def main() -> None:
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    jwks = JWKSet()
+    jwks.add(JWK.from_pem(private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )))
+    server = _serve_jwks(jwks.export(private_keys=False))
+    jwks_url = f"http://127.0.0.1:{server.server_port}/jwks"
+
+    def fetch_jwks(app_definition_id: str) -> JWKSet:
+        return jwks_by_app_definition(app_definition_id, jwk_url_provider=lambda _: jwks_url)
+
+    body = json.dumps({"message": {"type": "v2.canvas.userInteracted", "canvasId": "cnvs_123"}})
+    timestamp = str(int(time.time()))
+    signature = private_key.sign(f"msg_123.{timestamp}.{body}".encode(), ec.ECDSA(hashes.SHA256()))
+    headers = {
+        "webhook-id": "msg_123",
+        "webhook-timestamp": timestamp,
+        "webhook-signature": f"v1der,{base64.b64encode(signature).decode()}",
+    }
+
+    uncached = timeit.timeit(
+        lambda: verify("appdef_123", body, headers, jwk_function=fetch_jwks),
+        number=_ITERATIONS,
+    )
+    with patch("local_app.benchling_app.verification.jwks_by_app_definition", fetch_jwks):
+        cached = timeit.timeit(lambda: verify_webhook("appdef_123", body, headers), number=_ITERATIONS)
+    server.shutdown()
+
+    print(f"uncached keys: {uncached / _ITERATIONS * 1e6:8.1f} us/verify")
+    print(f"cached keys:   {cached / _ITERATIONS * 1e6:8.1f} us/verify")
+
+
+def _serve_jwks(jwks_json: str) -> HTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(jwks_json.encode())
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    main()
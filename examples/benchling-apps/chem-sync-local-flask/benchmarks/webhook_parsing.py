@@ -0,0 +1,47 @@
+"""Cost of receiving a large canvas webhook, on the path to ACKing it and on the worker handling it.
+
+Previously the body was parsed into a dict while handling the request, both for a debug log and to hand
+to the worker. Now the request only decodes the body, and the worker parses it once.
+
+Run with: python -m benchmarks.webhook_parsing
+"""
+
+import json
+import timeit
+from pathlib import Path
+
+from benchling_sdk.models.webhooks.v0 import WebhookEnvelopeV0
+
+_ITERATIONS = 200
+_WEBHOOK_PATH = Path(__file__).parent.parent / "tests/files/webhooks/canvas_interaction_webhook.json"
+# Enough excluded properties to make a body of roughly 1 MB
+_EXCLUDED_PROPERTIES = 40_000
+
+
+def main() -> None:
+    webhook = json.loads(_WEBHOOK_PATH.read_text())
+    webhook["message"]["excludedProperties"] = [f"property_{i}" for i in range(_EXCLUDED_PROPERTIES)]
+    body = json.dumps(webhook).encode()
+
+    def ack_path_before() -> None:
+        json.loads(body.decode("utf-8"))
+
+    def ack_path_after() -> None:
+        body.decode("utf-8")
+
+    def worker() -> None:
+        WebhookEnvelopeV0.from_dict(json.loads(body.decode("utf-8")))
+
+    print(f"body size: {len(body) / 1024:.0f} KiB")
+    benchmarks = [
+        ("ACK path, before", ack_path_before),
+        ("ACK path, after", ack_path_after),
+        ("worker", worker),
+    ]
+    for name, fn in benchmarks:
+        elapsed = timeit.timeit(fn, number=_ITERATIONS)
+        print(f"{name:18} {elapsed / _ITERATIONS * 1e3:8.3f} ms/webhook")
+
+
+if __name__ == "__main__":
+    main()
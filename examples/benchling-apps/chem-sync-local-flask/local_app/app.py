@@ -1,46 +1,55 @@
-from threading import Thread
+from dataclasses import asdict
+from typing import Any
 
-from benchling_sdk.apps.helpers.webhook_helpers import verify
-from flask import Flask, request
+from flask import Flask, Response, request
 
-from local_app.benchling_app.handler import handle_webhook
-from local_app.benchling_app.setup import app_definition_id
-from local_app.lib.logger import get_logger
+from local_app.lib import metrics
+from local_app.lib.structure_images import IMAGE_ROUTE_PREFIX, structure_image
+from local_app.lib.worker_pool import webhook_worker_pool
+from local_app.receiver import WebhookReceiver
 
-logger = get_logger()
+_IMAGE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
 
 
 def create_app() -> Flask:
     app = Flask("benchling-app")
+    receiver = WebhookReceiver()
 
     @app.route("/health")
     def health_check() -> tuple[str, int]:
         # Just a route allowing us to check that Flask itself is up and running
         return "OK", 200
 
+    @app.route("/stats")
+    def worker_stats() -> tuple[dict[str, Any], int]:
+        # Queue depth, active workers and rejections, for sizing the webhook worker pool
+        return asdict(webhook_worker_pool().stats()), 200
+
+    @app.route("/metrics")
+    def prometheus_metrics() -> tuple[str, int, dict[str, str]]:
+        if not metrics.metrics_enabled():
+            return "Not Found", 404, {}
+        return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+    @app.route(f"{IMAGE_ROUTE_PREFIX}<cid>.png")
+    def compound_image(cid: str) -> Response | tuple[str, int]:
+        # Structure images linked from canvases, served from the App's cache rather than PubChem
+        image = structure_image(cid)
+        if image is None:
+            return "Not Found", 404
+        digest, data = image
+        response = Response(data, mimetype="image/png")
+        # An image's URL always serves the same image, so browsers can keep it
+        response.cache_control.public = True
+        response.cache_control.max_age = _IMAGE_MAX_AGE_SECONDS
+        response.set_etag(digest)
+        # Responds 304 Not Modified if the browser already has this image
+        response.make_conditional(request)
+        return response
+
     @app.route("/1/webhooks/<path:target>", methods=["POST"])
     def receive_webhooks(target: str) -> tuple[str, int]:  # noqa: ARG001
-        # For security, don't do anything else without first verifying the webhook
-        app_def_id = app_definition_id()
-
-        # Important! To verify webhooks, we need to pass the body as an unmodified string
-        # Flask's request.data is bytes, so decode to string. Passing bytes or JSON won't work
-        verify(app_def_id, request.data.decode("utf-8"), request.headers)
-
-        logger.debug("Received webhook message: %s", request.json)
-        # Dispatch work and ACK webhook as quickly as possible
-        _enqueue_work()
-        # ACK webhook by returning 2xx status code so Benchling knows the app received the signal
-        return "OK", 200
+        # Flask's request.data is the unmodified body as bytes, which is needed to verify the webhook
+        return receiver.receive(request.data, request.headers)
 
     return app
-
-
-def _enqueue_work() -> None:
-    # PRODUCTION NOTE: A high volume of webhooks may spawn too many threads and lead to processing failures
-    # In production, we recommend a more robust queueing system for scale
-    thread = Thread(
-        target=handle_webhook,
-        args=(request.json,),
-    )
-    thread.start()
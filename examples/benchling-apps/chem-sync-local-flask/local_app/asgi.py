@@ -0,0 +1,120 @@
+"""An ASGI alternative to the Flask app in `local_app.app`, serving the same routes from an event loop.
+
+Connections are held by the event loop rather than a thread each, so a single process can accept many
+concurrent webhooks. Run it with an ASGI server such as uvicorn:
+
+    uvicorn --factory local_app.asgi:create_asgi_app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Coroutine, MutableMapping
+from dataclasses import asdict
+from typing import Any
+
+from local_app.lib import metrics
+from local_app.lib.logger import get_logger
+from local_app.lib.structure_images import IMAGE_ROUTE_PREFIX, structure_image
+from local_app.lib.worker_pool import webhook_worker_pool
+from local_app.receiver import WebhookReceiver
+
+logger = get_logger()
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Coroutine[Any, Any, None]]
+
+_WEBHOOK_PATH_PREFIX = "/1/webhooks/"
+_IMAGE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+def create_asgi_app() -> ASGIApp:
+    receiver = WebhookReceiver()
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send)
+            return
+        assert scope["type"] == "http", f"Unsupported ASGI scope type {scope['type']}"
+        path = scope["path"]
+        method = scope["method"]
+        if path == "/health" and method == "GET":
+            # Just a route allowing us to check that the server itself is up and running
+            await _respond(send, 200, b"OK")
+        elif path == "/stats" and method == "GET":
+            stats = json.dumps(asdict(webhook_worker_pool().stats())).encode()
+            await _respond(send, 200, stats, content_type=b"application/json")
+        elif path == "/metrics" and method == "GET" and metrics.metrics_enabled():
+            await _respond(send, 200, metrics.render().encode(), content_type=metrics.CONTENT_TYPE.encode())
+        elif path.startswith(IMAGE_ROUTE_PREFIX) and path.endswith(".png") and method == "GET":
+            await _respond_image(scope, send, path.removeprefix(IMAGE_ROUTE_PREFIX).removesuffix(".png"))
+        elif path.startswith(_WEBHOOK_PATH_PREFIX) and method == "POST":
+            body = await _read_body(receive)
+            # ASGI header names are already lowercase, as webhook verification expects
+            headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+            # Verification may need to fetch Benchling's public keys, so keep it off the event loop.
+            # Handling the webhook happens on the worker pool, since the Benchling SDK is synchronous
+            message, status = await asyncio.to_thread(receiver.receive, body, headers)
+            await _respond(send, status, message.encode())
+        else:
+            await _respond(send, 404, b"Not Found")
+
+    return app
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+async def _respond_image(scope: Scope, send: Send, cid: str) -> None:
+    # Structure images linked from canvases, served from the App's cache rather than PubChem.
+    # Fetching an uncached image blocks, so keep it off the event loop
+    image = await asyncio.to_thread(structure_image, cid)
+    if image is None:
+        await _respond(send, 404, b"Not Found")
+        return
+    digest, data = image
+    etag = f'"{digest}"'.encode()
+    # An image's URL always serves the same image, so browsers can keep it
+    headers = [(b"etag", etag), (b"cache-control", f"public, max-age={_IMAGE_MAX_AGE_SECONDS}".encode())]
+    if (b"if-none-match", etag) in scope["headers"]:
+        await _respond(send, 304, b"", headers=headers)
+    else:
+        await _respond(send, 200, data, content_type=b"image/png", headers=headers)
+
+
+async def _respond(
+    send: Send,
+    status: int,
+    body: bytes,
+    content_type: bytes = b"text/plain",
+    headers: list[tuple[bytes, bytes]] | None = None,
+) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
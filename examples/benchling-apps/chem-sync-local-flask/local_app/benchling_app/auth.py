@@ -0,0 +1,196 @@
+"""OAuth2 client credentials for Benchling, refreshed ahead of expiry and optionally shared between processes.
+
+The SDK's ClientCredentialsOAuth2 only fetches a new token once the current one has expired, so the next API
+call waits on the token request. Here, a background thread refreshes tokens before they expire, and tokens can
+be shared through a local cache file so that each server process doesn't need to fetch its own.
+"""
+
+import base64
+import contextlib
+import threading
+import time
+from dataclasses import asdict, dataclass
+from json import JSONDecodeError
+from typing import Any, NoReturn
+from urllib.parse import urljoin
+
+import httpx
+from benchling_api_client.v2.benchling_client import AuthorizationMethod, BenchlingApiClient
+from benchling_sdk.errors import BenchlingError
+
+from local_app.lib.cache import Cache
+from local_app.lib.logger import get_logger
+
+logger = get_logger()
+
+# Start refreshing a token once this fraction of its lifetime has passed
+_REFRESH_AFTER_LIFETIME_FRACTION = 0.75
+# Never hand out a token this close to its expiry, in case the request using it is slow
+_EXPIRY_BUFFER_SECONDS = 60
+_REFRESH_CHECK_INTERVAL_SECONDS = 15
+
+
+@dataclass(frozen=True)
+class _Token:
+    access_token: str
+    # Epoch seconds after which the token should be refreshed in the background
+    refresh_at: float
+    # Epoch seconds after which the token must not be used
+    expires_at: float
+
+    def usable(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class ProactiveClientCredentialsOAuth2(AuthorizationMethod):
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        shared_tokens: Cache[Any] | None = None,
+        httpx_client: httpx.Client | None = None,
+    ) -> None:
+        """Authorize with client credentials, sharing tokens across processes via shared_tokens if given."""
+        self._client_id = client_id
+        self._shared_tokens = shared_tokens
+        self._httpx_client = httpx_client if httpx_client else httpx.Client()
+        # The same headers as the SDK's ClientCredentialsOAuth2 sends
+        credentials = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+        self._token_request_headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Authorization": f"Basic {credentials}",
+            "User-Agent": BenchlingApiClient._get_user_agent("BenchlingSDK", "benchling-sdk"),  # noqa: SLF001
+        }
+        # Guards the state below. Never held while fetching a token
+        self._lock = threading.Lock()
+        # Held while fetching a tenant's token, so tenants don't wait on each other's token requests
+        self._tenant_locks: dict[str, threading.Lock] = {}
+        # Tokens are per tenant, keyed by the tenant's base URL
+        self._tokens: dict[str, _Token] = {}
+        # Base URLs which have used their token since it was last refreshed
+        self._recently_used: set[str] = set()
+        self._refresher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def get_authorization_header(self, base_url: str) -> str:
+        """Return a Bearer authorization header, only fetching a token inline if there's no usable one."""
+        token = self._usable_token(base_url)
+        if token is None:
+            with self._tenant_lock(base_url):
+                # Another thread may have fetched a token while we waited for the lock
+                token = self._usable_token(base_url) or self._fetch_token(base_url)
+        with self._lock:
+            self._recently_used.add(base_url)
+        self._ensure_refresher()
+        return f"Bearer {token.access_token}"
+
+    def stop(self) -> None:
+        """Stop refreshing tokens in the background."""
+        self._stop.set()
+
+    def refresh_due_tokens(self) -> None:
+        """Refresh tokens which are due, if they've been used since they were last refreshed."""
+        now = time.time()
+        with self._lock:
+            # Idle tenants aren't kept refreshed. They'll fetch a token on next use
+            due = [
+                base_url
+                for base_url, token in self._tokens.items()
+                if now >= token.refresh_at and base_url in self._recently_used
+            ]
+        for base_url in due:
+            with self._tenant_lock(base_url):
+                shared_token = self._shared_token(base_url)
+                if shared_token is not None and now < shared_token.refresh_at:
+                    # Another process already refreshed it
+                    self._set_token(base_url, shared_token)
+                else:
+                    self._fetch_token(base_url)
+            with self._lock:
+                self._recently_used.discard(base_url)
+
+    def _tenant_lock(self, base_url: str) -> threading.Lock:
+        with self._lock:
+            return self._tenant_locks.setdefault(base_url, threading.Lock())
+
+    def _set_token(self, base_url: str, token: _Token) -> None:
+        with self._lock:
+            self._tokens[base_url] = token
+
+    def _usable_token(self, base_url: str) -> _Token | None:
+        with self._lock:
+            token = self._tokens.get(base_url)
+        if token is not None and token.usable():
+            return token
+        token = self._shared_token(base_url)
+        if token is not None and token.usable():
+            self._set_token(base_url, token)
+            return token
+        return None
+
+    def _shared_token(self, base_url: str) -> _Token | None:
+        if self._shared_tokens is None:
+            return None
+        token_dict = self._shared_tokens.get(self._shared_key(base_url))
+        return _Token(**token_dict) if token_dict else None
+
+    def _fetch_token(self, base_url: str) -> _Token:
+        response = self._httpx_client.post(
+            urljoin(base_url, "/api/v2/token"),
+            data={"grant_type": "client_credentials"},
+            headers=self._token_request_headers,
+        )
+        if response.status_code != httpx.codes.OK:
+            _raise_error_from_response(response)
+        token_json = response.json()
+        assert token_json["token_type"] == "Bearer"  # noqa: S105
+        now = time.time()
+        expires_in = float(token_json["expires_in"])
+        token = _Token(
+            access_token=token_json["access_token"],
+            refresh_at=now + expires_in * _REFRESH_AFTER_LIFETIME_FRACTION,
+            expires_at=now + max(0, expires_in - _EXPIRY_BUFFER_SECONDS),
+        )
+        self._set_token(base_url, token)
+        if self._shared_tokens is not None:
+            ttl_seconds = token.expires_at - now
+            self._shared_tokens.set(self._shared_key(base_url), asdict(token), ttl_seconds=ttl_seconds)
+        logger.debug("Fetched a new access token for %s", base_url)
+        return token
+
+    def _shared_key(self, base_url: str) -> str:
+        return f"{self._client_id}|{base_url}"
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop,
+                    name="token-refresher",
+                    daemon=True,
+                )
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(_REFRESH_CHECK_INTERVAL_SECONDS):
+            try:
+                self.refresh_due_tokens()
+            except Exception:
+                # The token will still be fetched inline when next needed
+                logger.exception("Failed to refresh access token in the background")
+
+
+def _raise_error_from_response(response: httpx.Response) -> NoReturn:
+    # As the SDK raises for a failed token request, so callers handle it like any other API error
+    json_content = None
+    with contextlib.suppress(JSONDecodeError):
+        json_content = response.json()
+    raise BenchlingError(
+        status_code=response.status_code,
+        headers=response.headers,
+        json=json_content,
+        content=response.content,
+        parsed=None,
+    )
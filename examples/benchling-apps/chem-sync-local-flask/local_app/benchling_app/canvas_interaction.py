@@ -8,8 +8,10 @@ from benchling_sdk.apps.status.errors import AppUserFacingError
 from benchling_sdk.models import AppCanvasUpdate, Molecule
 from benchling_sdk.models.webhooks.v0 import CanvasInteractionWebhookV2
 
+from local_app.benchling_app.canvas_state import attach_canvas, fetch_canvas, update_canvas
 from local_app.benchling_app.molecules import create_molecule
-from local_app.benchling_app.views.canvas_initialize import input_blocks
+from local_app.benchling_app.views.canvas_data import chemical_from_data
+from local_app.benchling_app.views.canvas_initialize import INPUT_TEMPLATE
 from local_app.benchling_app.views.chemical_preview import render_preview_canvas
 from local_app.benchling_app.views.completed import render_completed_canvas
 from local_app.benchling_app.views.constants import (
@@ -21,9 +23,14 @@ from local_app.benchling_app.views.constants import (
 )
 from local_app.lib.logger import get_logger
 from local_app.lib.pub_chem import get_by_cid, search
+from local_app.lib.router import Router
+from local_app.lib.structure_images import prewarm
 
 logger = get_logger()
 
+# Button handlers are registered below by button ID
+button_router: Router[str] = Router("button")
+
 
 class UnsupportedButtonError(Exception):
     pass
@@ -31,31 +38,9 @@ class UnsupportedButtonError(Exception):
 
 def route_interaction_webhook(app: App, canvas_interaction: CanvasInteractionWebhookV2) -> None:
     canvas_id = canvas_interaction.canvas_id
-    if canvas_interaction.button_id == SEARCH_BUTTON_ID:
-        with app.create_session_context("Search Chemicals", timeout_seconds=20) as session:
-            session.attach_canvas(canvas_id)
-            canvas_builder = _canvas_builder_from_canvas_id(app, canvas_id)
-            canvas_inputs = canvas_builder.inputs_to_dict_single_value()
-            sanitized_inputs = _validate_and_sanitize_inputs(canvas_inputs)
-            results = search(sanitized_inputs[SEARCH_TEXT_ID])
-            render_preview_canvas(results, canvas_id, canvas_builder, session)
-    elif canvas_interaction.button_id == CANCEL_BUTTON_ID:
-        # Set session_id = None to detach and prior state or messages (essentially, reset)
-        canvas_builder = _canvas_builder_from_canvas_id(app, canvas_id)
-        canvas_update = canvas_builder.with_enabled()\
-            .with_session_id(None)\
-            .with_blocks(input_blocks())\
-            .to_update()
-        app.benchling.apps.update_canvas(canvas_id, canvas_update)
-    elif canvas_interaction.button_id == CREATE_BUTTON_ID:
-        with app.create_session_context("Create Molecules", timeout_seconds=20) as session:
-            session.attach_canvas(canvas_id)
-            canvas_builder = _canvas_builder_from_canvas_id(app, canvas_id)
-            molecule = _create_molecule_from_canvas(app, canvas_builder)
-            render_completed_canvas(molecule, canvas_id, canvas_builder, session)
-    else:
+    if not button_router.dispatch([canvas_interaction.button_id], app, canvas_id):
         # Re-enable the Canvas, or it will stay disabled and the user will be stuck
-        app.benchling.apps.update_canvas(canvas_id, AppCanvasUpdate(enabled=True))
+        update_canvas(app, canvas_id, AppCanvasUpdate(enabled=True))
         # Not shown to user by default, for our own logs cause we forgot to handle some button
         # This is developer error
         raise UnsupportedButtonError(
@@ -63,22 +48,52 @@ def route_interaction_webhook(app: App, canvas_interaction: CanvasInteractionWeb
         )
 
 
+@button_router.route(SEARCH_BUTTON_ID)
+def _search(app: App, canvas_id: str) -> None:
+    with app.create_session_context("Search Chemicals", timeout_seconds=20) as session:
+        attach_canvas(session, canvas_id)
+        # What the user entered is only in Benchling's copy of the canvas, so it's always fetched
+        canvas_builder = CanvasBuilder.from_canvas(fetch_canvas(app, canvas_id))
+        canvas_inputs = canvas_builder.inputs_to_dict_single_value()
+        sanitized_inputs = _validate_and_sanitize_inputs(canvas_inputs)
+        results = search(sanitized_inputs[SEARCH_TEXT_ID])
+        # Start fetching structure images now, so they're cached by the time the preview is shown
+        prewarm([result["cid"] for result in results])
+        render_preview_canvas(results, canvas_id, canvas_builder, session)
+
+
+@button_router.route(CANCEL_BUTTON_ID)
+def _cancel(app: App, canvas_id: str) -> None:
+    # Set session_id = None to detach and prior state or messages (essentially, reset)
+    # Fields left out of the update are unchanged, so the canvas doesn't need to be read first
+    canvas_update = AppCanvasUpdate(blocks=INPUT_TEMPLATE.updates(), enabled=True, session_id=None)
+    update_canvas(app, canvas_id, canvas_update)
+
+
+@button_router.route(CREATE_BUTTON_ID)
+def _create(app: App, canvas_id: str) -> None:
+    with app.create_session_context("Create Molecules", timeout_seconds=20) as session:
+        attach_canvas(session, canvas_id)
+        # Always fetched rather than cached: another server process may have changed the canvas since this one
+        # last wrote it, and creating a molecule from a stale preview can't be undone
+        canvas_builder = CanvasBuilder.from_canvas(fetch_canvas(app, canvas_id))
+        molecule = _create_molecule_from_canvas(app, canvas_builder)
+        render_completed_canvas(molecule, canvas_id, session)
+
+
 def _create_molecule_from_canvas(app: App, canvas_builder: CanvasBuilder) -> Molecule:
     # JSON can be almost any type, cast only needed if you care about type safety checks like MyPy
     canvas_data = cast(dict, canvas_builder.data_to_json())
     # Only needed for type safety
     assert canvas_data is not None
     logger.debug("Canvas data: %s", canvas_data)
-    chemical_cid = canvas_data[CID_KEY]
-    chemical = get_by_cid(chemical_cid)
+    # The chemical shown in the preview is usually in the canvas data, saving looking it up again
+    chemical = chemical_from_data(canvas_data)
+    if chemical is None:
+        chemical = get_by_cid(canvas_data[CID_KEY])
     return create_molecule(app, chemical)
 
 
-def _canvas_builder_from_canvas_id(app: App, canvas_id: str) -> CanvasBuilder:
-    current_canvas = app.benchling.apps.get_canvas_by_id(canvas_id)
-    return CanvasBuilder.from_canvas(current_canvas)
-
-
 def _validate_and_sanitize_inputs(inputs: dict[str, str]) -> dict[str, str]:
     sanitized_inputs = {}
     if not inputs[SEARCH_TEXT_ID]:
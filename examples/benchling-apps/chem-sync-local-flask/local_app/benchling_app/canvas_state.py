@@ -0,0 +1,138 @@
+"""Canvases as the App last wrote them, so that reading back the App's own blocks and data can skip a fetch.
+
+Every canvas the App creates or updates through this module is cached from Benchling's response. Each
+write takes a new version for its canvas before it's sent, and its response is only cached if no later
+write to the canvas has started since, so a slow response can't replace a newer one. While a write is in
+flight its canvas isn't cached, and reading it fetches it from Benchling.
+"""
+
+import copy
+import itertools
+import threading
+from dataclasses import dataclass
+from functools import cache
+
+from benchling_sdk.apps.framework import App
+from benchling_sdk.apps.status.framework import SessionContextManager
+from benchling_sdk.models import AppCanvas, AppCanvasCreate, AppCanvasUpdate
+
+from local_app.lib.cache import TTLCache
+from local_app.lib.metrics import Counter
+
+# A canvas is usually only interacted with for a few minutes, while someone is using it
+_MAX_CACHED_CANVASES = 1000
+_CANVAS_TTL_SECONDS = 10 * 60
+
+CANVAS_CACHE_REQUESTS = Counter(
+    "benchling_app_canvas_cache_requests_total",
+    "Canvases looked up in the canvas state cache, by whether they were a hit or miss",
+)
+
+
+@dataclass(frozen=True)
+class _CanvasState:
+    version: int
+    # None while a write to the canvas is in flight
+    canvas: AppCanvas | None
+
+
+class CanvasStateCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        """Cache up to max_entries canvases, each for ttl_seconds after it was last written."""
+        self._lock = threading.Lock()
+        # Versions are unique across canvases, so a canvas evicted and cached again never reuses one
+        self._versions = itertools.count(1)
+        self._states: TTLCache[_CanvasState] = TTLCache(max_entries, ttl_seconds)
+
+    def get(self, key: str) -> AppCanvas | None:
+        """Return the canvas as last written or fetched, or None if it's missing or a write is in flight."""
+        state = self._states.get(key)
+        return state.canvas if state is not None else None
+
+    def version(self, key: str) -> int:
+        """Return the canvas's current version, or 0 if it has none, for caching a canvas fetched after."""
+        with self._lock:
+            state = self._states.get(key)
+            return state.version if state is not None else 0
+
+    def begin_write(self, key: str) -> int:
+        """Start a write to the canvas, returning its version."""
+        with self._lock:
+            version = next(self._versions)
+            self._states.set(key, _CanvasState(version, None))
+            return version
+
+    def put(self, key: str, version: int, canvas: AppCanvas) -> bool:
+        """Cache a canvas, unless a write to it has started since version. Returns whether it was cached."""
+        with self._lock:
+            state = self._states.get(key)
+            if (state.version if state is not None else 0) != version:
+                return False
+            self._states.set(key, _CanvasState(version, canvas))
+            return True
+
+    def set_session_id(self, key: str, session_id: str) -> None:
+        """Record a session being attached to a cached canvas."""
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.canvas is None:
+                return
+            # Cached canvases may be held by callers, so they aren't modified
+            canvas = copy.copy(state.canvas)
+            canvas.session_id = session_id
+            self._states.set(key, _CanvasState(next(self._versions), canvas))
+
+
+def get_canvas(app: App, canvas_id: str) -> AppCanvas:
+    """Return the canvas as the App last wrote it, fetching it only if it isn't cached.
+
+    Only use this for state the App writes itself, like blocks and data. Values entered by users are only
+    in Benchling's copy, so read them from fetch_canvas. The cache is per process, so it can be stale when
+    several server processes handle the same canvas: don't act on it for anything with side effects.
+    """
+    canvas = _canvas_state_cache().get(_key(app, canvas_id))
+    CANVAS_CACHE_REQUESTS.inc(result="miss" if canvas is None else "hit")
+    if canvas is not None:
+        return canvas
+    return fetch_canvas(app, canvas_id)
+
+
+def fetch_canvas(app: App, canvas_id: str) -> AppCanvas:
+    key = _key(app, canvas_id)
+    version = _canvas_state_cache().version(key)
+    canvas = app.benchling.apps.get_canvas_by_id(canvas_id)
+    _canvas_state_cache().put(key, version, canvas)
+    return canvas
+
+
+def create_canvas(app: App, canvas_create: AppCanvasCreate) -> AppCanvas:
+    canvas = app.benchling.apps.create_canvas(canvas_create)
+    key = _key(app, canvas.id)
+    _canvas_state_cache().put(key, _canvas_state_cache().begin_write(key), canvas)
+    return canvas
+
+
+def update_canvas(app: App, canvas_id: str, canvas_update: AppCanvasUpdate) -> AppCanvas:
+    key = _key(app, canvas_id)
+    version = _canvas_state_cache().begin_write(key)
+    canvas = app.benchling.apps.update_canvas(canvas_id, canvas_update)
+    _canvas_state_cache().put(key, version, canvas)
+    return canvas
+
+
+def attach_canvas(session: SessionContextManager, canvas_id: str) -> None:
+    # The SDK updates the canvas itself, so the cached canvas is updated to match
+    session.attach_canvas(canvas_id)
+    active_session = session.active_session()
+    # Only needed for type safety
+    assert active_session is not None
+    _canvas_state_cache().set_session_id(_key(session.app, canvas_id), active_session.id)
+
+
+def _key(app: App, canvas_id: str) -> str:
+    return f"{app.id}/{canvas_id}"
+
+
+@cache
+def _canvas_state_cache() -> CanvasStateCache:
+    return CanvasStateCache(_MAX_CACHED_CANVASES, _CANVAS_TTL_SECONDS)
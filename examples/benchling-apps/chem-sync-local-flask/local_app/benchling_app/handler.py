@@ -1,43 +1,51 @@
+import json
 from typing import Any
 
+from benchling_api_client.v2.extensions import NotPresentError
+from benchling_sdk.apps.framework import App
 from benchling_sdk.apps.status.errors import AppUserFacingError
 from benchling_sdk.models.webhooks.v0 import (
     CanvasCreatedWebhookV2,
     CanvasInitializeWebhookV2,
     CanvasInteractionWebhookV2,
+    LifecycleConfigurationUpdateWebhookV2Beta,
     WebhookEnvelopeV0,
 )
 
 from local_app.benchling_app.canvas_interaction import route_interaction_webhook
+from local_app.benchling_app.molecules import invalidate_molecule_config
 from local_app.benchling_app.setup import init_app_from_webhook
 from local_app.benchling_app.views.canvas_initialize import (
     render_search_canvas,
     render_search_canvas_for_created_canvas,
 )
 from local_app.lib.logger import get_logger
+from local_app.lib.router import Router
 
 logger = get_logger()
 
+# Routes are keyed by message type and feature ID, where a feature ID of None handles any feature.
+# Our manifest's features share the same handlers, but a route for a specific feature would take precedence
+webhook_router: Router[tuple[type, str | None]] = Router("webhook")
+
 
 class UnsupportedWebhookError(Exception):
     pass
 
 
+def handle_webhook_body(body: str) -> None:
+    # The raw webhook body is parsed exactly once, here on the worker thread
+    handle_webhook(json.loads(body))
+
+
 def handle_webhook(webhook_dict: dict[str, Any]) -> None:
     logger.debug("Handling webhook with payload: %s", webhook_dict)
     webhook = WebhookEnvelopeV0.from_dict(webhook_dict)
     app = init_app_from_webhook(webhook)
-    # Could also choose to route on webhook.message.type
-    # Note: if your manifest specifies more than one item in `features`,
-    # then `webhook.message.feature_id` may also need to be part of your routing logic
+    message_type = type(webhook.message)
+    routes = [(message_type, _feature_id(webhook.message)), (message_type, None)]
     try:
-        if isinstance(webhook.message, CanvasInitializeWebhookV2):
-            render_search_canvas(app, webhook.message)
-        elif isinstance(webhook.message, CanvasInteractionWebhookV2):
-            route_interaction_webhook(app, webhook.message)
-        elif isinstance(webhook.message, CanvasCreatedWebhookV2):
-            render_search_canvas_for_created_canvas(app, webhook.message)
-        else:
+        if not webhook_router.dispatch(routes, app, webhook.message):
             # Should only happen if the app's manifest requests webhooks that aren't handled in its code paths
             raise UnsupportedWebhookError(f"Received an unsupported webhook type: {webhook}")
         logger.debug("Successfully completed request for webhook: %s", webhook_dict)
@@ -46,3 +54,31 @@ def handle_webhook(webhook_dict: dict[str, Any]) -> None:
     # For this example, Flask error handler won't intercept this since we're within a thread
     except AppUserFacingError as e:
         logger.debug("Exiting with client error: %s", e)
+
+
+def _feature_id(message: Any) -> str | None:  # noqa: ANN401
+    # Not every message type has a feature, and it may be unset on those that do
+    try:
+        return message.feature_id
+    except (AttributeError, NotPresentError):
+        return None
+
+
+@webhook_router.route((CanvasInitializeWebhookV2, None))
+def _canvas_initialized(app: App, message: CanvasInitializeWebhookV2) -> None:
+    render_search_canvas(app, message)
+
+
+@webhook_router.route((CanvasInteractionWebhookV2, None))
+def _canvas_interaction(app: App, message: CanvasInteractionWebhookV2) -> None:
+    route_interaction_webhook(app, message)
+
+
+@webhook_router.route((CanvasCreatedWebhookV2, None))
+def _canvas_created(app: App, message: CanvasCreatedWebhookV2) -> None:
+    render_search_canvas_for_created_canvas(app, message)
+
+
+@webhook_router.route((LifecycleConfigurationUpdateWebhookV2Beta, None))
+def _configuration_updated(app: App, _message: LifecycleConfigurationUpdateWebhookV2Beta) -> None:
+    invalidate_molecule_config(app)
@@ -1,42 +1,159 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
 from typing import Any
 
 from benchling_sdk.apps.framework import App
 from benchling_sdk.helpers.serialization_helpers import fields
 from benchling_sdk.models import (
+    AsyncTaskStatus,
     Molecule,
     MoleculeCreate,
     MoleculeStructure,
     MoleculeStructureStructureFormat,
 )
 
+from local_app.lib.cache import TTLCache
 from local_app.lib.logger import get_logger
 
 logger = get_logger()
 
+# Molecules created per bulk-create request. Each batch is one async task in Benchling, so a failure
+# only fails its own batch
+_BULK_CREATE_BATCH_SIZE = 500
+_TASK_POLL_INTERVAL_SECONDS = 1
+_TASK_TIMEOUT_SECONDS = 10 * 60
+# Resolved config is kept per App installation, and dropped when Benchling sends a webhook saying it
+# changed. Only the server process handling that webhook sees it, so other processes rely on the config
+# expiring. It expires as soon as Apps do (see setup._APP_TTL_SECONDS), which bounded staleness before
+_MAX_CACHED_CONFIGS = 100
+_CONFIG_TTL_SECONDS = 5 * 60
+
+
+class BulkCreateMoleculesError(Exception):
+    def __init__(self, message: str, molecules: list[Molecule]) -> None:
+        """Raise with the molecules created by the batches which succeeded."""
+        super().__init__(message)
+        # Molecules created by the batches which succeeded
+        self.molecules = molecules
+
+
+@dataclass(frozen=True)
+class MoleculeConfig:
+    folder_id: str
+    schema_id: str
+    molecular_weight_field: str
+    mono_isotopic_field: str
+
+
+def molecule_config(app: App) -> MoleculeConfig:
+    # Creating a molecule shouldn't need to load the App's config, which is a round trip to Benchling
+    config = _molecule_config_cache().get(app.id)
+    if config is None:
+        config = _resolve_molecule_config(app)
+        _molecule_config_cache().set(app.id, config)
+    return config
+
+
+def invalidate_molecule_config(app: App) -> None:
+    _molecule_config_cache().delete(app.id)
+    # The App may also be holding the config it loaded, so it's loaded again the next time it's needed
+    app.config_store.invalidate_cache()
+
+
+def _resolve_molecule_config(app: App) -> MoleculeConfig:
+    config = app.config_store.config_by_path
+    # .required().value_str() are only needed for type safety checks like MyPy
+    # If type safety isn't a concern:
+    # `app.config_store.config_by_path(["Molecule Schema", "Molecular Weight"]).value`
+    return MoleculeConfig(
+        folder_id=config(["Sync Folder"]).required().value_str(),
+        schema_id=config(["Molecule Schema"]).required().value_str(),
+        molecular_weight_field=config(["Molecule Schema", "Molecular Weight"]).required().value_str(),
+        mono_isotopic_field=config(["Molecule Schema", "MonoIsotopic"]).required().value_str(),
+    )
+
 
 def create_molecule(app: App, chemical_result: dict[str, Any]) -> Molecule:
     logger.debug("Chemical to create: %s", chemical_result)
+    return app.benchling.molecules.create(_molecule_create(chemical_result, molecule_config(app)))
+
+
+def bulk_create_molecules(
+    app: App,
+    chemical_results: Iterable[dict[str, Any]],
+    batch_size: int = _BULK_CREATE_BATCH_SIZE,
+) -> list[Molecule]:
+    """Create a molecule for each chemical in batches, rather than with a request per molecule.
+
+    Returns the created molecules. If any batch fails, including one which couldn't be submitted or whose task
+    didn't finish in time, raises BulkCreateMoleculesError once every other batch has finished, holding the
+    molecules which were created.
+    """
+    # Config is the same for every molecule, so it's only resolved once
+    config = molecule_config(app)
+    molecule_creates = [_molecule_create(chemical_result, config) for chemical_result in chemical_results]
+    batches = [molecule_creates[i:i + batch_size] for i in range(0, len(molecule_creates), batch_size)]
+    failures = []
+    # Every batch is submitted before waiting on any, so Benchling can work on them at the same time
+    task_ids = []
+    for index, batch in enumerate(batches):
+        try:
+            task_ids.append(app.benchling.molecules.bulk_create(batch).task_id)
+        except Exception:
+            # Batches already submitted are still waited on, so their molecules are reported
+            logger.exception("Failed to submit bulk-create batch %d of %d", index + 1, len(batches))
+            failures.append(f"batch {index + 1} (not submitted)")
+    logger.debug("Submitted %d molecules in %d bulk-create tasks", len(molecule_creates), len(task_ids))
+    molecules: list[Molecule] = []
+    for task_id in task_ids:
+        try:
+            task = app.benchling.tasks.wait_for_task(
+                task_id,
+                interval_wait_seconds=_TASK_POLL_INTERVAL_SECONDS,
+                max_wait_seconds=_TASK_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            # Including WaitForTaskExpiredError. The task may still finish, but its molecules aren't reported
+            logger.exception("Failed waiting for bulk-create task %s", task_id)
+            failures.append(f"{task_id} (unfinished)")
+            continue
+        if task.status == AsyncTaskStatus.SUCCEEDED:
+            molecules.extend(
+                Molecule.from_dict(molecule) for molecule in task.response.additional_properties["molecules"]
+            )
+        else:
+            # The task's message and errors say which molecules were invalid, and are only present if set
+            logger.error("Bulk-create task %s failed: %s", task_id, task.to_dict())
+            failures.append(task_id)
+    if failures:
+        raise BulkCreateMoleculesError(
+            f"{len(failures)} of {len(batches)} bulk-create batches failed: {', '.join(failures)}",
+            molecules,
+        )
+    return molecules
+
+
+def _molecule_create(chemical_result: dict[str, Any], config: MoleculeConfig) -> MoleculeCreate:
     molecule_structure = MoleculeStructure(
         structure_format=MoleculeStructureStructureFormat.SMILES,
         value=chemical_result["smiles"],
     )
-    config = app.config_store.config_by_path
-    # .required().value_str() are only needed for type safety checks like MyPy
-    # If type safety isn't a concern:
-    # `app.config_store.config_by_path(["Molecule Schema", "Molecular Weight"]).value`
-    molecular_weight_field = config(["Molecule Schema", "Molecular Weight"]).required().value_str()
-    mono_isotopic_field = config(["Molecule Schema", "MonoIsotopic"]).required().value_str()
-    molecule_create = MoleculeCreate(
+    return MoleculeCreate(
         chemical_structure=molecule_structure,
         name=chemical_result["name"],
         aliases=[f"cid:{chemical_result['cid']}"],
-        folder_id=config(["Sync Folder"]).required().value_str(),
-        schema_id=config(["Molecule Schema"]).required().value_str(),
+        folder_id=config.folder_id,
+        schema_id=config.schema_id,
         fields=fields(
             {
-                molecular_weight_field: {"value": chemical_result["molecularWeight"]},
-                mono_isotopic_field: {"value": chemical_result["monoisotopic"]},
+                config.molecular_weight_field: {"value": chemical_result["molecularWeight"]},
+                config.mono_isotopic_field: {"value": chemical_result["monoisotopic"]},
             },
         ),
     )
-    return app.benchling.molecules.create(molecule_create)
+
+
+@cache
+def _molecule_config_cache() -> TTLCache[MoleculeConfig]:
+    return TTLCache(_MAX_CACHED_CONFIGS, _CONFIG_TTL_SECONDS)
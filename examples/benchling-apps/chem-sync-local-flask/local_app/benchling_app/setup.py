@@ -1,15 +1,36 @@
+import math
 import os
 from functools import cache
 from pathlib import Path
 
+import httpx
 from benchling_sdk.apps.framework import App
-from benchling_sdk.auth.client_credentials_oauth2 import ClientCredentialsOAuth2
 from benchling_sdk.benchling import Benchling
 from benchling_sdk.models.webhooks.v0 import WebhookEnvelopeV0
 
+from local_app.benchling_app.auth import ProactiveClientCredentialsOAuth2
+from local_app.lib.cache import SqliteCache, TTLCache
+from local_app.lib.metrics import InstrumentedTransport
+
+# Bounds how many tenants' clients (and their connection pools) we keep open at once
+_MAX_CACHED_TENANTS = 100
+# Apps cache their config once it's loaded, so they're only reused for a limited time
+# to pick up changes made to the App's configuration in Benchling
+_APP_TTL_SECONDS = 5 * 60
+# Access tokens last for an hour or less, and there's one per tenant
+_MAX_SHARED_TOKENS = 1000
+_SHARED_TOKEN_TTL_SECONDS = 60 * 60
+
 
 def init_app_from_webhook(webhook: WebhookEnvelopeV0) -> App:
-    return App(webhook.app.id, _benchling_from_webhook(webhook))
+    # Reuse Apps and Benchling clients between webhooks so API calls use warm, keep-alive connections
+    # rather than opening a new connection pool (and TLS handshakes) for every webhook
+    key = f"{webhook.base_url}|{webhook.app.id}"
+    app = _app_cache().get(key)
+    if app is None:
+        app = App(webhook.app.id, _benchling_from_webhook(webhook))
+        _app_cache().set(key, app)
+    return app
 
 
 @cache
@@ -27,15 +48,44 @@ def app_definition_id() -> str:
 
 
 def _benchling_from_webhook(webhook: WebhookEnvelopeV0) -> Benchling:
-    return Benchling(webhook.base_url, _auth_method())
+    benchling = _benchling_cache().get(webhook.base_url)
+    if benchling is None:
+        httpx_client = httpx.Client(transport=InstrumentedTransport("benchling"))
+        benchling = Benchling(webhook.base_url, _auth_method(), httpx_client=httpx_client)
+        _benchling_cache().set(webhook.base_url, benchling)
+    return benchling
+
+
+@cache
+def _app_cache() -> TTLCache[App]:
+    return TTLCache(_MAX_CACHED_TENANTS, _APP_TTL_SECONDS)
 
 
 @cache
-def _auth_method() -> ClientCredentialsOAuth2:
+def _benchling_cache() -> TTLCache[Benchling]:
+    # Least recently used tenants are evicted once the cache is full, but clients never expire
+    return TTLCache(_MAX_CACHED_TENANTS, math.inf)
+
+
+@cache
+def _auth_method() -> ProactiveClientCredentialsOAuth2:
     client_id = os.environ.get("CLIENT_ID")
     assert client_id is not None, "Missing CLIENT_ID from environment"
     client_secret = _client_secret_from_file()
-    return ClientCredentialsOAuth2(client_id, client_secret)
+    return ProactiveClientCredentialsOAuth2(client_id, client_secret, _shared_token_cache())
+
+
+def _shared_token_cache() -> SqliteCache | None:
+    # Optionally share access tokens between server processes on the same host
+    file_path = os.environ.get("BENCHLING_TOKEN_CACHE_PATH")
+    if not file_path:
+        return None
+    # Tokens are sensitive, so only the user running the App may read the file.
+    # SQLite creates its journal files with the same permissions as the database
+    path = Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch(mode=0o600)
+    return SqliteCache(path, _MAX_SHARED_TOKENS, _SHARED_TOKEN_TTL_SECONDS)
 
 
 def _client_secret_from_file() -> str:
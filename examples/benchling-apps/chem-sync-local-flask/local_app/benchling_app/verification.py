@@ -0,0 +1,64 @@
+"""Webhook verification with Benchling's public keys cached per app definition.
+
+By default, the SDK's verify() fetches the app definition's JWKs from Benchling for every webhook,
+which is a network round trip on the path to ACKing the webhook. Keys rarely change, so we keep them
+for a while and only refetch early if a webhook doesn't match any of the keys we have.
+"""
+
+import time
+from functools import cache
+
+from benchling_sdk.apps.helpers.webhook_helpers import (
+    HeadersMapping,
+    WebhookVerificationError,
+    jwks_by_app_definition,
+    verify,
+)
+from jwcrypto.jwk import JWKSet  # type: ignore[import-untyped]
+
+from local_app.lib.cache import TTLCache
+from local_app.lib.logger import get_logger
+
+logger = get_logger()
+
+_JWKS_TTL_SECONDS = 60 * 60
+# Limits how often a webhook failing verification can make us refetch keys,
+# so unverifiable requests can't trigger a key fetch every time
+_MIN_REFETCH_INTERVAL_SECONDS = 60
+_MAX_CACHED_APP_DEFINITIONS = 10
+# The only verification failure a key rotation can cause. Others, like a missing header or an old
+# timestamp, would fail the same way with fresh keys
+_NO_MATCHING_SIGNATURE_MESSAGE = "No matching signature found"
+
+
+def verify_webhook(app_definition_id: str, data: str, headers: HeadersMapping) -> None:
+    try:
+        verify(app_definition_id, data, headers, jwk_function=_cached_jwks)
+    except WebhookVerificationError as error:
+        # Benchling may have rotated its keys since we cached them
+        if str(error) != _NO_MATCHING_SIGNATURE_MESSAGE or not _expire_stale_jwks(app_definition_id):
+            raise
+        logger.info("Webhook didn't match cached keys for %s, retrying with fresh keys", app_definition_id)
+        verify(app_definition_id, data, headers, jwk_function=_cached_jwks)
+
+
+def _cached_jwks(app_definition_id: str) -> JWKSet:
+    cached = _jwks_cache().get(app_definition_id)
+    if cached is not None:
+        return cached[1]
+    jwks = jwks_by_app_definition(app_definition_id)
+    _jwks_cache().set(app_definition_id, (time.monotonic(), jwks))
+    return jwks
+
+
+def _expire_stale_jwks(app_definition_id: str) -> bool:
+    cached = _jwks_cache().get(app_definition_id)
+    if cached is not None and time.monotonic() - cached[0] < _MIN_REFETCH_INTERVAL_SECONDS:
+        return False
+    _jwks_cache().delete(app_definition_id)
+    return True
+
+
+@cache
+def _jwks_cache() -> TTLCache[tuple[float, JWKSet]]:
+    return TTLCache(_MAX_CACHED_APP_DEFINITIONS, _JWKS_TTL_SECONDS)
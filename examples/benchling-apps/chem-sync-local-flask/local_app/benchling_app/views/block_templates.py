@@ -0,0 +1,45 @@
+"""Canvas blocks converted once to the models sent to Benchling, rather than on every render.
+
+CanvasBuilder converts each block to its create or update model by serializing it to a dict and back,
+which is most of the cost of rendering a canvas. A template does that once, when its view is imported, and
+each render copies the converted blocks and fills in the few Markdown blocks whose values change.
+
+Converted blocks are shared by every render, so they must not be modified.
+"""
+
+from collections.abc import Mapping
+from typing import Any
+
+from benchling_sdk.apps.canvas.framework import CanvasBuilder
+from benchling_sdk.apps.canvas.types import UiBlock
+from benchling_sdk.models import MarkdownUiBlockType, MarkdownUiBlockUpdate
+
+
+class BlockTemplate:
+    def __init__(self, blocks: list[UiBlock]) -> None:
+        """Convert blocks to their create and update models, once."""
+        # Converted with CanvasBuilder, so templates send exactly what it would
+        builder = CanvasBuilder(app_id="", feature_id="", resource_id="", blocks=blocks)
+        self._updates = tuple(builder.to_update().blocks)
+        self._creates = tuple(builder.to_create().blocks)
+        # Positions of the top-level Markdown blocks, which can be filled in when rendering
+        self._markdown_positions = {
+            block.id: position
+            for position, block in enumerate(self._updates)
+            if isinstance(block, MarkdownUiBlockUpdate)
+        }
+
+    def updates(self, markdown: Mapping[str, str] | None = None) -> list[Any]:
+        """Return the blocks for an AppCanvasUpdate, with the values of Markdown blocks replaced by ID."""
+        blocks = list(self._updates)
+        for block_id, value in (markdown or {}).items():
+            blocks[self._markdown_positions[block_id]] = MarkdownUiBlockUpdate(
+                id=block_id,
+                type=MarkdownUiBlockType.MARKDOWN,
+                value=value,
+            )
+        return blocks
+
+    def creates(self) -> list[Any]:
+        """Return the blocks for an AppCanvasCreate."""
+        return list(self._creates)
@@ -0,0 +1,70 @@
+"""The chemical shown in a preview, kept in the canvas's data so that creating it doesn't look it up again.
+
+The chemical is stored as a compact record: a JSON array of its values in a fixed order, tagged with a
+format version and the record's SHA-256. Records which are missing, from another version, or don't match
+their hash are ignored, and the chemical is looked up on PubChem by its CID instead.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from local_app.benchling_app.views.constants import CHEMICAL_KEY, CID_KEY
+from local_app.lib.logger import get_logger
+
+logger = get_logger()
+
+_RECORD_VERSION = 1
+# The order of values in a record. Changing it requires a new version
+_RECORD_FIELDS = ("cid", "name", "smiles", "molecularWeight", "monoisotopic")
+# Canvas data is sent with every update to the canvas, so unusually large chemicals are looked up again
+_MAX_RECORD_BYTES = 4 * 1024
+
+
+def preview_data(chemical: dict[str, Any]) -> dict[str, Any]:
+    data: dict[str, Any] = {CID_KEY: chemical["cid"]}
+    record = json.dumps([chemical.get(field) for field in _RECORD_FIELDS], separators=(",", ":"))
+    if len(record.encode()) <= _MAX_RECORD_BYTES:
+        data[CHEMICAL_KEY] = {
+            "version": _RECORD_VERSION,
+            "sha256": hashlib.sha256(record.encode()).hexdigest(),
+            "record": record,
+        }
+    return data
+
+
+def chemical_from_data(data: dict[str, Any]) -> dict[str, Any] | None:
+    """Return the chemical stored in canvas data, or None if it isn't there or can't be trusted."""
+    stored = data.get(CHEMICAL_KEY)
+    if not isinstance(stored, dict) or stored.get("version") != _RECORD_VERSION:
+        return None
+    record = stored.get("record")
+    if not isinstance(record, str) or len(record.encode()) > _MAX_RECORD_BYTES:
+        return None
+    if hashlib.sha256(record.encode()).hexdigest() != stored.get("sha256"):
+        logger.warning("Ignoring chemical in canvas data which doesn't match its hash")
+        return None
+    values = _record_values(record)
+    if values is None:
+        return None
+    chemical = dict(zip(_RECORD_FIELDS, values, strict=True))
+    if str(chemical["cid"]) != str(data.get(CID_KEY)):
+        return None
+    return chemical
+
+
+def _record_values(record: str) -> list[Any] | None:
+    try:
+        values = json.loads(record)
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(_RECORD_FIELDS) or not all(map(_is_value, values)):
+        return None
+    return values
+
+
+def _is_value(value: object) -> bool:
+    # Every field is needed to create the molecule, so a missing or empty value means the record can't be used
+    if isinstance(value, str):
+        return bool(value)
+    return isinstance(value, int | float) and not isinstance(value, bool)
@@ -1,7 +1,8 @@
-from benchling_sdk.apps.canvas.framework import CanvasBuilder
 from benchling_sdk.apps.canvas.types import UiBlock
 from benchling_sdk.apps.framework import App
 from benchling_sdk.models import (
+    AppCanvasCreate,
+    AppCanvasUpdate,
     ButtonUiBlock,
     ButtonUiBlockType,
     MarkdownUiBlock,
@@ -14,25 +15,33 @@ from benchling_sdk.models.webhooks.v0 import (
     CanvasInitializeWebhookV2,
 )
 
+from local_app.benchling_app.canvas_state import create_canvas, update_canvas
+from local_app.benchling_app.views.block_templates import BlockTemplate
 from local_app.benchling_app.views.constants import SEARCH_BUTTON_ID, SEARCH_TEXT_ID
 
 
 def render_search_canvas(app: App, canvas_initialized: CanvasInitializeWebhookV2) -> None:
     with app.create_session_context("Show Sync Search", timeout_seconds=20):
-        canvas_builder = CanvasBuilder(
+        canvas_create = AppCanvasCreate(
             app_id=app.id,
             feature_id=canvas_initialized.feature_id,
             resource_id=canvas_initialized.resource_id,
+            blocks=INPUT_TEMPLATE.creates(),
+            enabled=True,
+            session_id=None,
+            data=None,
         )
-        canvas_builder.blocks.append(input_blocks())
-        app.benchling.apps.create_canvas(canvas_builder.to_create())
+        create_canvas(app, canvas_create)
 
 
 def render_search_canvas_for_created_canvas(app: App, canvas_created: CanvasCreatedWebhookV2) -> None:
     with app.create_session_context("Show Sync Search", timeout_seconds=20):
-        canvas_builder = CanvasBuilder(app_id=app.id, feature_id=canvas_created.feature_id)
-        canvas_builder.blocks.append(input_blocks())
-        app.benchling.apps.update_canvas(canvas_created.canvas_id, canvas_builder.to_update())
+        canvas_update = AppCanvasUpdate(
+            feature_id=canvas_created.feature_id,
+            blocks=INPUT_TEMPLATE.updates(),
+            enabled=True,
+        )
+        update_canvas(app, canvas_created.canvas_id, canvas_update)
 
 
 def input_blocks() -> list[UiBlock]:
@@ -54,3 +63,6 @@ def input_blocks() -> list[UiBlock]:
             type=ButtonUiBlockType.BUTTON,
         ),
     ]
+
+
+INPUT_TEMPLATE = BlockTemplate(input_blocks())
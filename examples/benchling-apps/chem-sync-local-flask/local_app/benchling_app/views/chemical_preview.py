@@ -1,9 +1,11 @@
+import json
 from typing import Any
 
 from benchling_sdk.apps.canvas.framework import CanvasBuilder
 from benchling_sdk.apps.canvas.types import UiBlock
 from benchling_sdk.apps.status.framework import SessionContextManager
 from benchling_sdk.models import (
+    AppCanvasUpdate,
     AppSessionMessageCreate,
     AppSessionMessageStyle,
     AppSessionUpdateStatus,
@@ -15,14 +17,16 @@ from benchling_sdk.models import (
     SectionUiBlockType,
 )
 
-from local_app.benchling_app.views.canvas_initialize import input_blocks
+from local_app.benchling_app.canvas_state import update_canvas
+from local_app.benchling_app.views.block_templates import BlockTemplate
+from local_app.benchling_app.views.canvas_data import preview_data
+from local_app.benchling_app.views.canvas_initialize import INPUT_TEMPLATE
 from local_app.benchling_app.views.constants import (
     CANCEL_BUTTON_ID,
-    CID_KEY,
     CREATE_BUTTON_ID,
     SEARCH_TEXT_ID,
 )
-from local_app.lib.pub_chem import image_url
+from local_app.lib.structure_images import image_url
 
 
 def render_preview_canvas(
@@ -34,22 +38,23 @@ def render_preview_canvas(
     if results:
         # Just take the first result, as an example
         chemical = results[0]
-        # Add the result to the canvas as data that won't be shown to the user but can be retrieved later
-        canvas_builder = canvas_builder\
-            .with_blocks(_preview_blocks(chemical))\
-            .with_data({CID_KEY: chemical["cid"]})\
-            .with_enabled()
-        session.app.benchling.apps.update_canvas(
-            canvas_id,
-            canvas_builder.to_update(),
+        canvas_update = AppCanvasUpdate(
+            blocks=_PREVIEW_TEMPLATE.updates({
+                "chemical_preview": f"**Name**: {chemical['name']}\n\n**Structure**: {chemical['smiles']}",
+                "chemical_image": f'![{chemical["name"]}]({image_url(chemical["cid"])})',
+            }),
+            # Add the result to the canvas as data that won't be shown to the user but can be retrieved later
+            data=json.dumps(preview_data(chemical)),
+            enabled=True,
         )
+        update_canvas(session.app, canvas_id, canvas_update)
     else:
         user_input = canvas_builder.inputs_to_dict()[SEARCH_TEXT_ID]
         # Clear the search input and re-enable canvas so user can input a new search
-        canvas_builder = canvas_builder.with_blocks(input_blocks()).with_enabled()
-        session.app.benchling.apps.update_canvas(
+        update_canvas(
+            session.app,
             canvas_id,
-            canvas_builder.to_update(),
+            AppCanvasUpdate(blocks=INPUT_TEMPLATE.updates(), enabled=True),
         )
         session.close_session(
             AppSessionUpdateStatus.SUCCEEDED,
@@ -62,7 +67,7 @@ def render_preview_canvas(
         )
 
 
-def _preview_blocks(chemical: dict[str, Any]) -> list[UiBlock]:
+def _preview_blocks() -> list[UiBlock]:
     return [
         MarkdownUiBlock(
             id="results",
@@ -72,14 +77,13 @@ def _preview_blocks(chemical: dict[str, Any]) -> list[UiBlock]:
         MarkdownUiBlock(
             id="chemical_preview",
             type=MarkdownUiBlockType.MARKDOWN,
-            value=(
-                f"**Name**: {chemical['name']}\n\n**Structure**: {chemical['smiles']}"
-            ),
+            # Filled in with the chemical when rendering
+            value="",
         ),
         MarkdownUiBlock(
             id="chemical_image",
             type=MarkdownUiBlockType.MARKDOWN,
-            value=f'![{chemical["name"]}]({image_url(chemical["cid"])})',
+            value="",
         ),
         MarkdownUiBlock(
             id="user_prompt",
@@ -103,3 +107,6 @@ def _preview_blocks(chemical: dict[str, Any]) -> list[UiBlock]:
             ],
         ),
     ]
+
+
+_PREVIEW_TEMPLATE = BlockTemplate(_preview_blocks())
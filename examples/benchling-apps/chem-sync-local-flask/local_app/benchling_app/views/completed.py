@@ -1,8 +1,8 @@
-from benchling_sdk.apps.canvas.framework import CanvasBuilder
 from benchling_sdk.apps.canvas.types import UiBlock
 from benchling_sdk.apps.status.framework import SessionContextManager
 from benchling_sdk.apps.status.helpers import ref
 from benchling_sdk.models import (
+    AppCanvasUpdate,
     AppSessionMessageCreate,
     AppSessionMessageStyle,
     AppSessionUpdateStatus,
@@ -11,17 +11,19 @@ from benchling_sdk.models import (
     Molecule,
 )
 
+from local_app.benchling_app.canvas_state import update_canvas
+from local_app.benchling_app.views.block_templates import BlockTemplate
+
 
 def render_completed_canvas(
     molecule: Molecule,
     canvas_id: str,
-    canvas_builder: CanvasBuilder,
     session: SessionContextManager,
 ) -> None:
-    canvas_builder = canvas_builder.with_blocks(_completed_blocks())
-    session.app.benchling.apps.update_canvas(
+    update_canvas(
+        session.app,
         canvas_id,
-        canvas_builder.with_enabled().to_update(),
+        AppCanvasUpdate(blocks=_COMPLETED_TEMPLATE.updates(), enabled=True),
     )
     session.close_session(
         AppSessionUpdateStatus.SUCCEEDED,
@@ -43,3 +45,6 @@ def _completed_blocks() -> list[UiBlock]:
             value="The chemical has been synced into Benchling! Please follow procedures for next steps.",
         ),
     ]
+
+
+_COMPLETED_TEMPLATE = BlockTemplate(_completed_blocks())
@@ -8,3 +8,4 @@ SEARCH_TEXT_ID = "search_text"
 
 # Keys for canvas data
 CID_KEY = "chemical_cid"
+CHEMICAL_KEY = "chemical"
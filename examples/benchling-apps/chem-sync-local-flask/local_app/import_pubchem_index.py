@@ -0,0 +1,47 @@
+"""Build or update the local PubChem index from a file of chemical names, one per line.
+
+Each name is searched for on PubChem, and its results are added to the index at PUBCHEM_INDEX_PATH:
+
+    PUBCHEM_INDEX_PATH=.data/pubchem_index.db python -m local_app.import_pubchem_index reagents.txt
+
+Names which are already indexed are skipped, so an interrupted import can be run again to finish it.
+"""
+
+import argparse
+from pathlib import Path
+from urllib.parse import quote
+
+from local_app.lib.logger import get_logger
+from local_app.lib.pub_chem import search
+from local_app.lib.pubchem_index import pubchem_index
+
+logger = get_logger()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("names_file", type=Path, help="File of chemical names to index, one per line")
+    parser.add_argument("--limit", type=int, default=1, help="Search results to index for each name")
+    args = parser.parse_args()
+    index = pubchem_index()
+    assert index is not None, "Missing PUBCHEM_INDEX_PATH from environment"
+    names = [line.strip() for line in args.names_file.read_text().splitlines() if line.strip()]
+    indexed = 0
+    for name in names:
+        if index.search(name, args.limit) is not None:
+            continue
+        # Requests are paced by pub_chem's rate limiter, so large imports take a while but aren't throttled
+        results = search(quote(name), args.limit)
+        if results:
+            index.add(name, results)
+            indexed += 1
+        else:
+            logger.warning("No PubChem results for %s", name)
+    logger.info("Indexed %d of %d names", indexed, len(names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Size-bounded caches with per-entry expiry, held in memory or in a SQLite file shared between processes."""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from local_app.lib.sqlite import connect
+
+V = TypeVar("V")
+
+# Expired rows in a SQLite cache are purged on every Nth write, rather than on every write
+_PURGE_EVERY_N_WRITES = 100
+
+
+class Cache(ABC, Generic[V]):
+    @abstractmethod
+    def get(self, key: str) -> V | None:
+        """Return the cached value for key, or None if it's missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: V, ttl_seconds: float | None = None) -> None:
+        """Cache a value, replacing any existing value for key."""
+
+    @abstractmethod
+    def add(self, key: str, value: V, ttl_seconds: float | None = None) -> bool:
+        """Cache a value only if key is missing or expired. Returns whether it was added."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key from the cache, if present."""
+
+
+class TTLCache(Cache[V]):
+    """An in-memory LRU cache, evicting the least recently used entry once max_entries is reached."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        """Cache up to max_entries values in memory, each for ttl_seconds unless set with its own TTL."""
+        assert max_entries > 0, "max_entries must be positive"
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: str) -> V | None:
+        """Return the cached value for key, or None if it's missing or expired."""
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: V, ttl_seconds: float | None = None) -> None:
+        """Cache a value, replacing any existing value for key."""
+        with self._lock:
+            self._set(key, value, ttl_seconds)
+
+    def add(self, key: str, value: V, ttl_seconds: float | None = None) -> bool:
+        """Cache a value only if key is missing or expired. Returns whether it was added."""
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, ttl_seconds)
+            return True
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache, if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _get(self, key: str) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: V, ttl_seconds: float | None) -> None:
+        ttl = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class SqliteCache(Cache[Any]):
+    """A cache of JSON-serializable values in a SQLite file, which can be shared by several processes."""
+
+    def __init__(self, path: str | Path, max_entries: int, ttl_seconds: float) -> None:
+        """Cache up to max_entries values in the SQLite file at path, creating it if needed."""
+        assert max_entries > 0, "max_entries must be positive"
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)",
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value for key, or None if it's missing or expired."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float | None = None) -> None:  # noqa: ANN401
+        """Cache a value, replacing any existing value for key."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), self._expires_at(ttl_seconds)),
+            )
+            self._after_write()
+
+    def add(self, key: str, value: Any, ttl_seconds: float | None = None) -> bool:  # noqa: ANN401
+        """Cache a value only if key is missing or expired. Returns whether it was added."""
+        with self._lock:
+            # A single statement, so it's atomic even when other processes share the file
+            cursor = self._connection.execute(
+                "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE cache.expires_at <= ?",
+                (key, json.dumps(value), self._expires_at(ttl_seconds), time.time()),
+            )
+            added = cursor.rowcount > 0
+            if added:
+                self._after_write()
+            return added
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache, if present."""
+        with self._lock:
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _expires_at(self, ttl_seconds: float | None) -> float:
+        return time.time() + (self._ttl_seconds if ttl_seconds is None else ttl_seconds)
+
+    def _after_write(self) -> None:
+        self._writes += 1
+        if self._writes % _PURGE_EVERY_N_WRITES:
+            return
+        self._connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        # Past max_entries, evict the entries closest to expiring
+        self._connection.execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
@@ -0,0 +1,188 @@
+"""A persistent queue of webhook jobs, so accepted webhooks aren't lost if the process restarts.
+
+Jobs are delivered at least once: a claimed job is leased to its consumer, and if it isn't acknowledged
+before the lease expires (for instance, because the process died mid-way) it is delivered again.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+from local_app.lib.logger import get_logger
+from local_app.lib.metrics import CallbackMetric
+from local_app.lib.sqlite import connect
+from local_app.lib.worker_pool import WorkerPool
+
+logger = get_logger()
+
+_DEFAULT_LEASE_SECONDS = 300
+_DEFAULT_MAX_ATTEMPTS = 3
+_CLAIM_BATCH_SIZE = 10
+_POLL_INTERVAL_SECONDS = 1.0
+# How often to check for an idle worker while every worker is busy
+_BUSY_POLL_INTERVAL_SECONDS = 0.1
+_MAX_ERROR_BACKOFF_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class Job:
+    id: int
+    payload: str
+    attempts: int
+
+
+class JobQueue(ABC):
+    @abstractmethod
+    def put(self, payload: str) -> None:
+        """Durably append a job to the queue."""
+
+    @abstractmethod
+    def claim(self, limit: int) -> list[Job]:
+        """Lease up to `limit` available jobs, oldest first."""
+
+    @abstractmethod
+    def ack(self, job_id: int) -> None:
+        """Remove a completed job from the queue."""
+
+    def wait(self, timeout: float) -> None:
+        """Block until a job may be available, or timeout seconds have passed."""
+        time.sleep(timeout)
+
+
+class SqliteJobQueue(JobQueue):
+    def __init__(self, path: str | Path, lease_seconds: float = _DEFAULT_LEASE_SECONDS) -> None:
+        """Open or create the queue in the SQLite file at path, leasing claimed jobs for lease_seconds."""
+        self._lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._available = threading.Event()
+        self._connection = connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "visible_at REAL NOT NULL)",
+        )
+
+    def put(self, payload: str) -> None:
+        """Durably append a job to the queue."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO jobs (payload, visible_at) VALUES (?, ?)",
+                (payload, time.time()),
+            )
+        self._available.set()
+
+    def claim(self, limit: int) -> list[Job]:
+        """Lease up to `limit` available jobs, oldest first."""
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes can't claim the same jobs
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._connection.execute(
+                    "SELECT id, payload, attempts FROM jobs WHERE visible_at <= ? ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._connection.executemany(
+                    "UPDATE jobs SET attempts = attempts + 1, visible_at = ? WHERE id = ?",
+                    [(now + self._lease_seconds, row[0]) for row in rows],
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return [Job(id=job_id, payload=payload, attempts=attempts + 1) for job_id, payload, attempts in rows]
+
+    def ack(self, job_id: int) -> None:
+        """Remove a completed job from the queue."""
+        with self._lock:
+            self._connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def wait(self, timeout: float) -> None:
+        """Block until a job may be available, or timeout seconds have passed."""
+        # Only jobs put by this process set the event, so other processes' jobs are found by polling
+        self._available.wait(timeout)
+        self._available.clear()
+
+    def depth(self) -> int:
+        """Return the number of jobs not yet acknowledged, including leased jobs."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+def start_consumer(
+    queue: JobQueue,
+    pool: WorkerPool,
+    handler: Callable[[str], None],
+    max_attempts: int = _DEFAULT_MAX_ATTEMPTS,
+    stop: threading.Event | None = None,
+) -> threading.Thread:
+    """Start a thread draining jobs from the queue into the worker pool, until `stop` is set."""
+    stop = stop if stop is not None else threading.Event()
+
+    def _run(job: Job) -> None:
+        # Only ack once the handler succeeds. A failed job becomes visible again when its lease expires
+        handler(job.payload)
+        queue.ack(job.id)
+
+    def _consume_once() -> None:
+        # Only claim jobs a worker can start now, so their leases aren't spent waiting in the pool's queue
+        limit = min(_CLAIM_BATCH_SIZE, pool.idle_workers())
+        if limit == 0:
+            stop.wait(_BUSY_POLL_INTERVAL_SECONDS)
+            return
+        jobs = queue.claim(limit)
+        if not jobs:
+            queue.wait(_POLL_INTERVAL_SECONDS)
+            return
+        for job in jobs:
+            if job.attempts > max_attempts:
+                logger.error("Dropping job %s after %s failed attempts", job.id, max_attempts)
+                queue.ack(job.id)
+                continue
+            pool.submit(_run, job)
+
+    def _consume() -> None:
+        backoff = _POLL_INTERVAL_SECONDS
+        while not stop.is_set():
+            try:
+                _consume_once()
+                backoff = _POLL_INTERVAL_SECONDS
+            except Exception:
+                # Without this, an error such as a locked database would silently kill the consumer, and
+                # webhooks would keep being accepted but never handled
+                logger.exception("Error consuming webhook jobs, retrying in %s s", backoff)
+                stop.wait(backoff)
+                backoff = min(backoff * 2, _MAX_ERROR_BACKOFF_SECONDS)
+
+    thread = threading.Thread(target=_consume, name="webhook-job-consumer", daemon=True)
+    thread.start()
+    return thread
+
+
+@cache
+def webhook_job_queue() -> JobQueue | None:
+    # The persistent queue is opt-in. Without it, webhooks are handed straight to the worker pool
+    path = os.environ.get("WEBHOOK_QUEUE_PATH")
+    if not path:
+        return None
+    return SqliteJobQueue(path)
+
+
+def _persisted_job_count() -> float:
+    job_queue = webhook_job_queue()
+    return job_queue.depth() if isinstance(job_queue, SqliteJobQueue) else 0
+
+
+CallbackMetric(
+    "benchling_app_job_queue_depth",
+    "Webhooks persisted to the job queue and not yet handled",
+    "gauge",
+    _persisted_job_count,
+)
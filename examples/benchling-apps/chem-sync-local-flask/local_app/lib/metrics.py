@@ -0,0 +1,189 @@
+"""Latency and throughput metrics, exposed in Prometheus' text format on the /metrics route.
+
+Metrics are disabled unless BENCHLING_APP_METRICS is set to "true". While disabled, recording
+a metric returns immediately, so instrumented code paths pay close to nothing.
+"""
+
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import cache
+
+import httpx
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Path segments that identify a resource, like Benchling IDs (cnvs_6RvTm4mA) or PubChem CIDs (2244)
+_RESOURCE_ID_PATTERN = re.compile(r"^([a-z]+_[A-Za-z0-9]+|\d+)$")
+
+
+@cache
+def metrics_enabled() -> bool:
+    return os.environ.get("BENCHLING_APP_METRICS", "false").lower() == "true"
+
+
+class _Metric(ABC):
+    def __init__(self, name: str, description: str, metric_type: str) -> None:
+        assert name not in _registry, f"Metric {name} is already registered"
+        self.name = name
+        self.description = description
+        self.metric_type = metric_type
+        _registry[name] = self
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Yield the metric's samples as lines of Prometheus' text format."""
+
+
+class Counter(_Metric):
+    def __init__(self, name: str, description: str) -> None:
+        """Register a counter, exported under name."""
+        super().__init__(name, description, "counter")
+        self._lock = threading.Lock()
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the counter for the given labels."""
+        if not metrics_enabled():
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        """Yield the metric's samples as lines of Prometheus' text format."""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(key)} {value}"
+
+
+class Histogram(_Metric):
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = _DEFAULT_BUCKETS) -> None:
+        """Register a histogram, exported under name, counting observations into buckets."""
+        super().__init__(name, description, "histogram")
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        # Per label set: a count for each bucket, then the sum and count of all observations
+        self._values: dict[tuple[tuple[str, str], ...], tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation, such as a duration in seconds, for the given labels."""
+        if not metrics_enabled():
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            bucket_counts, total, count = self._values.get(key, ([0] * len(self._buckets), 0.0, 0))
+            for i, upper_bound in enumerate(self._buckets):
+                if value <= upper_bound:
+                    bucket_counts[i] += 1
+            self._values[key] = (bucket_counts, total + value, count + 1)
+
+    def time(self, **labels: str) -> AbstractContextManager[None]:
+        """Observe how long the body of a `with` block takes, in seconds."""
+        if not metrics_enabled():
+            return nullcontext()
+        return self._timed(labels)
+
+    @contextmanager
+    def _timed(self, labels: dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[str]:
+        """Yield the metric's samples as lines of Prometheus' text format."""
+        with self._lock:
+            values = {key: (list(value[0]), *value[1:]) for key, value in self._values.items()}
+        for key, (bucket_counts, total, count) in values.items():
+            for upper_bound, bucket_count in zip(self._buckets, bucket_counts, strict=True):
+                yield f"{self.name}_bucket{_format_labels((*key, ('le', str(upper_bound))))} {bucket_count}"
+            yield f"{self.name}_bucket{_format_labels((*key, ('le', '+Inf')))} {count}"
+            yield f"{self.name}_sum{_format_labels(key)} {total}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+
+class CallbackMetric(_Metric):
+    """A metric whose value is read when metrics are collected, such as the current depth of a queue."""
+
+    def __init__(self, name: str, description: str, metric_type: str, callback: Callable[[], float]) -> None:
+        """Register a metric of metric_type whose value is returned by callback."""
+        super().__init__(name, description, metric_type)
+        self._callback = callback
+
+    def samples(self) -> Iterator[str]:
+        """Yield the metric's samples as lines of Prometheus' text format."""
+        yield f"{self.name} {self._callback()}"
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """An httpx transport recording the duration of each outbound request."""
+
+    def __init__(self, service: str, transport: httpx.BaseTransport | None = None) -> None:
+        """Wrap transport, or a new HTTPTransport, recording requests under service."""
+        self._service = service
+        self._transport = transport if transport else httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request, timing it until the response headers are received."""
+        with OUTBOUND_REQUEST_SECONDS.time(
+            service=self._service,
+            method=request.method,
+            path=_path_template(request.url.path),
+        ):
+            return self._transport.handle_request(request)
+
+    def close(self) -> None:
+        """Close the underlying transport."""
+        self._transport.close()
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry.values():
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{name}="{_escape(value)}"' for name, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _path_template(path: str) -> str:
+    # Replace IDs so that each API operation is one series, rather than one series per resource
+    return "/".join("{id}" if _RESOURCE_ID_PATTERN.match(segment) else segment for segment in path.split("/"))
+
+
+_registry: dict[str, _Metric] = {}
+
+VERIFY_SECONDS = Histogram(
+    "benchling_app_webhook_verify_seconds",
+    "Time spent verifying webhook signatures",
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "benchling_app_webhook_queue_wait_seconds",
+    "Time webhooks waited in the worker pool's queue before being handled",
+)
+ROUTE_SECONDS = Histogram(
+    "benchling_app_route_seconds",
+    "Time spent handling webhooks and button interactions, by route",
+)
+OUTBOUND_REQUEST_SECONDS = Histogram(
+    "benchling_app_outbound_request_seconds",
+    "Time spent on requests to Benchling and PubChem, by operation",
+)
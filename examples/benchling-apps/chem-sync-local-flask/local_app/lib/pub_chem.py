@@ -1,61 +1,413 @@
 """Helpers for working with data from PubChem, a free database of chemical information.
 
 https://pubchem.ncbi.nlm.nih.gov/
+
+Each lookup has an async twin (e.g. `async_search`), for callers running on an event loop. Both share the
+same response cache, rate limits and local index.
 """
 
+import asyncio
+import os
+import random
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from functools import cache
-from typing import Any
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, TypeVar
+from urllib.parse import unquote
+from weakref import WeakKeyDictionary
 
 import httpx
 
+from local_app.lib.cache import Cache, SqliteCache, TTLCache
+from local_app.lib.metrics import OUTBOUND_REQUEST_SECONDS, Counter
+from local_app.lib.pubchem_index import pubchem_index
+from local_app.lib.rate_limiter import LocalRateLimiter, RateLimit, RateLimiter, SqliteRateLimiter
+from local_app.lib.single_flight import AsyncSingleFlight, SingleFlight
+
+V = TypeVar("V")
+
 PUBCHEM_BASE_URI = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/"
 
+# A compound record is typically 5-20 KiB of JSON, so this bounds the in-memory cache to tens of MiB
+_MAX_CACHED_RESPONSES = 2000
+# PubChem's records rarely change, but are occasionally corrected
+_RESPONSE_TTL_SECONDS = 24 * 60 * 60
+# A name with no match may be added to PubChem, and a search for it is likely retried soon after
+_NOT_FOUND_TTL_SECONDS = 5 * 60
+
+_DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+_DEFAULT_READ_TIMEOUT_SECONDS = 15.0
+# PubChem responds 503 when it's busy and 429 when we exceed its request rate
+_RETRY_STATUS_CODES = frozenset({httpx.codes.TOO_MANY_REQUESTS, httpx.codes.SERVICE_UNAVAILABLE})
+_MAX_ATTEMPTS = 4
+_RETRY_BASE_DELAY_SECONDS = 0.5
+# Retry-After longer than this isn't worth holding a worker for, so the request gives up instead
+_MAX_RETRY_AFTER_SECONDS = 5.0
+# Properties fetched in bulk from PubChem's property table, rather than read from full compound records
+_PROPERTIES = "Title,SMILES,MolecularWeight,MonoisotopicMass"
+# Keeps property table URLs well under PubChem's limit on URL length
+_MAX_CIDS_PER_REQUEST = 100
+# PubChem's usage policy: https://pubchem.ncbi.nlm.nih.gov/docs/programmatic-access
+_RATE_LIMITS = (RateLimit(requests=5, per_seconds=1), RateLimit(requests=400, per_seconds=60))
+# Props read from full compound records, by their label and name. A name of None matches any name
+_COMPOUND_PROPS: dict[str, tuple[str, str | None]] = {
+    "smiles": ("SMILES", "Absolute"),
+    "molecularWeight": ("Molecular Weight", None),
+    "monoisotopic": ("Weight", "MonoIsotopic"),
+}
+_COMPOUND_PROPS_KEY = "CompoundProps"
+# Requests in flight to PubChem at once, across all webhooks being handled by this process
+_DEFAULT_MAX_CONCURRENT_REQUESTS = 5
+
+CACHE_REQUESTS = Counter(
+    "benchling_app_pubchem_cache_requests_total",
+    "PubChem responses looked up in the cache, by whether they were a hit, a miss, "
+    "or a miss which shared an identical request already in flight",
+)
+INDEX_REQUESTS = Counter(
+    "benchling_app_pubchem_index_requests_total",
+    "Lookups in the local PubChem index, by whether they were a hit or miss",
+)
+
+# Concurrent misses for the same URL share one request
+_in_flight: SingleFlight[dict[str, Any]] = SingleFlight()
+_async_in_flight: AsyncSingleFlight[dict[str, Any]] = AsyncSingleFlight()
+# An AsyncClient's connections belong to the event loop they were opened on, so each loop has its own client
+_async_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = WeakKeyDictionary()
+
 
-@cache
 def _pubchem_get(url: str) -> dict[str, Any]:
-    return httpx.get(f"{PUBCHEM_BASE_URI}{url}").json()
+    cached = _response_cache().get(url)
+    if cached is not None:
+        CACHE_REQUESTS.inc(result="hit")
+        return cached
+    response_json, coalesced = _in_flight.do(url, lambda: _fetch(url))
+    CACHE_REQUESTS.inc(result="coalesced" if coalesced else "miss")
+    return response_json
 
 
-def _get_compound_string_prop(
-    compound_json: dict[str, Any], label: str, name: str | None = None,
-) -> str | None:
-    matching_props = [
-        p
-        for p in compound_json["props"]
-        if p["urn"]["label"] == label and (not name or (p["urn"]["name"] == name))
-    ]
-    if matching_props:
-        return matching_props[0]["value"]["sval"]
-    return None
+async def _async_pubchem_get(url: str) -> dict[str, Any]:
+    cached = await _run_cache_operation(_response_cache().get, url)
+    if cached is not None:
+        CACHE_REQUESTS.inc(result="hit")
+        return cached
+    response_json, coalesced = await _async_in_flight.do(url, lambda: _async_fetch(url))
+    CACHE_REQUESTS.inc(result="coalesced" if coalesced else "miss")
+    return response_json
+
+
+def _fetch(url: str) -> dict[str, Any]:
+    return _cache_response(url, _get_with_retries(url))
+
+
+async def _async_fetch(url: str) -> dict[str, Any]:
+    response = await _async_get_with_retries(url)
+    return await _run_cache_operation(_cache_response, url, response)
+
+
+async def _run_cache_operation(fn: Callable[..., V], *args: Any) -> V:  # noqa: ANN401
+    # Reading or writing a SQLite cache can wait on another process's write lock, up to the busy timeout,
+    # so it's done on a thread rather than blocking the event loop. The in-memory cache is quick enough
+    if isinstance(_response_cache(), SqliteCache):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+def _cache_response(url: str, response: httpx.Response) -> dict[str, Any]:
+    response_json = response.json()
+    if response.is_success:
+        response_json = _compact(response_json)
+        _response_cache().set(url, response_json)
+    elif response.status_code == httpx.codes.NOT_FOUND:
+        # PubChem responds 404 when nothing matches, which is worth remembering briefly
+        _response_cache().set(url, response_json, ttl_seconds=_NOT_FOUND_TTL_SECONDS)
+    # Other errors, like PubChem being busy, aren't cached so the next request tries again
+    return response_json
+
+
+def _pubchem_get_many(urls: list[str]) -> list[dict[str, Any]]:
+    # All of a lookup's requests are submitted at once, rather than nesting fan-outs (e.g. search, then each
+    # get_by_cid), so a full pool can't deadlock on tasks waiting for tasks queued behind them
+    if len(urls) == 1:
+        return [_pubchem_get(urls[0])]
+    return list(_executor().map(_pubchem_get, urls))
+
+
+async def _async_pubchem_get_many(urls: list[str]) -> list[dict[str, Any]]:
+    # Requests in flight at once are bounded by the async client's connection limit
+    return list(await asyncio.gather(*(_async_pubchem_get(url) for url in urls)))
+
+
+def _get_with_retries(url: str) -> httpx.Response:
+    for attempt in range(1, _MAX_ATTEMPTS):
+        try:
+            response = _get(url)
+        except httpx.TransportError:
+            # Connection failures and timeouts are usually as short-lived as PubChem being busy
+            time.sleep(_backoff_seconds(attempt))
+            continue
+        if response.status_code not in _RETRY_STATUS_CODES:
+            return response
+        delay_seconds = _retry_delay_seconds(attempt, response)
+        if delay_seconds is None:
+            return response
+        time.sleep(delay_seconds)
+    return _get(url)
+
+
+async def _async_get_with_retries(url: str) -> httpx.Response:
+    for attempt in range(1, _MAX_ATTEMPTS):
+        try:
+            response = await _async_get(url)
+        except httpx.TransportError:
+            await asyncio.sleep(_backoff_seconds(attempt))
+            continue
+        if response.status_code not in _RETRY_STATUS_CODES:
+            return response
+        delay_seconds = _retry_delay_seconds(attempt, response)
+        if delay_seconds is None:
+            return response
+        await asyncio.sleep(delay_seconds)
+    return await _async_get(url)
+
+
+def _get(url: str) -> httpx.Response:
+    # Pace requests to stay within PubChem's limits, rather than being throttled and retrying
+    _rate_limiter().acquire()
+    with OUTBOUND_REQUEST_SECONDS.time(service="pubchem", method="GET", path=_operation(url)):
+        return _client().get(f"{PUBCHEM_BASE_URI}{url}")
+
+
+async def _async_get(url: str) -> httpx.Response:
+    await _rate_limiter().async_acquire()
+    with OUTBOUND_REQUEST_SECONDS.time(service="pubchem", method="GET", path=_operation(url)):
+        return await _async_client().get(f"{PUBCHEM_BASE_URI}{url}")
+
+
+def _retry_delay_seconds(attempt: int, response: httpx.Response) -> float | None:
+    """Return how long to wait before retrying, or None if PubChem asked for too long a wait."""
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after) if float(retry_after) <= _MAX_RETRY_AFTER_SECONDS else None
+    return _backoff_seconds(attempt)
+
+
+def _backoff_seconds(attempt: int) -> float:
+    # Full jitter, so that workers throttled at the same time don't all retry at the same time
+    return random.uniform(0, _RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))  # noqa: S311
+
+
+@cache
+def _client() -> httpx.Client:
+    # One client per process, so requests reuse pooled keep-alive connections rather than each
+    # opening a new connection and TLS session
+    # HTTP/2 multiplexes concurrent requests over one connection, if the optional h2 package is installed
+    return httpx.Client(timeout=_timeout(), http2=find_spec("h2") is not None)
+
+
+def _async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=_timeout(),
+            http2=find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=_max_concurrent_requests()),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        float(os.environ.get("PUBCHEM_READ_TIMEOUT_SECONDS", _DEFAULT_READ_TIMEOUT_SECONDS)),
+        connect=float(os.environ.get("PUBCHEM_CONNECT_TIMEOUT_SECONDS", _DEFAULT_CONNECT_TIMEOUT_SECONDS)),
+    )
+
+
+def _max_concurrent_requests() -> int:
+    return int(os.environ.get("PUBCHEM_MAX_CONCURRENT_REQUESTS", _DEFAULT_MAX_CONCURRENT_REQUESTS))
+
+
+@cache
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=_max_concurrent_requests(), thread_name_prefix="pubchem")
+
+
+@cache
+def _rate_limiter() -> RateLimiter:
+    # Optionally share the limits between server processes on the same host, since PubChem limits by IP
+    file_path = os.environ.get("PUBCHEM_RATE_LIMIT_PATH")
+    if file_path:
+        return SqliteRateLimiter("pubchem", _RATE_LIMITS, Path(file_path))
+    return LocalRateLimiter("pubchem", _RATE_LIMITS)
+
+
+@cache
+def _response_cache() -> Cache[dict[str, Any]]:
+    # Optionally keep responses in a SQLite file, shared between server processes and kept across restarts
+    file_path = os.environ.get("PUBCHEM_CACHE_PATH")
+    if file_path:
+        return SqliteCache(Path(file_path), _MAX_CACHED_RESPONSES, _RESPONSE_TTL_SECONDS)
+    return TTLCache(_MAX_CACHED_RESPONSES, _RESPONSE_TTL_SECONDS)
+
+
+def _operation(url: str) -> str:
+    # Replace the CID or chemical name so that each operation is one metric series, e.g. name/{id}/cids/JSON
+    namespace, _, operation = url.split("?")[0].split("/", 2)
+    return f"{namespace}/{{id}}/{operation}"
+
+
+def _compact(response_json: dict[str, Any]) -> dict[str, Any]:
+    # Full compound records include every atom, bond and coordinate. Only what get_by_cid reads is kept,
+    # which is a small fraction of the memory and cache space.
+    # Compacting is idempotent, so responses cached before compacting was added are compacted when read
+    if "PC_Compounds" in response_json:
+        return {_COMPOUND_PROPS_KEY: _index_props(response_json["PC_Compounds"][0]["props"])}
+    return response_json
+
+
+def _index_props(props: list[dict[str, Any]]) -> dict[str, str | None]:
+    # A single pass over the props, indexing the first string value for each label, and label and name
+    values: dict[tuple[str, str | None], str] = {}
+    for prop in props:
+        value = prop["value"].get("sval")
+        if value is None:
+            continue
+        urn = prop["urn"]
+        values.setdefault((urn["label"], urn.get("name")), value)
+        values.setdefault((urn["label"], None), value)
+    return {key: values.get(label_and_name) for key, label_and_name in _COMPOUND_PROPS.items()}
 
 
 # Just look for a single chemical, as a trivial example
 def search(query: str, limit: int = 1) -> list[dict[str, Any]]:
-    url = f"name/{query}/cids/JSON?MaxRecords={limit}"
-    result_json = _pubchem_get(url)
+    indexed_results = _indexed_search(query, limit)
+    if indexed_results is not None:
+        return indexed_results
+    result_json = _pubchem_get(_search_url(query, limit))
     if "IdentifierList" not in result_json:
         return []
     result_ids = result_json["IdentifierList"]["CID"]
-    return [{"cid": cid, **get_by_cid(cid)} for cid in result_ids]
+    return get_many_by_cid(result_ids)
+
+
+async def async_search(query: str, limit: int = 1) -> list[dict[str, Any]]:
+    indexed_results = _indexed_search(query, limit)
+    if indexed_results is not None:
+        return indexed_results
+    result_json = await _async_pubchem_get(_search_url(query, limit))
+    if "IdentifierList" not in result_json:
+        return []
+    result_ids = result_json["IdentifierList"]["CID"]
+    return await async_get_many_by_cid(result_ids)
 
 
 # Example: https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/2244/JSON
 def get_by_cid(cid: str) -> dict[str, Any]:
-    result_json = _pubchem_get(f"cid/{cid}/JSON")
-    synonyms_json = _pubchem_get(f"cid/{cid}/synonyms/JSON")
-    compound_json = result_json["PC_Compounds"][0]
-    name = synonyms_json["InformationList"]["Information"][0]["Synonym"][0]
-    smiles = _get_compound_string_prop(compound_json, label="SMILES", name="Absolute")
-    mono_isotopic_weight = _get_compound_string_prop(compound_json, label="Weight", name="MonoIsotopic")
-    molecular_weight = _get_compound_string_prop(compound_json, label="Molecular Weight")
+    indexed_record = _indexed_compound(cid)
+    if indexed_record is not None:
+        return indexed_record
+    result_json, title_json = _pubchem_get_many(_compound_urls(cid))
+    return _compound_from_json(cid, result_json, title_json)
+
+
+async def async_get_by_cid(cid: str) -> dict[str, Any]:
+    indexed_record = _indexed_compound(cid)
+    if indexed_record is not None:
+        return indexed_record
+    result_json, title_json = await _async_pubchem_get_many(_compound_urls(cid))
+    return _compound_from_json(cid, result_json, title_json)
+
+
+# Example: https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/2244,1983/property/Title,SMILES/JSON
+# Fetches just the properties we need for many CIDs in one request, rather than two requests per CID for
+# full records. CIDs which PubChem doesn't have are left out of the results
+def get_many_by_cid(cids: list[str]) -> list[dict[str, Any]]:
+    return _compounds_from_property_tables(cids, _pubchem_get_many(_property_urls(cids)))
+
+
+async def async_get_many_by_cid(cids: list[str]) -> list[dict[str, Any]]:
+    return _compounds_from_property_tables(cids, await _async_pubchem_get_many(_property_urls(cids)))
+
+
+def _indexed_search(query: str, limit: int) -> list[dict[str, Any]] | None:
+    index = pubchem_index()
+    if index is None:
+        return None
+    # Queries are URL-quoted for PubChem, but the index holds names as they were imported
+    indexed_results = index.search(unquote(query), limit)
+    INDEX_REQUESTS.inc(result="miss" if indexed_results is None else "hit")
+    return indexed_results
+
+
+def _indexed_compound(cid: str) -> dict[str, Any] | None:
+    index = pubchem_index()
+    if index is None:
+        return None
+    indexed_record = index.get_by_cid(cid)
+    INDEX_REQUESTS.inc(result="miss" if indexed_record is None else "hit")
+    return indexed_record
+
+
+def _search_url(query: str, limit: int) -> str:
+    return f"name/{query}/cids/JSON?MaxRecords={limit}"
+
+
+def _property_urls(cids: list[str]) -> list[str]:
+    chunks = [cids[i:i + _MAX_CIDS_PER_REQUEST] for i in range(0, len(cids), _MAX_CIDS_PER_REQUEST)]
+    return [f"cid/{','.join(str(cid) for cid in chunk)}/property/{_PROPERTIES}/JSON" for chunk in chunks]
+
+
+def _compounds_from_property_tables(
+    cids: list[str], response_jsons: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    properties_by_cid = {
+        str(properties["CID"]): properties
+        for response_json in response_jsons
+        for properties in response_json.get("PropertyTable", {}).get("Properties", [])
+    }
+    return [
+        _compound_from_properties(cid, properties_by_cid[str(cid)])
+        for cid in cids
+        if str(cid) in properties_by_cid
+    ]
+
+
+def _compound_urls(cid: str) -> list[str]:
+    # Named by its title, as search and get_many_by_cid do, so a compound has the same name however it's found
+    return [f"cid/{cid}/JSON", f"cid/{cid}/property/Title/JSON"]
+
+
+def _compound_from_json(
+    cid: str, result_json: dict[str, Any], title_json: dict[str, Any],
+) -> dict[str, Any]:
     return {
         "cid": cid,
-        "name": name,
-        "smiles": smiles,
-        "molecularWeight": molecular_weight,
-        "monoisotopic": mono_isotopic_weight,
+        "name": title_json["PropertyTable"]["Properties"][0]["Title"],
+        **_compact(result_json)[_COMPOUND_PROPS_KEY],
+    }
+
+
+def _compound_from_properties(cid: str, properties: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "cid": cid,
+        "name": properties.get("Title"),
+        "smiles": properties.get("SMILES"),
+        "molecularWeight": properties.get("MolecularWeight"),
+        "monoisotopic": properties.get("MonoisotopicMass"),
     }
 
 
 def image_url(cid: str) -> str:
     return f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{cid}/PNG"
+
+
+# Returns None if PubChem has no image for the CID. Images aren't kept in the response cache, since
+# they're cached on disk by local_app.lib.structure_images
+def get_image(cid: str) -> bytes | None:
+    response = _get_with_retries(f"cid/{cid}/PNG")
+    return response.content if response.is_success else None
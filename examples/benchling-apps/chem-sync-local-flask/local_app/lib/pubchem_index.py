@@ -0,0 +1,83 @@
+"""A local index of frequently used compounds, consulted before PubChem.
+
+The index maps chemical names to their search results and CIDs to their compound records, in a SQLite file
+built ahead of time by `python -m local_app.import_pubchem_index`. Lookups for indexed compounds take well
+under a millisecond and don't depend on PubChem being available.
+"""
+
+import json
+import os
+import threading
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from local_app.lib.sqlite import connect
+
+
+class PubChemIndex:
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the index in the SQLite file at path."""
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS compounds (cid INTEGER PRIMARY KEY, record TEXT NOT NULL);"
+            # PubChem's name search is case-insensitive, and so is the index's
+            "CREATE TABLE IF NOT EXISTS names ("
+            "name TEXT NOT NULL COLLATE NOCASE, "
+            "rank INTEGER NOT NULL, "
+            "cid INTEGER NOT NULL, "
+            "PRIMARY KEY (name, rank));",
+        )
+
+    def search(self, query: str, limit: int) -> list[dict[str, Any]] | None:
+        """Return the indexed results for a name, or None if there aren't at least `limit` of them."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT compounds.record FROM names JOIN compounds ON compounds.cid = names.cid "
+                "WHERE names.name = ? ORDER BY names.rank LIMIT ?",
+                (query.strip(), limit),
+            ).fetchall()
+        if len(rows) < limit:
+            # A partial result could leave out results PubChem would return, so leave it to PubChem
+            return None
+        return [json.loads(record) for (record,) in rows]
+
+    def get_by_cid(self, cid: str) -> dict[str, Any] | None:
+        """Return the indexed compound record for a CID, or None if it isn't indexed."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT record FROM compounds WHERE cid = ?",
+                (int(cid),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {**json.loads(row[0]), "cid": cid}
+
+    def add(self, name: str, results: list[dict[str, Any]]) -> None:
+        """Index a name's search results, replacing any already indexed for it."""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute("DELETE FROM names WHERE name = ?", (name.strip(),))
+                for rank, record in enumerate(results):
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO compounds (cid, record) VALUES (?, ?)",
+                        (int(record["cid"]), json.dumps(record)),
+                    )
+                    self._connection.execute(
+                        "INSERT INTO names (name, rank, cid) VALUES (?, ?, ?)",
+                        (name.strip(), rank, int(record["cid"])),
+                    )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+
+@cache
+def pubchem_index() -> PubChemIndex | None:
+    file_path = os.environ.get("PUBCHEM_INDEX_PATH")
+    if not file_path:
+        return None
+    return PubChemIndex(file_path)
@@ -0,0 +1,144 @@
+"""Token-bucket rate limiting, so requests to a rate-limited service are paced rather than rejected.
+
+Each limit is a bucket holding up to `requests` tokens, refilled continuously over `per_seconds`. A request
+takes a token from every bucket, waiting until each has one. Limits can be held in memory for one process,
+or in a SQLite file shared by several processes on the same host.
+"""
+
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from local_app.lib.metrics import Histogram
+from local_app.lib.sqlite import connect
+
+# Allows for floating point error, which could otherwise leave a refilled bucket just short of a token
+_TOKEN_TOLERANCE = 1e-9
+
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "benchling_app_rate_limit_wait_seconds",
+    "Time requests waited for the rate limiter, by service",
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    requests: int
+    per_seconds: float
+
+
+class RateLimiter(ABC):
+    def __init__(self, service: str, limits: Sequence[RateLimit]) -> None:
+        """Limit requests to service by every one of limits."""
+        assert limits, "At least one limit is required"
+        self._service = service
+        self._limits = limits
+
+    def acquire(self) -> None:
+        """Block until a request is allowed by every limit."""
+        start = time.perf_counter()
+        while (wait_seconds := self._try_acquire()) > 0:
+            time.sleep(wait_seconds)
+        RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - start, service=self._service)
+
+    async def async_acquire(self) -> None:
+        """Wait until a request is allowed by every limit, without blocking the event loop while waiting."""
+        start = time.perf_counter()
+        while (wait_seconds := await self._async_try_acquire()) > 0:
+            await asyncio.sleep(wait_seconds)
+        RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - start, service=self._service)
+
+    @abstractmethod
+    def _try_acquire(self) -> float:
+        """Take a token from every bucket and return 0, or if any is empty, return how long to wait."""
+
+    async def _async_try_acquire(self) -> float:
+        # Taking a token from memory is quick enough to do on the event loop
+        return self._try_acquire()
+
+    def _take(self, tokens: list[float], elapsed_seconds: float) -> tuple[list[float], float]:
+        # Given each bucket's tokens as of elapsed_seconds ago, return them now and how long to wait
+        tokens = [
+            min(limit.requests, bucket + elapsed_seconds * limit.requests / limit.per_seconds)
+            for bucket, limit in zip(tokens, self._limits, strict=True)
+        ]
+        wait_seconds = max(
+            (1 - bucket) * limit.per_seconds / limit.requests
+            for bucket, limit in zip(tokens, self._limits, strict=True)
+        )
+        if wait_seconds > _TOKEN_TOLERANCE:
+            return tokens, wait_seconds
+        return [max(0, bucket - 1) for bucket in tokens], 0
+
+
+class LocalRateLimiter(RateLimiter):
+    """A rate limiter shared by the threads of one process."""
+
+    def __init__(self, service: str, limits: Sequence[RateLimit]) -> None:
+        """Limit requests to service by every one of limits, within this process."""
+        super().__init__(service, limits)
+        self._lock = threading.Lock()
+        # Buckets start full
+        self._tokens = [float(limit.requests) for limit in limits]
+        self._updated_at = time.monotonic()
+
+    def _try_acquire(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait_seconds = self._take(self._tokens, now - self._updated_at)
+            self._updated_at = now
+            return wait_seconds
+
+
+class SqliteRateLimiter(RateLimiter):
+    """A rate limiter shared by every process using the same SQLite file."""
+
+    def __init__(self, service: str, limits: Sequence[RateLimit], path: str | Path) -> None:
+        """Limit requests to service by every one of limits, shared through the SQLite file at path."""
+        super().__init__(service, limits)
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "service TEXT NOT NULL, "
+            "bucket INTEGER NOT NULL, "
+            "tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL, "
+            "PRIMARY KEY (service, bucket))",
+        )
+
+    async def _async_try_acquire(self) -> float:
+        # Taking the file's write lock can wait on other processes, up to the busy timeout, so it's done on a
+        # thread rather than blocking the event loop
+        return await asyncio.to_thread(self._try_acquire)
+
+    def _try_acquire(self) -> float:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes can't take the same token
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                # Wall clock time, since monotonic clocks aren't comparable between processes
+                now = time.time()
+                rows = self._connection.execute(
+                    "SELECT bucket, tokens, updated_at FROM buckets WHERE service = ?",
+                    (self._service,),
+                ).fetchall()
+                stored_tokens = {bucket: bucket_tokens for bucket, bucket_tokens, _ in rows}
+                tokens = [stored_tokens.get(i, float(limit.requests)) for i, limit in enumerate(self._limits)]
+                # Every bucket is updated together
+                elapsed_seconds = max(0, now - rows[0][2]) if rows else 0
+                tokens, wait_seconds = self._take(tokens, elapsed_seconds)
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO buckets (service, bucket, tokens, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(self._service, i, bucket, now) for i, bucket in enumerate(tokens)],
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return wait_seconds
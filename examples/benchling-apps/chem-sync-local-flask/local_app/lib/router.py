@@ -0,0 +1,49 @@
+"""A registry of handlers, looked up by key in constant time, with each route's latency recorded as a metric.
+
+Handlers register themselves with a decorator, so adding a route doesn't mean editing a shared if/elif chain.
+Dispatch passes its remaining arguments on to the handler:
+
+    button_router: Router[str] = Router("button")
+
+    @button_router.route("search_button")
+    def _search(app: App, canvas_id: str) -> None:
+        ...
+
+    button_router.dispatch([canvas_interaction.button_id], app, canvas_interaction.canvas_id)
+"""
+
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, Generic, TypeVar
+
+from local_app.lib.metrics import ROUTE_SECONDS
+
+K = TypeVar("K", bound=Hashable)
+Handler = TypeVar("Handler", bound=Callable[..., None])
+
+
+class Router(Generic[K]):
+    def __init__(self, name: str) -> None:
+        """Create an empty router, whose routes' latency is recorded under name."""
+        self._name = name
+        self._handlers: dict[K, Callable[..., None]] = {}
+
+    def route(self, key: K) -> Callable[[Handler], Handler]:
+        """Register the decorated function as the handler for key."""
+
+        def _register(handler: Handler) -> Handler:
+            assert key not in self._handlers, f"A handler is already registered for {key}"
+            self._handlers[key] = handler
+            return handler
+
+        return _register
+
+    def dispatch(self, keys: Iterable[K], *args: Any) -> bool:  # noqa: ANN401
+        """Call the handler for the first of keys with a route. Returns False if none of them have one."""
+        for key in keys:
+            handler = self._handlers.get(key)
+            if handler is not None:
+                # Failed calls are timed too, since slow failures are often the ones worth finding
+                with ROUTE_SECONDS.time(router=self._name, route=handler.__name__):
+                    handler(*args)
+                return True
+        return False
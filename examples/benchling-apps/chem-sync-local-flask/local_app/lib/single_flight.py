@@ -0,0 +1,77 @@
+"""Coalesces concurrent calls for the same key, so that only one is in flight and the rest share its result.
+
+For example, when many users search for the same chemical at once, the first search's request to PubChem is
+made and the others wait for its response, rather than each making an identical request.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class _Call(Generic[V]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: V | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[V]):
+    def __init__(self) -> None:
+        """Create a group with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call[V]] = {}
+
+    def do(self, key: str, fn: Callable[[], V]) -> tuple[V, bool]:
+        """Call fn, unless a call for key is already in flight, in which case wait for its result instead.
+
+        Returns the result, and whether it came from another caller's call. If that call raised, so does this.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True  # type: ignore[return-value]
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers make a new call, so the result isn't held beyond the calls it was shared with
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight(Generic[V]):
+    """Like SingleFlight, for coroutines. Calls are coalesced with others on the same event loop."""
+
+    def __init__(self) -> None:
+        """Create a group with no calls in flight."""
+        self._calls: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future[V]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[V]]) -> tuple[V, bool]:
+        """Await fn(), unless a call for key is already in flight, in which case await its result instead.
+
+        Returns the result, and whether it came from another caller's call. If that call raised, so does this.
+        """
+        loop_key = (asyncio.get_running_loop(), key)
+        call = self._calls.get(loop_key)
+        if call is not None:
+            # Shielded, so a caller being cancelled doesn't cancel the call for the others sharing it
+            return await asyncio.shield(call), True
+        call = asyncio.ensure_future(fn())
+        self._calls[loop_key] = call
+        call.add_done_callback(lambda _: self._calls.pop(loop_key, None))
+        return await asyncio.shield(call), False
@@ -0,0 +1,23 @@
+"""Shared setup for the local SQLite files the App uses for queues and caches.
+
+SQLite needs no external services, and in WAL mode readers don't block the writer, so several
+server processes can share a single file on the same host.
+"""
+
+import sqlite3
+from pathlib import Path
+
+_BUSY_TIMEOUT_MILLIS = 5000
+
+
+def connect(path: str | Path) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Connections are shared between threads, so callers must serialize access with their own lock.
+    # isolation_level=None leaves transactions to be managed explicitly
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode, NORMAL only fsyncs when the WAL is checkpointed rather than on every commit.
+    # Commits survive the process crashing or restarting, and fsyncs are batched across many commits
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MILLIS}")
+    return connection
@@ -0,0 +1,204 @@
+"""Chemical structure images, served by the App from an on-disk cache rather than linked from PubChem.
+
+When APP_PUBLIC_URL is set, canvases link to the App's own /images/compounds/<cid>.png route. Images are
+fetched from PubChem once, stored by the SHA-256 of their content, and then served from disk. Searches
+pre-warm the cache, so an image is usually stored before a user's browser asks for it.
+
+The route is public, so it only serves CIDs the App has shown on a canvas. Anything else would let anyone
+spend the App's PubChem rate limit and fill its disk.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from pathlib import Path
+
+from local_app.lib import pub_chem
+from local_app.lib.cache import TTLCache
+from local_app.lib.logger import get_logger
+from local_app.lib.single_flight import SingleFlight
+
+logger = get_logger()
+
+IMAGE_ROUTE_PREFIX = "/images/compounds/"
+_CID_PATTERN = re.compile(r"^\d+$")
+_PREWARM_WORKERS = 2
+_DEFAULT_MAX_ENTRIES = 10_000
+# Pruning lists the cache's directories, so it's done on every Nth write rather than on every write
+_PRUNE_EVERY_N_WRITES = 100
+# CIDs PubChem has no image for aren't asked for again for a while
+_MAX_MISSING_IMAGES = 1000
+_MISSING_IMAGE_TTL_SECONDS = 5 * 60
+
+# The route and pre-warming may ask for the same image at once, so it's only fetched once
+_in_flight: SingleFlight[tuple[str, bytes] | None] = SingleFlight()
+
+
+class StructureImageCache:
+    """Images stored once per distinct content under objects/, with a file per CID naming its image's hash.
+
+    CIDs which may be served are marked by an empty file under allowed/. Once either cids/ or allowed/ holds
+    more than max_entries files, the oldest are removed, along with images no CID names any more.
+    """
+
+    def __init__(self, directory: str | Path, max_entries: int = _DEFAULT_MAX_ENTRIES) -> None:
+        """Store images under directory, keeping at most max_entries CIDs."""
+        assert max_entries > 0, "max_entries must be positive"
+        self._max_entries = max_entries
+        self._objects = Path(directory) / "objects"
+        self._cids = Path(directory) / "cids"
+        self._allowed = Path(directory) / "allowed"
+        self._lock = threading.Lock()
+        self._writes = 0
+        for path in (self._objects, self._cids, self._allowed):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def allow(self, cid: str) -> None:
+        """Allow cid's image to be served, for a CID the App has shown."""
+        # Touched again each time it's shown, so CIDs still in use are the last to be pruned
+        (self._allowed / cid).touch()
+        self._after_write()
+
+    def is_allowed(self, cid: str) -> bool:
+        """Return whether cid's image may be served."""
+        return (self._allowed / cid).exists()
+
+    def get(self, cid: str) -> tuple[str, bytes] | None:
+        """Return the image's content hash and bytes, or None if it isn't cached."""
+        try:
+            digest = (self._cids / cid).read_text()
+            return digest, (self._objects / f"{digest}.png").read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, cid: str, image: bytes) -> str:
+        """Store an image for cid, returning its content hash."""
+        digest = hashlib.sha256(image).hexdigest()
+        object_path = self._objects / f"{digest}.png"
+        if not object_path.exists():
+            _write_atomically(object_path, image)
+        _write_atomically(self._cids / cid, digest.encode())
+        self._after_write()
+        return digest
+
+    def prune(self) -> None:
+        """Remove the oldest CIDs past max_entries, and any images no remaining CID names."""
+        _remove_oldest(self._allowed, self._max_entries)
+        if not _remove_oldest(self._cids, self._max_entries):
+            return
+        referenced = set()
+        for path in self._cids.iterdir():
+            with contextlib.suppress(FileNotFoundError):
+                referenced.add(path.read_text())
+        for path in self._objects.iterdir():
+            if path.stem not in referenced:
+                path.unlink(missing_ok=True)
+
+    def _after_write(self) -> None:
+        with self._lock:
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY_N_WRITES != 0:
+                return
+        self.prune()
+
+
+def image_url(cid: str) -> str:
+    """Return the URL of a compound's structure image, allowing the App to serve it if it's the App's URL."""
+    public_url = os.environ.get("APP_PUBLIC_URL")
+    if not public_url:
+        # Without a public URL for the App, browsers can only load images from PubChem
+        return pub_chem.image_url(cid)
+    _allow(str(cid))
+    return f"{public_url.rstrip('/')}{IMAGE_ROUTE_PREFIX}{cid}.png"
+
+
+def structure_image(cid: str) -> tuple[str, bytes] | None:
+    """Return the content hash and PNG bytes of a compound's structure image, fetching it if not cached.
+
+    Returns None for an invalid CID, one the App hasn't shown, or one which PubChem has no image for.
+    """
+    if not _CID_PATTERN.match(cid) or not _image_cache().is_allowed(cid):
+        return None
+    cached = _image_cache().get(cid)
+    if cached is not None:
+        return cached
+    if _missing_images().get(cid):
+        return None
+    image, _ = _in_flight.do(cid, lambda: _fetch(cid))
+    return image
+
+
+def prewarm(cids: list[str]) -> None:
+    """Fetch structure images into the cache in the background, if the App is serving them."""
+    if not os.environ.get("APP_PUBLIC_URL"):
+        return
+    for cid in cids:
+        _allow(str(cid))
+        _prewarm_executor().submit(_prewarm_one, str(cid))
+
+
+def _allow(cid: str) -> None:
+    if _CID_PATTERN.match(cid):
+        _image_cache().allow(cid)
+
+
+def _fetch(cid: str) -> tuple[str, bytes] | None:
+    image = pub_chem.get_image(cid)
+    if image is None:
+        _missing_images().set(cid, value=True)
+        return None
+    return _image_cache().put(cid, image), image
+
+
+def _prewarm_one(cid: str) -> None:
+    try:
+        structure_image(cid)
+    except Exception:
+        # The image will be fetched again when it's requested
+        logger.exception("Failed to pre-warm structure image for CID %s", cid)
+
+
+def _remove_oldest(directory: Path, max_entries: int) -> bool:
+    """Remove the least recently modified files past max_entries from directory. Returns whether any were."""
+    paths = list(directory.iterdir())
+    if len(paths) <= max_entries:
+        return False
+    mtimes = {}
+    for path in paths:
+        # Files may be removed by another process pruning at the same time
+        with contextlib.suppress(FileNotFoundError):
+            mtimes[path] = path.stat().st_mtime
+    for path in sorted(mtimes, key=mtimes.__getitem__)[:len(mtimes) - max_entries]:
+        path.unlink(missing_ok=True)
+    return True
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    # Readers in this or another process never see a partially written file
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        f.write(data)
+    Path(f.name).replace(path)
+
+
+@cache
+def _image_cache() -> StructureImageCache:
+    directory = os.environ.get("STRUCTURE_IMAGE_CACHE_DIR")
+    if not directory:
+        directory = str(Path(tempfile.gettempdir()) / "benchling-app-structure-images")
+    max_entries = int(os.environ.get("STRUCTURE_IMAGE_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES))
+    return StructureImageCache(directory, max_entries)
+
+
+@cache
+def _missing_images() -> TTLCache[bool]:
+    return TTLCache(_MAX_MISSING_IMAGES, _MISSING_IMAGE_TTL_SECONDS)
+
+
+@cache
+def _prewarm_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=_PREWARM_WORKERS, thread_name_prefix="structure-image-prewarm")
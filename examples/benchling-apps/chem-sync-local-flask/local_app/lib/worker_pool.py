@@ -0,0 +1,136 @@
+"""A bounded pool of worker threads for processing webhooks off the request path.
+
+Rather than spawning a thread per webhook, work is placed on a fixed-size queue drained by a fixed
+number of threads. When the queue is full, callers are told so they can shed load (e.g. by returning
+a 503 to Benchling, which will retry the webhook later).
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from queue import Full, Queue
+from typing import Any
+
+from local_app.lib.logger import get_logger
+from local_app.lib.metrics import QUEUE_WAIT_SECONDS, CallbackMetric
+
+logger = get_logger()
+
+_DEFAULT_MAX_WORKERS = 8
+_DEFAULT_MAX_QUEUE_DEPTH = 100
+
+
+@dataclass(frozen=True)
+class WorkerPoolStats:
+    max_workers: int
+    max_queue_depth: int
+    queue_depth: int
+    active_workers: int
+    rejected: int
+
+
+class WorkerPool:
+    def __init__(self, max_workers: int, max_queue_depth: int) -> None:
+        """Create a pool of max_workers threads, started on first use, sharing a queue of max_queue_depth."""
+        assert max_workers > 0, "max_workers must be positive"
+        assert max_queue_depth > 0, "max_queue_depth must be positive"
+        self._max_workers = max_workers
+        self._max_queue_depth = max_queue_depth
+        # Each item is the work to call, its arguments, and when it was queued
+        self._queue: Queue[tuple[Callable[..., Any], tuple[Any, ...], float]] = Queue(maxsize=max_queue_depth)
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._active_workers = 0
+        self._rejected = 0
+
+    def try_submit(self, fn: Callable[..., Any], *args: Any) -> bool:  # noqa: ANN401
+        """Queue fn(*args) without blocking. Returns False if the queue is saturated."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((fn, args, time.perf_counter()))
+        except Full:
+            with self._lock:
+                self._rejected += 1
+            return False
+        return True
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:  # noqa: ANN401
+        """Queue fn(*args), blocking while the queue is saturated."""
+        self._ensure_started()
+        self._queue.put((fn, args, time.perf_counter()))
+
+    def idle_workers(self) -> int:
+        """Return how many workers could start new work now, less any work already waiting for one."""
+        with self._lock:
+            return max(0, self._max_workers - self._active_workers - self._queue.qsize())
+
+    def stats(self) -> WorkerPoolStats:
+        """Return a point-in-time snapshot of the pool's utilization."""
+        with self._lock:
+            return WorkerPoolStats(
+                max_workers=self._max_workers,
+                max_queue_depth=self._max_queue_depth,
+                queue_depth=self._queue.qsize(),
+                active_workers=self._active_workers,
+                rejected=self._rejected,
+            )
+
+    def _ensure_started(self) -> None:
+        # Threads are started lazily so importing this module (or forking a server worker) doesn't spawn them
+        if len(self._threads) == self._max_workers:
+            return
+        with self._lock:
+            while len(self._threads) < self._max_workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"webhook-worker-{len(self._threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            fn, args, queued_at = self._queue.get()
+            QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+            with self._lock:
+                self._active_workers += 1
+            try:
+                fn(*args)
+            except Exception:
+                # Without this, a single failed webhook would silently kill the worker thread
+                logger.exception("Unhandled error processing work in worker pool")
+            finally:
+                with self._lock:
+                    self._active_workers -= 1
+                self._queue.task_done()
+
+
+@cache
+def webhook_worker_pool() -> WorkerPool:
+    max_workers = int(os.environ.get("WEBHOOK_MAX_WORKERS", _DEFAULT_MAX_WORKERS))
+    max_queue_depth = int(os.environ.get("WEBHOOK_MAX_QUEUE_DEPTH", _DEFAULT_MAX_QUEUE_DEPTH))
+    return WorkerPool(max_workers, max_queue_depth)
+
+
+CallbackMetric(
+    "benchling_app_worker_pool_queue_depth",
+    "Webhooks waiting for a worker",
+    "gauge",
+    lambda: webhook_worker_pool().stats().queue_depth,
+)
+CallbackMetric(
+    "benchling_app_worker_pool_active_workers",
+    "Workers currently handling a webhook",
+    "gauge",
+    lambda: webhook_worker_pool().stats().active_workers,
+)
+CallbackMetric(
+    "benchling_app_worker_pool_rejected_total",
+    "Webhooks rejected because the worker pool's queue was full",
+    "counter",
+    lambda: webhook_worker_pool().stats().rejected,
+)
@@ -0,0 +1,97 @@
+"""Receiving webhooks from Benchling, independent of the web framework serving them.
+
+Both the Flask app in `local_app.app` and the ASGI app in `local_app.asgi` hand the raw request to
+a WebhookReceiver, which verifies the webhook and dispatches it for processing.
+"""
+
+import os
+
+from benchling_sdk.apps.helpers.webhook_helpers import HeadersMapping
+
+from local_app.benchling_app.handler import handle_webhook_body
+from local_app.benchling_app.setup import app_definition_id
+from local_app.benchling_app.verification import verify_webhook
+from local_app.lib.cache import Cache, SqliteCache, TTLCache
+from local_app.lib.job_queue import start_consumer, webhook_job_queue
+from local_app.lib.logger import get_logger
+from local_app.lib.metrics import VERIFY_SECONDS
+from local_app.lib.worker_pool import webhook_worker_pool
+
+logger = get_logger()
+
+# Benchling retries failed deliveries over several hours, so remember message IDs for a day
+_SEEN_WEBHOOK_TTL_SECONDS = 24 * 60 * 60
+_SEEN_WEBHOOK_MAX_ENTRIES = 10_000
+
+
+class WebhookReceiver:
+    def __init__(self) -> None:
+        """Create a receiver, starting the job consumer if webhooks are persisted."""
+        self._seen_webhooks = _seen_webhook_cache()
+        _start_job_consumer()
+
+    def receive(self, body: bytes, headers: HeadersMapping) -> tuple[str, int]:
+        """Verify and dispatch a webhook, returning the response message and status code."""
+        # For security, don't do anything else without first verifying the webhook
+        app_def_id = app_definition_id()
+
+        # Important! To verify webhooks, we need to pass the body as an unmodified string
+        # The raw body is bytes, so decode to string. Passing bytes or JSON won't work
+        data = body.decode("utf-8")
+        with VERIFY_SECONDS.time():
+            verify_webhook(app_def_id, data, headers)
+
+        # The body is only parsed once it reaches a worker, keeping JSON parsing off the ACK path
+        logger.debug("Received webhook message: %s", data)
+        # Retried deliveries of a webhook share the same webhook-id. Drop any we've already accepted,
+        # otherwise a retry could repeat side effects like creating a molecule
+        message_id = headers["webhook-id"] if "webhook-id" in headers else None
+        if message_id and not self._seen_webhooks.add(message_id, value=True):
+            logger.debug("Ignoring duplicate webhook %s", message_id)
+            return "OK", 200
+        # Dispatch work and ACK webhook as quickly as possible
+        try:
+            enqueued = _enqueue_work(data)
+        except Exception:
+            # Benchling retries after the error response, so the retry mustn't be mistaken for a duplicate
+            self._forget(message_id)
+            raise
+        if not enqueued:
+            # All workers are busy and the queue is full. A non-2xx status tells Benchling to retry
+            # the webhook later, rather than us accepting work we can't keep up with
+            logger.warning("Webhook queue is saturated, rejecting webhook")
+            self._forget(message_id)
+            return "Service Unavailable", 503
+        # ACK webhook by returning 2xx status code so Benchling knows the app received the signal
+        return "OK", 200
+
+    def _forget(self, message_id: str | None) -> None:
+        # Called when a webhook wasn't accepted, so Benchling's retry of it is handled rather than dropped
+        if message_id:
+            self._seen_webhooks.delete(message_id)
+
+
+def _seen_webhook_cache() -> Cache[bool]:
+    # In memory by default. Set WEBHOOK_DEDUP_PATH to share seen webhooks across processes and restarts
+    path = os.environ.get("WEBHOOK_DEDUP_PATH")
+    if path:
+        return SqliteCache(path, _SEEN_WEBHOOK_MAX_ENTRIES, _SEEN_WEBHOOK_TTL_SECONDS)
+    return TTLCache(_SEEN_WEBHOOK_MAX_ENTRIES, _SEEN_WEBHOOK_TTL_SECONDS)
+
+
+def _start_job_consumer() -> None:
+    job_queue = webhook_job_queue()
+    if job_queue is not None:
+        start_consumer(job_queue, webhook_worker_pool(), handle_webhook_body)
+
+
+def _enqueue_work(data: str) -> bool:
+    job_queue = webhook_job_queue()
+    if job_queue is not None:
+        # Persist the verified body before ACKing, so the webhook survives the process restarting.
+        # A consumer thread drains the queue into the worker pool
+        job_queue.put(data)
+        return True
+    # Work is processed by a bounded pool of threads rather than a thread per webhook.
+    # Size it with WEBHOOK_MAX_WORKERS and WEBHOOK_MAX_QUEUE_DEPTH
+    return webhook_worker_pool().try_submit(handle_webhook_body, data)
@@ -0,0 +1,132 @@
+import threading
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+from benchling_sdk.errors import BenchlingError
+from httpx import Client, Request, Response
+
+from local_app.benchling_app.auth import ProactiveClientCredentialsOAuth2
+from local_app.lib.cache import SqliteCache
+
+_BASE_URL = "https://example.benchling.com/api/v2"
+
+
+class TestProactiveClientCredentialsOAuth2:
+
+    def test_get_authorization_header_reuses_token(self) -> None:
+        httpx_client = _mock_token_client("token_1")
+        auth = ProactiveClientCredentialsOAuth2("client_id", "secret", httpx_client=httpx_client)
+        assert auth.get_authorization_header(_BASE_URL) == "Bearer token_1"
+        assert auth.get_authorization_header(_BASE_URL) == "Bearer token_1"
+        httpx_client.post.assert_called_once_with(
+            "https://example.benchling.com/api/v2/token",
+            data={"grant_type": "client_credentials"},
+            headers=ANY,
+        )
+        headers = httpx_client.post.call_args.kwargs["headers"]
+        # base64 of client_id:secret
+        assert headers["Authorization"] == "Basic Y2xpZW50X2lkOnNlY3JldA=="
+        assert headers["User-Agent"].startswith("BenchlingSDK/")
+        auth.stop()
+
+    def test_failed_token_request_raises_benchling_error(self) -> None:
+        httpx_client = MagicMock(Client)
+        httpx_client.post.return_value = Response(
+            401,
+            json={"error": "invalid_client"},
+            request=Request("POST", "https://example.benchling.com/api/v2/token"),
+        )
+        auth = ProactiveClientCredentialsOAuth2("client_id", "secret", httpx_client=httpx_client)
+        with pytest.raises(BenchlingError) as error:
+            auth.get_authorization_header(_BASE_URL)
+        assert error.value.status_code == 401
+        assert error.value.json == {"error": "invalid_client"}
+        auth.stop()
+
+    def test_tenants_fetch_tokens_concurrently(self) -> None:
+        other_base_url = "https://other.benchling.com/api/v2"
+        release = threading.Event()
+        tokens = {
+            "https://example.benchling.com/api/v2/token": "token_1",
+            "https://other.benchling.com/api/v2/token": "token_2",
+        }
+
+        def _post(url: str, **_kwargs: object) -> Response:
+            if tokens[url] == "token_1":
+                # Hold the first tenant's token request open until the other tenant has its token
+                release.wait(5)
+            return _token_response(tokens[url])
+
+        httpx_client = MagicMock(Client)
+        httpx_client.post.side_effect = _post
+        auth = ProactiveClientCredentialsOAuth2("client_id", "secret", httpx_client=httpx_client)
+        blocked = threading.Thread(target=auth.get_authorization_header, args=(_BASE_URL,))
+        blocked.start()
+        assert auth.get_authorization_header(other_base_url) == "Bearer token_2"
+        release.set()
+        blocked.join(5)
+        assert auth.get_authorization_header(_BASE_URL) == "Bearer token_1"
+        auth.stop()
+
+    def test_tokens_are_per_tenant(self) -> None:
+        httpx_client = _mock_token_client("token_1", "token_2")
+        auth = ProactiveClientCredentialsOAuth2("client_id", "secret", httpx_client=httpx_client)
+        assert auth.get_authorization_header(_BASE_URL) == "Bearer token_1"
+        assert auth.get_authorization_header("https://other.benchling.com/api/v2") == "Bearer token_2"
+        auth.stop()
+
+    @patch("local_app.benchling_app.auth.time")
+    def test_refresh_due_tokens(self, mock_time) -> None:
+        mock_time.time.return_value = 1000.0
+        httpx_client = _mock_token_client("token_1", "token_2")
+        auth = ProactiveClientCredentialsOAuth2("client_id", "secret", httpx_client=httpx_client)
+        auth.get_authorization_header(_BASE_URL)
+        # Not due until 75% of the token's 900 second lifetime has passed
+        mock_time.time.return_value = 1600.0
+        auth.refresh_due_tokens()
+        assert httpx_client.post.call_count == 1
+        mock_time.time.return_value = 1700.0
+        auth.refresh_due_tokens()
+        assert httpx_client.post.call_count == 2
+        assert auth.get_authorization_header(_BASE_URL) == "Bearer token_2"
+        auth.stop()
+
+    @patch("local_app.benchling_app.auth.time")
+    def test_refresh_due_tokens_skips_unused(self, mock_time) -> None:
+        mock_time.time.return_value = 1000.0
+        httpx_client = _mock_token_client("token_1", "token_2")
+        auth = ProactiveClientCredentialsOAuth2("client_id", "secret", httpx_client=httpx_client)
+        auth.get_authorization_header(_BASE_URL)
+        mock_time.time.return_value = 1700.0
+        auth.refresh_due_tokens()
+        # Unused since the last refresh, so it's left to expire
+        mock_time.time.return_value = 2400.0
+        auth.refresh_due_tokens()
+        assert httpx_client.post.call_count == 2
+        auth.stop()
+
+    def test_shares_tokens_between_instances(self, tmp_path) -> None:
+        shared_tokens = SqliteCache(tmp_path / "tokens.db", max_entries=10, ttl_seconds=3600)
+        first_client = _mock_token_client("token_1")
+        second_client = _mock_token_client("token_2")
+        first = ProactiveClientCredentialsOAuth2("client_id", "secret", shared_tokens, first_client)
+        second = ProactiveClientCredentialsOAuth2("client_id", "secret", shared_tokens, second_client)
+        assert first.get_authorization_header(_BASE_URL) == "Bearer token_1"
+        assert second.get_authorization_header(_BASE_URL) == "Bearer token_1"
+        second_client.post.assert_not_called()
+        first.stop()
+        second.stop()
+
+
+def _mock_token_client(*access_tokens: str) -> MagicMock:
+    httpx_client = MagicMock(Client)
+    httpx_client.post.side_effect = [_token_response(token) for token in access_tokens]
+    return httpx_client
+
+
+def _token_response(access_token: str) -> Response:
+    return Response(
+        200,
+        json={"access_token": access_token, "token_type": "Bearer", "expires_in": 900},
+        request=Request("POST", "https://example.benchling.com/api/v2/token"),
+    )
@@ -14,6 +14,8 @@ from benchling_sdk.models import AppCanvas, AppCanvasUpdate, Molecule, TextInput
 from benchling_sdk.models.webhooks.v0 import CanvasInteractionWebhookV2
 
 from local_app.benchling_app.canvas_interaction import UnsupportedButtonError, route_interaction_webhook
+from local_app.benchling_app.canvas_state import _canvas_state_cache
+from local_app.benchling_app.views.canvas_data import preview_data
 from local_app.benchling_app.views.canvas_initialize import input_blocks
 from local_app.benchling_app.views.constants import (
     CANCEL_BUTTON_ID,
@@ -26,9 +28,21 @@ from local_app.benchling_app.views.constants import (
 
 class TestCanvasInteraction:
 
+    def setup_method(self) -> None:
+        _canvas_state_cache.cache_clear()
+
+    def teardown_method(self) -> None:
+        _canvas_state_cache.cache_clear()
+
+    @patch("local_app.benchling_app.canvas_interaction.prewarm")
     @patch("local_app.benchling_app.canvas_interaction.render_preview_canvas")
     @patch("local_app.benchling_app.canvas_interaction.search")
-    def test_route_interaction_webhook_search(self, mock_search, mock_render_preview_canvas) -> None:
+    def test_route_interaction_webhook_search(
+        self,
+        mock_search,
+        mock_render_preview_canvas,
+        mock_prewarm,
+    ) -> None:
         app = MagicMock(App)
         interaction_webhook = _mock_interaction_webhook("canvas_id", SEARCH_BUTTON_ID)
         mock_search_input = MagicMock(TextInputUiBlock)
@@ -40,7 +54,7 @@ class TestCanvasInteraction:
         mock_session_context_manager.__enter__.return_value = mock_session_context
         app.create_session_context.return_value = mock_session_context_manager
         app.benchling.apps.get_canvas_by_id.return_value = mock_canvas
-        mock_search.return_value = {"cid": "example"}
+        mock_search.return_value = [{"cid": "example"}]
         expected_canvas_builder = CanvasBuilder.from_canvas(mock_canvas)
 
         # Test
@@ -48,8 +62,9 @@ class TestCanvasInteraction:
 
         # Verify
         app.benchling.apps.get_canvas_by_id.assert_called_once_with("canvas_id")
+        mock_prewarm.assert_called_once_with(["example"])
         mock_render_preview_canvas.assert_called_once_with(
-            {"cid": "example"},
+            [{"cid": "example"}],
             "canvas_id",
             expected_canvas_builder,
             mock_session_context,
@@ -116,19 +131,16 @@ class TestCanvasInteraction:
     def test_route_interaction_webhook_cancel(self) -> None:
         app = MagicMock(App)
         interaction_webhook = _mock_interaction_webhook("canvas_id", CANCEL_BUTTON_ID)
-        mock_canvas = _mock_canvas()
-        app.benchling.apps.get_canvas_by_id.return_value = mock_canvas
-        expected_canvas_builder = CanvasBuilder.from_canvas(mock_canvas)\
-            .with_enabled()\
-            .with_session_id(None)\
-            .with_blocks(input_blocks())
-        expected_update = expected_canvas_builder.to_update()
+        expected_blocks = CanvasBuilder(app_id="app_id", feature_id="feature_id", blocks=input_blocks())\
+            .to_update()\
+            .blocks
+        expected_update = AppCanvasUpdate(blocks=expected_blocks, enabled=True, session_id=None)
 
         # Test
         route_interaction_webhook(app, interaction_webhook)
 
         # Verify
-        app.benchling.apps.get_canvas_by_id.assert_called_once_with("canvas_id")
+        app.benchling.apps.get_canvas_by_id.assert_not_called()
         app.benchling.apps.update_canvas.assert_called_once_with("canvas_id", expected_update)
 
     @patch("local_app.benchling_app.canvas_interaction.render_completed_canvas")
@@ -152,7 +164,6 @@ class TestCanvasInteraction:
         mock_get_by_cid.return_value = molecule_cid_data
         mock_molecule = MagicMock(Molecule)
         mock_create_molecule.return_value = mock_molecule
-        expected_canvas_builder = CanvasBuilder.from_canvas(mock_canvas)
 
         # Test
         route_interaction_webhook(app, interaction_webhook)
@@ -162,13 +173,65 @@ class TestCanvasInteraction:
         mock_render_completed_canvas.assert_called_once_with(
             mock_molecule,
             "canvas_id",
-            expected_canvas_builder,
             mock_session_context,
         )
         mock_get_by_cid.assert_called_once_with("Test-CID")
         mock_create_molecule.assert_called_once_with(app, molecule_cid_data)
         mock_session_context.attach_canvas.assert_called_once_with("canvas_id")
 
+    @patch("local_app.benchling_app.canvas_interaction.render_completed_canvas")
+    @patch("local_app.benchling_app.canvas_interaction.create_molecule")
+    @patch("local_app.benchling_app.canvas_interaction.get_by_cid")
+    def test_route_interaction_webhook_create_molecule_from_canvas_data(
+        self,
+        mock_get_by_cid,
+        mock_create_molecule,
+        mock_render_completed_canvas,
+    ) -> None:
+        app = MagicMock(App)
+        chemical = {
+            "cid": 2244,
+            "name": "Aspirin",
+            "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O",
+            "molecularWeight": "180.16",
+            "monoisotopic": "180.04225873",
+        }
+        app.benchling.apps.get_canvas_by_id.return_value = _mock_canvas(data=preview_data(chemical))
+
+        # Test
+        route_interaction_webhook(app, _mock_interaction_webhook("canvas_id", CREATE_BUTTON_ID))
+
+        # Verify
+        mock_get_by_cid.assert_not_called()
+        mock_create_molecule.assert_called_once_with(app, chemical)
+        mock_render_completed_canvas.assert_called_once()
+
+    @patch("local_app.benchling_app.canvas_interaction.render_completed_canvas")
+    @patch("local_app.benchling_app.canvas_interaction.create_molecule")
+    @patch("local_app.benchling_app.canvas_interaction.get_by_cid")
+    def test_route_interaction_webhook_create_molecule_stale_cached_canvas(
+        self,
+        mock_get_by_cid,
+        mock_create_molecule,
+        mock_render_completed_canvas,
+    ) -> None:
+        app = MagicMock(App)
+        app.id = "app_id"
+        # This process last wrote the canvas with one chemical's preview, so it's cached
+        app.benchling.apps.update_canvas.return_value = _mock_canvas(data={CID_KEY: "Stale-CID"})
+        route_interaction_webhook(app, _mock_interaction_webhook("canvas_id", CANCEL_BUTTON_ID))
+        # Another process has since shown a different chemical's preview
+        app.benchling.apps.get_canvas_by_id.return_value = _mock_canvas(data={CID_KEY: "Test-CID"})
+
+        # Test
+        route_interaction_webhook(app, _mock_interaction_webhook("canvas_id", CREATE_BUTTON_ID))
+
+        # Verify
+        app.benchling.apps.get_canvas_by_id.assert_called_once_with("canvas_id")
+        mock_get_by_cid.assert_called_once_with("Test-CID")
+        mock_create_molecule.assert_called_once_with(app, mock_get_by_cid.return_value)
+        mock_render_completed_canvas.assert_called_once()
+
 
     def test_route_interaction_webhook_unspported_button(self) -> None:
         app = MagicMock(App)
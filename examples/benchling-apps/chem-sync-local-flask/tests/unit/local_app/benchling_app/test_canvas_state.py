@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock
+
+from benchling_sdk.apps.framework import App
+from benchling_sdk.apps.status.framework import SessionContextManager
+from benchling_sdk.models import AppCanvas, AppCanvasUpdate, AppSession
+
+from local_app.benchling_app.canvas_state import (
+    CanvasStateCache,
+    _canvas_state_cache,
+    attach_canvas,
+    get_canvas,
+    update_canvas,
+)
+
+
+class TestCanvasState:
+
+    def setup_method(self) -> None:
+        _canvas_state_cache.cache_clear()
+
+    def teardown_method(self) -> None:
+        _canvas_state_cache.cache_clear()
+
+    def test_get_canvas_after_update(self) -> None:
+        app = _mock_app()
+        canvas = _canvas("session_id")
+        app.benchling.apps.update_canvas.return_value = canvas
+        update_canvas(app, "cnvs_1", AppCanvasUpdate(enabled=True))
+        assert get_canvas(app, "cnvs_1") is canvas
+        app.benchling.apps.get_canvas_by_id.assert_not_called()
+
+    def test_get_canvas_fetched_once(self) -> None:
+        app = _mock_app()
+        canvas = _canvas("session_id")
+        app.benchling.apps.get_canvas_by_id.return_value = canvas
+        assert get_canvas(app, "cnvs_1") is canvas
+        assert get_canvas(app, "cnvs_1") is canvas
+        app.benchling.apps.get_canvas_by_id.assert_called_once_with("cnvs_1")
+
+    def test_get_canvas_other_app(self) -> None:
+        app = _mock_app()
+        app.benchling.apps.update_canvas.return_value = _canvas("session_id")
+        update_canvas(app, "cnvs_1", AppCanvasUpdate(enabled=True))
+        other_app = _mock_app("app_other")
+        get_canvas(other_app, "cnvs_1")
+        other_app.benchling.apps.get_canvas_by_id.assert_called_once_with("cnvs_1")
+
+    def test_attach_canvas(self) -> None:
+        app = _mock_app()
+        canvas = _canvas("old_session_id")
+        app.benchling.apps.update_canvas.return_value = canvas
+        update_canvas(app, "cnvs_1", AppCanvasUpdate(enabled=True))
+        session = MagicMock(SessionContextManager)
+        session.app = app
+        session.active_session.return_value = MagicMock(AppSession, id="new_session_id")
+
+        attach_canvas(session, "cnvs_1")
+
+        session.attach_canvas.assert_called_once_with("cnvs_1")
+        assert get_canvas(app, "cnvs_1").session_id == "new_session_id"
+        # The canvas returned earlier isn't changed
+        assert canvas.session_id == "old_session_id"
+
+
+class TestCanvasStateCache:
+
+    def test_older_write_not_cached(self) -> None:
+        cache = CanvasStateCache(10, 60)
+        older = cache.begin_write("key")
+        newer = cache.begin_write("key")
+        assert cache.put("key", newer, _canvas("newer"))
+        assert not cache.put("key", older, _canvas("older"))
+        canvas = cache.get("key")
+        assert canvas is not None
+        assert canvas.session_id == "newer"
+
+    def test_write_in_flight(self) -> None:
+        cache = CanvasStateCache(10, 60)
+        cache.put("key", cache.begin_write("key"), _canvas("written"))
+        cache.begin_write("key")
+        assert cache.get("key") is None
+
+    def test_fetch_during_write_not_cached(self) -> None:
+        cache = CanvasStateCache(10, 60)
+        version = cache.version("key")
+        cache.begin_write("key")
+        assert not cache.put("key", version, _canvas("fetched"))
+
+
+def _mock_app(app_id: str = "app_id") -> MagicMock:
+    app = MagicMock(App)
+    app.id = app_id
+    return app
+
+
+def _canvas(session_id: str) -> AppCanvas:
+    return AppCanvas.from_dict({"id": "cnvs_1", "sessionId": session_id, "enabled": True, "blocks": []})
@@ -5,7 +5,7 @@ import pytest
 from benchling_sdk.apps.framework import App
 from benchling_sdk.apps.status.errors import AppUserFacingError
 
-from local_app.benchling_app.handler import UnsupportedWebhookError, handle_webhook
+from local_app.benchling_app.handler import UnsupportedWebhookError, handle_webhook, handle_webhook_body
 from tests.helpers import load_webhook_json
 
 _TEST_FILES_PATH = Path(__file__).parent.parent.parent.parent / "files/webhooks"
@@ -34,6 +34,27 @@ class TestWebhookHandler:
         handle_webhook(webhook.to_dict())
         mock_route_interaction_webhook.assert_called_once_with(mock_app, webhook.message)
 
+    @patch("local_app.benchling_app.handler.render_search_canvas")
+    @patch("local_app.benchling_app.handler.init_app_from_webhook")
+    def test_handle_webhook_body(self, mock_init_app_from_webhook, mock_render_search_canvas) -> None:
+        webhook_path = _TEST_FILES_PATH / "canvas_initialize_webhook.json"
+        webhook = load_webhook_json(webhook_path)
+        mock_app = MagicMock(App)
+        mock_init_app_from_webhook.return_value = mock_app
+        handle_webhook_body(webhook_path.read_text())
+        mock_render_search_canvas.assert_called_once_with(mock_app, webhook.message)
+
+    @patch("local_app.benchling_app.handler.invalidate_molecule_config")
+    @patch("local_app.benchling_app.handler.init_app_from_webhook")
+    def test_handle_webhook_configuration_updated(self,
+                                                  mock_init_app_from_webhook,
+                                                  mock_invalidate_molecule_config) -> None:
+        webhook = load_webhook_json(_TEST_FILES_PATH / "configuration_update_webhook.json")
+        mock_app = MagicMock(App)
+        mock_init_app_from_webhook.return_value = mock_app
+        handle_webhook(webhook.to_dict())
+        mock_invalidate_molecule_config.assert_called_once_with(mock_app)
+
     @patch("local_app.benchling_app.handler.init_app_from_webhook")
     def test_handle_webhook_unsupported(self, mock_init_app_from_webhook) -> None:
         webhook = load_webhook_json(_TEST_FILES_PATH / "app_activation_webhook.json")
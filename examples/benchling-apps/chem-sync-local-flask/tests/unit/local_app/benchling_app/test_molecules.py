@@ -1,11 +1,17 @@
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import pytest
 from benchling_sdk.apps.config.mock_config import MockConfigItemStore
 from benchling_sdk.apps.framework import App
 from benchling_sdk.apps.helpers.manifest_helpers import manifest_from_file
+from benchling_sdk.errors import BenchlingError, WaitForTaskExpiredError
 from benchling_sdk.helpers.serialization_helpers import fields
 from benchling_sdk.models import (
+    AsyncTask,
+    AsyncTaskLink,
+    AsyncTaskResponse,
+    AsyncTaskStatus,
     GenericApiIdentifiedAppConfigItem,
     GenericApiIdentifiedAppConfigItemType,
     Molecule,
@@ -14,14 +20,31 @@ from benchling_sdk.models import (
     MoleculeStructureStructureFormat,
 )
 
-from local_app.benchling_app.molecules import create_molecule
+from local_app.benchling_app.molecules import (
+    BulkCreateMoleculesError,
+    _molecule_config_cache,
+    bulk_create_molecules,
+    create_molecule,
+    invalidate_molecule_config,
+    molecule_config,
+)
+from local_app.benchling_app.setup import _APP_TTL_SECONDS
+
+_MANIFEST_PATH = Path(__file__).parent.parent.parent.parent.parent / "manifest.yaml"
 
 
 class TestMolecules:
+
+    def setup_method(self) -> None:
+        _molecule_config_cache.cache_clear()
+
+    def teardown_method(self) -> None:
+        _molecule_config_cache.cache_clear()
+
     def test_create_molecule(self) -> None:
         # Setup mocks
         app = MagicMock(App)
-        manifest = manifest_from_file(Path(__file__).parent.parent.parent.parent.parent / "manifest.yaml")
+        manifest = manifest_from_file(_MANIFEST_PATH)
         # This will mock all config items with random valid values
         # We can override particular configs if desired. This shows an example of overriding a folder config
         mock_config_store = MockConfigItemStore.from_manifest(manifest).with_replacement(
@@ -75,3 +98,131 @@ class TestMolecules:
         result = create_molecule(app, chemical_result)
         assert mock_molecule == result
         app.benchling.molecules.create.assert_called_once_with(expected_argument)
+
+    def test_bulk_create_molecules(self) -> None:
+        app = MagicMock(App)
+        app.config_store = _mock_config_store()
+        chemical_results = [_chemical_result(cid) for cid in ("1", "2", "3")]
+        app.benchling.molecules.bulk_create.side_effect = [AsyncTaskLink(task_id="task_1"),
+                                                           AsyncTaskLink(task_id="task_2")]
+        app.benchling.tasks.wait_for_task.side_effect = [
+            _succeeded_task([{"id": "mol_1"}, {"id": "mol_2"}]),
+            _succeeded_task([{"id": "mol_3"}]),
+        ]
+
+        result = bulk_create_molecules(app, chemical_results, batch_size=2)
+
+        assert [molecule.id for molecule in result] == ["mol_1", "mol_2", "mol_3"]
+        batches = [list(c.args[0]) for c in app.benchling.molecules.bulk_create.call_args_list]
+        assert [[m.aliases for m in batch] for batch in batches] == [[["cid:1"], ["cid:2"]], [["cid:3"]]]
+        assert [c.args[0] for c in app.benchling.tasks.wait_for_task.call_args_list] == ["task_1", "task_2"]
+        app.benchling.molecules.create.assert_not_called()
+
+    def test_bulk_create_molecules_batch_failed(self) -> None:
+        app = MagicMock(App)
+        app.config_store = _mock_config_store()
+        chemical_results = [_chemical_result(cid) for cid in ("1", "2")]
+        app.benchling.molecules.bulk_create.side_effect = [AsyncTaskLink(task_id="task_1"),
+                                                           AsyncTaskLink(task_id="task_2")]
+        app.benchling.tasks.wait_for_task.side_effect = [
+            AsyncTask(status=AsyncTaskStatus.FAILED, message="Invalid SMILES"),
+            _succeeded_task([{"id": "mol_2"}]),
+        ]
+
+        with pytest.raises(BulkCreateMoleculesError, match="task_1") as error:
+            bulk_create_molecules(app, chemical_results, batch_size=1)
+
+        # The other batch still finished
+        assert [molecule.id for molecule in error.value.molecules] == ["mol_2"]
+
+    def test_bulk_create_molecules_task_timed_out(self) -> None:
+        app = MagicMock(App)
+        app.config_store = _mock_config_store()
+        chemical_results = [_chemical_result(cid) for cid in ("1", "2")]
+        app.benchling.molecules.bulk_create.side_effect = [AsyncTaskLink(task_id="task_1"),
+                                                           AsyncTaskLink(task_id="task_2")]
+        app.benchling.tasks.wait_for_task.side_effect = [
+            WaitForTaskExpiredError("Timed out", AsyncTask(status=AsyncTaskStatus.RUNNING)),
+            _succeeded_task([{"id": "mol_2"}]),
+        ]
+
+        with pytest.raises(BulkCreateMoleculesError, match="task_1") as error:
+            bulk_create_molecules(app, chemical_results, batch_size=1)
+
+        # The task after the one which timed out was still waited on
+        assert [molecule.id for molecule in error.value.molecules] == ["mol_2"]
+
+    def test_bulk_create_molecules_submit_failed(self) -> None:
+        app = MagicMock(App)
+        app.config_store = _mock_config_store()
+        chemical_results = [_chemical_result(cid) for cid in ("1", "2", "3")]
+        app.benchling.molecules.bulk_create.side_effect = [
+            AsyncTaskLink(task_id="task_1"),
+            BenchlingError(status_code=500, headers={}, json=None, content=None, parsed=None),
+            AsyncTaskLink(task_id="task_3"),
+        ]
+        app.benchling.tasks.wait_for_task.side_effect = [
+            _succeeded_task([{"id": "mol_1"}]),
+            _succeeded_task([{"id": "mol_3"}]),
+        ]
+
+        with pytest.raises(BulkCreateMoleculesError, match="batch 2") as error:
+            bulk_create_molecules(app, chemical_results, batch_size=1)
+
+        # Batches submitted before and after the one which failed are still reported
+        assert [molecule.id for molecule in error.value.molecules] == ["mol_1", "mol_3"]
+
+    def test_molecule_config_cached(self) -> None:
+        app = MagicMock(App)
+        app.id = "app_id"
+        app.config_store = MagicMock(wraps=_mock_config_store())
+        config = molecule_config(app)
+        # A new App for the same installation, as webhooks get once the last one expires
+        other_app = MagicMock(App)
+        other_app.id = "app_id"
+        assert molecule_config(other_app) == config
+        assert app.config_store.config_by_path.call_count == 4
+        other_app.config_store.config_by_path.assert_not_called()
+
+    @patch("local_app.lib.cache.time")
+    def test_molecule_config_expires_with_app(self, mock_time) -> None:
+        mock_time.monotonic.return_value = 1000.0
+        app = MagicMock(App)
+        app.id = "app_id"
+        app.config_store = MagicMock(wraps=_mock_config_store())
+        molecule_config(app)
+        # Other server processes don't see the configuration updated webhook, so the config must expire as
+        # soon as the App does
+        mock_time.monotonic.return_value = 1000.0 + _APP_TTL_SECONDS
+        molecule_config(app)
+        assert app.config_store.config_by_path.call_count == 8
+
+    def test_invalidate_molecule_config(self) -> None:
+        app = MagicMock(App)
+        app.id = "app_id"
+        app.config_store = MagicMock(wraps=_mock_config_store())
+        molecule_config(app)
+        invalidate_molecule_config(app)
+        molecule_config(app)
+        app.config_store.invalidate_cache.assert_called_once()
+        assert app.config_store.config_by_path.call_count == 8
+
+
+def _mock_config_store() -> MockConfigItemStore:
+    return MockConfigItemStore.from_manifest(manifest_from_file(_MANIFEST_PATH))
+
+
+def _chemical_result(cid: str) -> dict:
+    return {
+        "cid": cid,
+        "smiles": "smiles_value",
+        "name": f"chemical_{cid}",
+        "molecularWeight": 0.123,
+        "monoisotopic": 1.456,
+    }
+
+
+def _succeeded_task(molecules: list[dict]) -> AsyncTask:
+    response = AsyncTaskResponse()
+    response.additional_properties = {"molecules": molecules}
+    return AsyncTask(status=AsyncTaskStatus.SUCCEEDED, response=response)
@@ -3,7 +3,13 @@ from pathlib import Path
 import pytest
 from benchling_sdk.apps.framework import App
 
-from local_app.benchling_app.setup import _auth_method, app_definition_id, init_app_from_webhook
+from local_app.benchling_app.setup import (
+    _app_cache,
+    _auth_method,
+    _benchling_cache,
+    app_definition_id,
+    init_app_from_webhook,
+)
 from tests.helpers import load_webhook_json
 
 _TEST_FILES_PATH = Path(__file__).parent.parent.parent.parent / "files/webhooks"
@@ -13,6 +19,8 @@ class TestBenchlingAppSetup:
 
     def setup_method(self) -> None:
         _auth_method.cache_clear()
+        _app_cache.cache_clear()
+        _benchling_cache.cache_clear()
         app_definition_id.cache_clear()
 
     def test_init_app_from_webhook(self, monkeypatch) -> None:
@@ -23,6 +31,22 @@ class TestBenchlingAppSetup:
             result = init_app_from_webhook(webhook)
             assert isinstance(result, App)
 
+    def test_init_app_from_webhook_reuses_app(self, monkeypatch) -> None:
+        webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
+        other_app_webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
+        other_app_webhook.app.id = "app_other"
+        with monkeypatch.context() as context:
+            context.setenv("CLIENT_ID", "clientId")
+            context.setenv("CLIENT_SECRET_FILE", str(_TEST_FILES_PATH.parent / "test_client_secret"))
+            first = init_app_from_webhook(webhook)
+            second = init_app_from_webhook(webhook)
+            other = init_app_from_webhook(other_app_webhook)
+        assert first is second
+        assert other is not first
+        assert other.id == "app_other"
+        # Apps on the same tenant share a Benchling client
+        assert other.benchling is first.benchling
+
     def test_init_app_from_webhook_missing_client_id(self, monkeypatch) -> None:
         webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
         with monkeypatch.context() as context:
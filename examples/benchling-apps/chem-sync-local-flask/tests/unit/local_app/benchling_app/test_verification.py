@@ -0,0 +1,95 @@
+import base64
+import time
+from unittest.mock import patch
+
+import pytest
+from benchling_sdk.apps.helpers.webhook_helpers import WebhookVerificationError
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwcrypto.jwk import JWK, JWKSet  # type: ignore[import-untyped]
+
+from local_app.benchling_app.verification import _jwks_cache, verify_webhook
+
+_BODY = '{"message": "test"}'
+
+
+class TestVerification:
+
+    def setup_method(self) -> None:
+        _jwks_cache.cache_clear()
+
+    @patch("local_app.benchling_app.verification.jwks_by_app_definition")
+    def test_verify_webhook_caches_keys(self, mock_jwks_by_app_definition) -> None:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        mock_jwks_by_app_definition.return_value = _jwks(private_key)
+        verify_webhook("appdef_123", _BODY, _signed_headers(private_key, _BODY))
+        verify_webhook("appdef_123", _BODY, _signed_headers(private_key, _BODY))
+        mock_jwks_by_app_definition.assert_called_once_with("appdef_123")
+
+    @patch("local_app.benchling_app.verification.time")
+    @patch("local_app.benchling_app.verification.jwks_by_app_definition")
+    def test_verify_webhook_refetches_rotated_keys(self, mock_jwks_by_app_definition, mock_time) -> None:
+        old_key = ec.generate_private_key(ec.SECP256R1())
+        new_key = ec.generate_private_key(ec.SECP256R1())
+        mock_jwks_by_app_definition.side_effect = [_jwks(old_key), _jwks(new_key)]
+        mock_time.monotonic.return_value = 1000.0
+        verify_webhook("appdef_123", _BODY, _signed_headers(old_key, _BODY))
+        mock_time.monotonic.return_value = 1100.0
+        verify_webhook("appdef_123", _BODY, _signed_headers(new_key, _BODY))
+        assert mock_jwks_by_app_definition.call_count == 2
+
+    @patch("local_app.benchling_app.verification.time")
+    @patch("local_app.benchling_app.verification.jwks_by_app_definition")
+    def test_verify_webhook_limits_refetching(self, mock_jwks_by_app_definition, mock_time) -> None:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        unknown_key = ec.generate_private_key(ec.SECP256R1())
+        mock_jwks_by_app_definition.return_value = _jwks(private_key)
+        mock_time.monotonic.return_value = 1000.0
+        verify_webhook("appdef_123", _BODY, _signed_headers(private_key, _BODY))
+        mock_time.monotonic.return_value = 1010.0
+        with pytest.raises(WebhookVerificationError, match="No matching signature found"):
+            verify_webhook("appdef_123", _BODY, _signed_headers(unknown_key, _BODY))
+        mock_jwks_by_app_definition.assert_called_once()
+
+    @patch("local_app.benchling_app.verification.time")
+    @patch("local_app.benchling_app.verification.jwks_by_app_definition")
+    def test_verify_webhook_keeps_keys_for_other_failures(
+        self,
+        mock_jwks_by_app_definition,
+        mock_time,
+    ) -> None:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        mock_jwks_by_app_definition.return_value = _jwks(private_key)
+        mock_time.monotonic.return_value = 1000.0
+        verify_webhook("appdef_123", _BODY, _signed_headers(private_key, _BODY))
+        # Long enough after the keys were fetched that a rotation could have refetched them
+        mock_time.monotonic.return_value = 2000.0
+        replayed_headers = {**_signed_headers(private_key, _BODY), "webhook-timestamp": "1234567890"}
+        with pytest.raises(WebhookVerificationError, match="Message timestamp too old"):
+            verify_webhook("appdef_123", _BODY, replayed_headers)
+        missing_headers = {"webhook-id": "msg_123"}
+        with pytest.raises(WebhookVerificationError, match="Missing webhook-timestamp header"):
+            verify_webhook("appdef_123", _BODY, missing_headers)
+        # The cached keys are still used, rather than having been dropped to be fetched again
+        verify_webhook("appdef_123", _BODY, _signed_headers(private_key, _BODY))
+        mock_jwks_by_app_definition.assert_called_once()
+
+
+def _jwks(private_key: ec.EllipticCurvePrivateKey) -> JWKSet:
+    pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    jwks = JWKSet()
+    jwks.add(JWK.from_pem(pem))
+    return jwks
+
+
+def _signed_headers(private_key: ec.EllipticCurvePrivateKey, body: str) -> dict[str, str]:
+    timestamp = str(int(time.time()))
+    signature = private_key.sign(f"msg_123.{timestamp}.{body}".encode(), ec.ECDSA(hashes.SHA256()))
+    return {
+        "webhook-id": "msg_123",
+        "webhook-timestamp": timestamp,
+        "webhook-signature": f"v1der,{base64.b64encode(signature).decode()}",
+    }
@@ -0,0 +1,43 @@
+from benchling_sdk.apps.canvas.framework import CanvasBuilder
+from benchling_sdk.models import (
+    ButtonUiBlock,
+    ButtonUiBlockType,
+    MarkdownUiBlock,
+    MarkdownUiBlockType,
+    MarkdownUiBlockUpdate,
+)
+
+from local_app.benchling_app.views.block_templates import BlockTemplate
+
+
+class TestBlockTemplate:
+
+    def test_updates(self) -> None:
+        template = BlockTemplate(_blocks("placeholder"))
+        expected_update = CanvasBuilder(app_id="app_id", feature_id="feature_id", blocks=_blocks("value"))\
+            .to_update()
+        assert template.updates({"markdown": "value"}) == expected_update.blocks
+
+    def test_updates_unchanged(self) -> None:
+        template = BlockTemplate(_blocks("placeholder"))
+        template.updates({"markdown": "value"})
+        blocks = template.updates()
+        assert isinstance(blocks[0], MarkdownUiBlockUpdate)
+        assert blocks[0].value == "placeholder"
+
+    def test_creates(self) -> None:
+        template = BlockTemplate(_blocks("value"))
+        expected_create = CanvasBuilder(
+            app_id="app_id",
+            feature_id="feature_id",
+            resource_id="resource_id",
+            blocks=_blocks("value"),
+        ).to_create()
+        assert template.creates() == expected_create.blocks
+
+
+def _blocks(markdown: str) -> list:
+    return [
+        MarkdownUiBlock(id="markdown", type=MarkdownUiBlockType.MARKDOWN, value=markdown),
+        ButtonUiBlock(id="button", text="Button", type=ButtonUiBlockType.BUTTON),
+    ]
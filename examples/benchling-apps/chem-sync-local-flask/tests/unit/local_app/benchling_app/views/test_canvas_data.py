@@ -0,0 +1,54 @@
+import hashlib
+
+from local_app.benchling_app.views.canvas_data import chemical_from_data, preview_data
+from local_app.benchling_app.views.constants import CHEMICAL_KEY, CID_KEY
+
+_CHEMICAL = {
+    "cid": 2244,
+    "name": "Aspirin",
+    "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O",
+    "molecularWeight": "180.16",
+    "monoisotopic": "180.04225873",
+}
+
+
+class TestCanvasData:
+
+    def test_chemical_from_data(self) -> None:
+        data = preview_data(_CHEMICAL)
+        assert data[CID_KEY] == 2244
+        assert chemical_from_data(data) == _CHEMICAL
+
+    def test_chemical_from_data_cid_only(self) -> None:
+        # Canvases previewed before chemicals were stored in their data
+        assert chemical_from_data({CID_KEY: "2244"}) is None
+
+    def test_chemical_from_data_hash_mismatch(self) -> None:
+        data = preview_data(_CHEMICAL)
+        data[CHEMICAL_KEY]["record"] = data[CHEMICAL_KEY]["record"].replace("Aspirin", "Not Aspirin")
+        assert chemical_from_data(data) is None
+
+    def test_chemical_from_data_other_version(self) -> None:
+        data = preview_data(_CHEMICAL)
+        data[CHEMICAL_KEY]["version"] = 2
+        assert chemical_from_data(data) is None
+
+    def test_chemical_from_data_other_cid(self) -> None:
+        data = {**preview_data(_CHEMICAL), CID_KEY: "1983"}
+        assert chemical_from_data(data) is None
+
+    def test_chemical_from_data_malformed_record(self) -> None:
+        data = preview_data(_CHEMICAL)
+        # Hashed correctly, so only parsing the record can reject it
+        record = "not json"
+        data[CHEMICAL_KEY].update(record=record, sha256=hashlib.sha256(record.encode()).hexdigest())
+        assert chemical_from_data(data) is None
+
+    def test_chemical_from_data_missing_value(self) -> None:
+        data = preview_data({**_CHEMICAL, "smiles": None})
+        assert chemical_from_data(data) is None
+
+    def test_preview_data_too_large(self) -> None:
+        data = preview_data({**_CHEMICAL, "smiles": "C" * 5000})
+        assert CHEMICAL_KEY not in data
+        assert chemical_from_data(data) is None
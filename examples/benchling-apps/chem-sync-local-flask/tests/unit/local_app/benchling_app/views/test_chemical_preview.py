@@ -1,3 +1,4 @@
+import json
 from unittest.mock import MagicMock, patch
 
 from benchling_sdk.apps.canvas.framework import CanvasBuilder
@@ -5,6 +6,7 @@ from benchling_sdk.apps.canvas.types import UiBlock
 from benchling_sdk.apps.status.framework import SessionContextManager
 from benchling_sdk.models import (
     AppCanvas,
+    AppCanvasUpdate,
     AppSessionMessageCreate,
     AppSessionMessageStyle,
     AppSessionUpdateStatus,
@@ -16,11 +18,11 @@ from benchling_sdk.models import (
     SectionUiBlockType,
 )
 
+from local_app.benchling_app.views.canvas_data import preview_data
 from local_app.benchling_app.views.canvas_initialize import input_blocks
 from local_app.benchling_app.views.chemical_preview import render_preview_canvas
 from local_app.benchling_app.views.constants import (
     CANCEL_BUTTON_ID,
-    CID_KEY,
     CREATE_BUTTON_ID,
     SEARCH_TEXT_ID,
 )
@@ -39,20 +41,19 @@ class TestChemicalPreview:
             },
         ]
         mock_image_url.return_value = "https://images.benchling.com"
-        mock_expected_canvas = MagicMock(AppCanvas)
-        expected_canvas_builder = CanvasBuilder.from_canvas(mock_expected_canvas)\
-            .with_enabled()\
-            .with_data({CID_KEY: "test_cid"})\
-            .with_blocks(_expected_preview_blocks())
+        canvas_builder = CanvasBuilder.from_canvas(MagicMock(AppCanvas))
+        expected_update = AppCanvasUpdate(
+            blocks=_to_update_blocks(_expected_preview_blocks()),
+            data=json.dumps(preview_data(results[0])),
+            enabled=True,
+        )
 
         # Test
-        render_preview_canvas(results, "canvas_id", expected_canvas_builder, mock_session)
+        render_preview_canvas(results, "canvas_id", canvas_builder, mock_session)
 
         # Verify
-        mock_session.app.benchling.apps.update_canvas.assert_called_once_with(
-            "canvas_id",
-            expected_canvas_builder.to_update(),
-        )
+        mock_session.app.benchling.apps.update_canvas.assert_called_once_with("canvas_id", expected_update)
+        mock_image_url.assert_called_once_with("test_cid")
 
     def test_render_preview_canvas_no_results(self) -> None:
         mock_session = MagicMock(SessionContextManager)
@@ -60,19 +61,13 @@ class TestChemicalPreview:
         original_canvas_builder = CanvasBuilder.from_canvas(original_canvas).with_blocks(input_blocks())
         # Set an input value
         original_canvas_builder.blocks.get_by_id(SEARCH_TEXT_ID).to_api_model().value = "User Input"
-        expected_canvas_builder = CanvasBuilder.from_canvas(original_canvas)\
-            .with_enabled()\
-            .with_blocks(input_blocks())
-
+        expected_update = AppCanvasUpdate(blocks=_to_update_blocks(input_blocks()), enabled=True)
 
         # Test
         render_preview_canvas(None, "canvas_id", original_canvas_builder, mock_session)
 
         # Verify
-        mock_session.app.benchling.apps.update_canvas.assert_called_once_with(
-            "canvas_id",
-            expected_canvas_builder.to_update(),
-        )
+        mock_session.app.benchling.apps.update_canvas.assert_called_once_with("canvas_id", expected_update)
         mock_session.close_session.assert_called_once_with(
             AppSessionUpdateStatus.SUCCEEDED,
             messages=[
@@ -125,3 +120,8 @@ def _expected_preview_blocks() -> list[UiBlock]:
             ],
         ),
     ]
+
+
+def _to_update_blocks(blocks: list[UiBlock]) -> list:
+    # The blocks CanvasBuilder would send, which the prebuilt templates must match
+    return CanvasBuilder(app_id="app_id", feature_id="feature_id", blocks=blocks).to_update().blocks
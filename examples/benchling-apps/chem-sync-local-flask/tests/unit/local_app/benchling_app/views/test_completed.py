@@ -4,7 +4,7 @@ from benchling_sdk.apps.canvas.framework import CanvasBuilder
 from benchling_sdk.apps.canvas.types import UiBlock
 from benchling_sdk.apps.status.framework import SessionContextManager
 from benchling_sdk.models import (
-    AppCanvas,
+    AppCanvasUpdate,
     AppSessionMessageCreate,
     AppSessionMessageStyle,
     AppSessionUpdateStatus,
@@ -23,19 +23,19 @@ class TestCompleted:
         mock_session = MagicMock(SessionContextManager)
         molecule = MagicMock(Molecule)
         mock_ref.return_value = "(reference)"
-        mock_canvas = MagicMock(AppCanvas)
-        canvas_builder = CanvasBuilder.from_canvas(mock_canvas)
-        expected_canvas_builder = CanvasBuilder.from_canvas(mock_canvas)\
-            .with_blocks(_expected_completed_blocks())\
-            .with_enabled()
+        expected_canvas_builder = CanvasBuilder(
+            app_id="app_id",
+            feature_id="feature_id",
+            blocks=_expected_completed_blocks(),
+        )
 
         # Test
-        render_completed_canvas(molecule, "canvas_id", canvas_builder, mock_session)
+        render_completed_canvas(molecule, "canvas_id", mock_session)
 
         # Verify
         mock_session.app.benchling.apps.update_canvas.assert_called_once_with(
             "canvas_id",
-            expected_canvas_builder.to_update(),
+            AppCanvasUpdate(blocks=expected_canvas_builder.to_update().blocks, enabled=True),
         )
         mock_session.close_session.assert_called_once_with(
             AppSessionUpdateStatus.SUCCEEDED,
@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+import pytest
+
+from local_app.lib.cache import Cache, SqliteCache, TTLCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path) -> Cache:
+    if request.param == "memory":
+        return TTLCache(max_entries=2, ttl_seconds=60)
+    return SqliteCache(tmp_path / "cache.db", max_entries=2, ttl_seconds=60)
+
+
+class TestCache:
+
+    def test_get_set(self, cache) -> None:
+        assert cache.get("key") is None
+        cache.set("key", {"value": 1})
+        assert cache.get("key") == {"value": 1}
+
+    def test_add(self, cache) -> None:
+        assert cache.add("key", "first")
+        assert not cache.add("key", "second")
+        assert cache.get("key") == "first"
+
+    def test_add_replaces_expired(self, cache) -> None:
+        cache.set("key", "first", ttl_seconds=0)
+        assert cache.get("key") is None
+        assert cache.add("key", "second")
+        assert cache.get("key") == "second"
+
+    def test_delete(self, cache) -> None:
+        cache.set("key", "value")
+        cache.delete("key")
+        assert cache.get("key") is None
+        assert cache.add("key", "value")
+
+
+class TestTTLCache:
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: TTLCache[str] = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", "a")
+        cache.set("b", "b")
+        # Reading "a" makes "b" the least recently used
+        cache.get("a")
+        cache.set("c", "c")
+        assert cache.get("a") == "a"
+        assert cache.get("b") is None
+        assert cache.get("c") == "c"
+
+
+class TestSqliteCache:
+
+    @patch("local_app.lib.cache._PURGE_EVERY_N_WRITES", 1)
+    def test_evicts_past_max_entries(self, tmp_path) -> None:
+        cache = SqliteCache(tmp_path / "cache.db", max_entries=2, ttl_seconds=60)
+        cache.set("a", "a", ttl_seconds=10)
+        cache.set("b", "b", ttl_seconds=20)
+        cache.set("c", "c", ttl_seconds=30)
+        assert cache.get("a") is None
+        assert cache.get("b") == "b"
+        assert cache.get("c") == "c"
+
+    def test_shared_between_instances(self, tmp_path) -> None:
+        SqliteCache(tmp_path / "cache.db", max_entries=2, ttl_seconds=60).set("key", "value")
+        other = SqliteCache(tmp_path / "cache.db", max_entries=2, ttl_seconds=60)
+        assert other.get("key") == "value"
+        assert not other.add("key", "other")
@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+from unittest.mock import MagicMock, patch
+
+from local_app.lib.job_queue import Job, SqliteJobQueue, start_consumer, webhook_job_queue
+from local_app.lib.worker_pool import WorkerPool
+
+
+class TestSqliteJobQueue:
+
+    def test_put_claim_ack(self, tmp_path) -> None:
+        queue = SqliteJobQueue(tmp_path / "queue.db")
+        queue.put("first")
+        queue.put("second")
+        jobs = queue.claim(limit=10)
+        assert [job.payload for job in jobs] == ["first", "second"]
+        assert [job.attempts for job in jobs] == [1, 1]
+        # Leased jobs aren't claimed again until their lease expires
+        assert queue.claim(limit=10) == []
+        queue.ack(jobs[0].id)
+        queue.ack(jobs[1].id)
+        assert queue.depth() == 0
+
+    def test_claim_respects_limit(self, tmp_path) -> None:
+        queue = SqliteJobQueue(tmp_path / "queue.db")
+        for payload in ["a", "b", "c"]:
+            queue.put(payload)
+        assert [job.payload for job in queue.claim(limit=2)] == ["a", "b"]
+        assert [job.payload for job in queue.claim(limit=2)] == ["c"]
+
+    def test_unacked_job_redelivered_after_lease(self, tmp_path) -> None:
+        queue = SqliteJobQueue(tmp_path / "queue.db", lease_seconds=0)
+        queue.put("payload")
+        first = queue.claim(limit=1)
+        second = queue.claim(limit=1)
+        assert first[0].id == second[0].id
+        assert second[0].attempts == 2
+
+    def test_jobs_survive_reopening(self, tmp_path) -> None:
+        SqliteJobQueue(tmp_path / "queue.db").put("payload")
+        reopened = SqliteJobQueue(tmp_path / "queue.db")
+        assert [job.payload for job in reopened.claim(limit=1)] == ["payload"]
+
+
+class TestConsumer:
+
+    def test_consumer_handles_and_acks(self, tmp_path) -> None:
+        queue = SqliteJobQueue(tmp_path / "queue.db")
+        handled = threading.Event()
+        handler = MagicMock(side_effect=lambda _: handled.set())
+        queue.put("payload")
+        stop = threading.Event()
+        consumer = start_consumer(queue, WorkerPool(max_workers=1, max_queue_depth=1), handler, stop=stop)
+        assert handled.wait(timeout=5)
+        stop.set()
+        consumer.join(timeout=5)
+        handler.assert_called_once_with("payload")
+        assert queue.depth() == 0
+
+    def test_consumer_drops_after_max_attempts(self) -> None:
+        queue = MagicMock(SqliteJobQueue)
+        exhausted_job = Job(id=1, payload="payload", attempts=4)
+        stop = threading.Event()
+        queue.claim.side_effect = [[exhausted_job], []]
+        queue.wait.side_effect = lambda _: stop.set()
+        pool = MagicMock(WorkerPool)
+        pool.idle_workers.return_value = 1
+        consumer = start_consumer(queue, pool, MagicMock(), max_attempts=3, stop=stop)
+        consumer.join(timeout=5)
+        queue.ack.assert_called_once_with(1)
+        pool.submit.assert_not_called()
+
+    def test_consumer_claims_only_for_idle_workers(self) -> None:
+        queue = MagicMock(SqliteJobQueue)
+        stop = threading.Event()
+        queue.claim.return_value = []
+        queue.wait.side_effect = lambda _: stop.set()
+        pool = MagicMock(WorkerPool)
+        pool.idle_workers.return_value = 2
+        consumer = start_consumer(queue, pool, MagicMock(), stop=stop)
+        consumer.join(timeout=5)
+        queue.claim.assert_called_once_with(2)
+
+    @patch("local_app.lib.job_queue._POLL_INTERVAL_SECONDS", 0)
+    def test_consumer_survives_errors(self) -> None:
+        queue = MagicMock(SqliteJobQueue)
+        stop = threading.Event()
+        job = Job(id=1, payload="payload", attempts=1)
+        queue.claim.side_effect = [sqlite3.OperationalError("database is locked"), [job], []]
+        queue.wait.side_effect = lambda _: stop.set()
+        pool = MagicMock(WorkerPool)
+        pool.idle_workers.return_value = 1
+        consumer = start_consumer(queue, pool, MagicMock(), stop=stop)
+        consumer.join(timeout=5)
+        assert not consumer.is_alive()
+        pool.submit.assert_called_once()
+
+
+class TestWebhookJobQueue:
+
+    def setup_method(self) -> None:
+        webhook_job_queue.cache_clear()
+
+    def teardown_method(self) -> None:
+        webhook_job_queue.cache_clear()
+
+    def test_webhook_job_queue_disabled_by_default(self) -> None:
+        with patch.dict("os.environ", clear=True):
+            assert webhook_job_queue() is None
+
+    def test_webhook_job_queue_from_environment(self, monkeypatch, tmp_path) -> None:
+        with monkeypatch.context() as context:
+            context.setenv("WEBHOOK_QUEUE_PATH", str(tmp_path / "queue.db"))
+            assert isinstance(webhook_job_queue(), SqliteJobQueue)
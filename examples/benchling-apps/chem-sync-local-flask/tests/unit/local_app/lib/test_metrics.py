@@ -0,0 +1,101 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from local_app.lib.metrics import (
+    CallbackMetric,
+    Counter,
+    Histogram,
+    InstrumentedTransport,
+    _path_template,
+    _registry,
+    render,
+)
+
+
+@pytest.fixture(autouse=True)
+def _unregister_test_metrics() -> Iterator[None]:
+    yield
+    for name in [name for name in _registry if name.startswith("test_")]:
+        del _registry[name]
+
+
+class TestMetrics:
+
+    @patch("local_app.lib.metrics.metrics_enabled")
+    def test_counter(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = True
+        counter = Counter("test_requests_total", "Requests")
+        counter.inc(status="200")
+        counter.inc(2, status="200")
+        counter.inc(status="503")
+        rendered = render()
+        assert "# TYPE test_requests_total counter" in rendered
+        assert 'test_requests_total{status="200"} 3' in rendered
+        assert 'test_requests_total{status="503"} 1' in rendered
+
+    @patch("local_app.lib.metrics.metrics_enabled")
+    def test_histogram(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = True
+        histogram = Histogram("test_seconds", "Durations", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+        assert list(histogram.samples()) == [
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1.0"} 2',
+            'test_seconds_bucket{le="+Inf"} 3',
+            "test_seconds_sum 5.55",
+            "test_seconds_count 3",
+        ]
+
+    @patch("local_app.lib.metrics.metrics_enabled")
+    def test_histogram_time(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = True
+        histogram = Histogram("test_seconds", "Durations")
+        with pytest.raises(ValueError, match="boom"), histogram.time(route="failing"):
+            raise ValueError("boom")
+        assert 'test_seconds_count{route="failing"} 1' in list(histogram.samples())
+
+    @patch("local_app.lib.metrics.metrics_enabled")
+    def test_disabled(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = False
+        histogram = Histogram("test_seconds", "Durations")
+        histogram.observe(1.0)
+        with histogram.time():
+            pass
+        assert list(histogram.samples()) == []
+
+    def test_callback_metric(self) -> None:
+        CallbackMetric("test_queue_depth", "Queue depth", "gauge", lambda: 7)
+        assert "test_queue_depth 7" in render()
+
+    def test_duplicate_metric(self) -> None:
+        Histogram("test_seconds", "Durations")
+        with pytest.raises(AssertionError, match="Metric test_seconds is already registered"):
+            Histogram("test_seconds", "Durations")
+
+    def test_escapes_label_values(self) -> None:
+        counter = Counter("test_total", "Totals")
+        with patch("local_app.lib.metrics.metrics_enabled", return_value=True):
+            counter.inc(path='say "hi"\n')
+        assert list(counter.samples()) == ['test_total{path="say \\"hi\\"\\n"} 1']
+
+    def test_path_template(self) -> None:
+        assert _path_template("/api/v2/app-canvases/cnvs_6RvTm4mA") == "/api/v2/app-canvases/{id}"
+        assert _path_template("/api/v2/tasks/12345") == "/api/v2/tasks/{id}"
+        assert _path_template("/api/v2/molecules:bulk-create") == "/api/v2/molecules:bulk-create"
+
+    @patch("local_app.lib.metrics.metrics_enabled")
+    def test_instrumented_transport(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = True
+        transport = InstrumentedTransport("test_service", httpx.MockTransport(lambda _: httpx.Response(200)))
+        with httpx.Client(transport=transport) as client:
+            client.get("https://example.benchling.com/api/v2/app-canvases/cnvs_6RvTm4mA")
+        expected = (
+            "benchling_app_outbound_request_seconds_count"
+            '{method="GET",path="/api/v2/app-canvases/{id}",service="test_service"} 1'
+        )
+        assert expected in render()
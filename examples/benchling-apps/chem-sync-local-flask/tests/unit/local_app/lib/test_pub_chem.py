@@ -1,10 +1,29 @@
+import asyncio
 import json
+import threading
+from collections.abc import Callable
 from pathlib import Path
-from unittest.mock import call, patch
+from unittest.mock import AsyncMock, call, patch
 
+import httpx
+import pytest
 from httpx import Response
 
-from local_app.lib.pub_chem import _pubchem_get, get_by_cid, image_url, search
+from local_app.benchling_app.canvas_interaction import _validate_and_sanitize_inputs
+from local_app.benchling_app.views.constants import SEARCH_TEXT_ID
+from local_app.lib.cache import SqliteCache
+from local_app.lib.pub_chem import (
+    _pubchem_get,
+    _rate_limiter,
+    _response_cache,
+    async_get_by_cid,
+    async_search,
+    get_by_cid,
+    get_many_by_cid,
+    image_url,
+    search,
+)
+from local_app.lib.pubchem_index import PubChemIndex
 
 _TEST_FILES_PATH = Path(__file__).parent.parent.parent.parent / "files/pubchem"
 
@@ -12,44 +31,304 @@ _TEST_FILES_PATH = Path(__file__).parent.parent.parent.parent / "files/pubchem"
 class TestPubChem:
 
     def setup_method(self) -> None:
-        _pubchem_get.cache_clear()
-
-    @patch("local_app.lib.pub_chem.get_by_cid")
-    @patch("local_app.lib.pub_chem.httpx")
-    def test_search(self, mock_httpx, mock_get_by_cid) -> None:
-        response_json = _load_pubchem_json(_TEST_FILES_PATH / "search.json")
-        mock_httpx.get.return_value = _mock_httpx_json_response(response_json)
-        mock_get_by_cid.return_value = {
-            "cid": 2244,
-        }
+        _response_cache.cache_clear()
+        _rate_limiter.cache_clear()
+
+    def teardown_method(self) -> None:
+        _response_cache.cache_clear()
+        _rate_limiter.cache_clear()
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_search(self, mock_client) -> None:
+        mock_client.return_value.get.side_effect = _mock_pubchem_responses({
+            "name/search_cid/cids/JSON?MaxRecords=1": "search.json",
+            "cid/2244/property/Title,SMILES,MolecularWeight,MonoisotopicMass/JSON": "properties.json",
+        })
         result = search("search_cid")
-        assert [{"cid": 2244}] == result
-        mock_httpx.get.assert_called_once_with("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/search_cid/cids/JSON?MaxRecords=1")
-        mock_get_by_cid.assert_called_once_with(2244)
+        assert [{"cid": 2244,
+                 "molecularWeight": "180.16",
+                 "monoisotopic": "180.04225873",
+                 "name": "Aspirin",
+                 "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O"}] == result
+        assert mock_client.return_value.get.call_count == 2
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_get_many_by_cid(self, mock_client) -> None:
+        url = "cid/1983,404,2244/property/Title,SMILES,MolecularWeight,MonoisotopicMass/JSON"
+        mock_client.return_value.get.side_effect = _mock_pubchem_responses({url: "properties.json"})
+        result = get_many_by_cid(["1983", "404", "2244"])
+        # In the order requested, leaving out CIDs PubChem doesn't have
+        assert [r["cid"] for r in result] == ["1983", "2244"]
+        assert result[0] == {
+            "cid": "1983",
+            "molecularWeight": "151.16",
+            "monoisotopic": "151.063328530",
+            "name": "Acetaminophen",
+            "smiles": "CC(=O)NC1=CC=C(C=C1)O",
+        }
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_get_many_by_cid_concurrent_requests(self, mock_client) -> None:
+        # 250 CIDs are split into 3 requests, which only pass the barrier if they're in flight at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _get(url: str) -> Response:
+            barrier.wait()
+            cids = url.split("/cid/")[1].split("/")[0].split(",")
+            properties = [{"CID": int(cid), "Title": f"compound {cid}"} for cid in cids]
+            return _mock_httpx_json_response({"PropertyTable": {"Properties": properties}})
 
-    @patch("local_app.lib.pub_chem.httpx")
-    def test_search_no_results(self, mock_httpx) -> None:
-        mock_httpx.get.return_value = _mock_httpx_json_response({})
+        mock_client.return_value.get.side_effect = _get
+        result = get_many_by_cid([str(cid) for cid in range(1, 251)])
+        assert [r["cid"] for r in result] == [str(cid) for cid in range(1, 251)]
+        assert mock_client.return_value.get.call_count == 3
+
+    @patch("local_app.lib.pub_chem._client")
+    @patch("local_app.lib.pub_chem.pubchem_index")
+    def test_search_indexed(self, mock_pubchem_index, mock_client) -> None:
+        mock_pubchem_index.return_value.search.return_value = [{"cid": 2244, "name": "Aspirin"}]
+        assert search("aspirin") == [{"cid": 2244, "name": "Aspirin"}]
+        mock_pubchem_index.return_value.search.assert_called_once_with("aspirin", 1)
+        mock_client.return_value.get.assert_not_called()
+
+    @patch("local_app.lib.pub_chem._client")
+    @patch("local_app.lib.pub_chem.pubchem_index")
+    def test_search_indexed_multi_word_name(self, mock_pubchem_index, mock_client, tmp_path: Path) -> None:
+        acetic_acid = {"cid": 176, "name": "Acetic Acid"}
+        mock_pubchem_index.return_value = PubChemIndex(tmp_path / "index.db")
+        mock_pubchem_index.return_value.add("acetic acid", [acetic_acid])
+        # Searched for as the canvas searches, with the query URL-quoted
+        query = _validate_and_sanitize_inputs({SEARCH_TEXT_ID: "acetic acid"})[SEARCH_TEXT_ID]
+        assert search(query) == [acetic_acid]
+        mock_client.return_value.get.assert_not_called()
+
+    @patch("local_app.lib.pub_chem._client")
+    @patch("local_app.lib.pub_chem.pubchem_index")
+    def test_get_by_cid_indexed(self, mock_pubchem_index, mock_client) -> None:
+        mock_pubchem_index.return_value.get_by_cid.return_value = {"cid": "2244", "name": "Aspirin"}
+        assert get_by_cid("2244") == {"cid": "2244", "name": "Aspirin"}
+        mock_client.return_value.get.assert_not_called()
+
+    @patch("local_app.lib.pub_chem._client")
+    @patch("local_app.lib.pub_chem.pubchem_index")
+    def test_search_not_indexed(self, mock_pubchem_index, mock_client) -> None:
+        mock_pubchem_index.return_value.search.return_value = None
+        mock_client.return_value.get.return_value = _mock_httpx_json_response({})
+        assert search("not-indexed") == []
+        mock_client.return_value.get.assert_called_once()
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_search_no_results(self, mock_client) -> None:
+        mock_client.return_value.get.return_value = _mock_httpx_json_response({})
         result = search("search_cid")
         assert [] == result
-        mock_httpx.get.assert_called_once_with("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/search_cid/cids/JSON?MaxRecords=1")
+        mock_client.return_value.get.assert_called_once_with("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/search_cid/cids/JSON?MaxRecords=1")
 
-    @patch("local_app.lib.pub_chem.httpx")
-    def test_get_by_cid(self, mock_httpx) -> None:
-        mock_httpx.get.side_effect = [
+    @patch("local_app.lib.pub_chem._client")
+    def test_get_by_cid(self, mock_client) -> None:
+        mock_client.return_value.get.side_effect = [
             _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "compound.json")),
-            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "synonyms.json")),
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "title.json")),
         ]
         result = get_by_cid("test_cid")
         assert {"cid": "test_cid",
                 "molecularWeight": "180.16",
                 "monoisotopic": "180.04225873",
-                "name": "aspirin",
+                "name": "Aspirin",
                 "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O"} == result
-        mock_httpx.get.assert_has_calls([
+        mock_client.return_value.get.assert_has_calls([
             call("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/test_cid/JSON"),
-            call("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/test_cid/synonyms/JSON"),
+            call("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/test_cid/property/Title/JSON"),
+        ])
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_get_by_cid_caches_compact_record(self, mock_client) -> None:
+        mock_client.return_value.get.side_effect = [
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "compound.json")),
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "title.json")),
+        ]
+        get_by_cid("2244")
+        assert _response_cache().get("cid/2244/JSON") == {
+            "CompoundProps": {
+                "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O",
+                "molecularWeight": "180.16",
+                "monoisotopic": "180.04225873",
+            },
+        }
+
+    def test_get_by_cid_full_record_cached(self) -> None:
+        # Responses cached in full, before they were compacted, can still be read
+        compound_json = _load_pubchem_json(_TEST_FILES_PATH / "compound.json")
+        title_json = _load_pubchem_json(_TEST_FILES_PATH / "title.json")
+        _response_cache().set("cid/2244/JSON", compound_json)
+        _response_cache().set("cid/2244/property/Title/JSON", title_json)
+        assert get_by_cid("2244")["smiles"] == "CC(=O)OC1=CC=CC=C1C(=O)O"
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_cached(self, mock_client) -> None:
+        response_json = {"IdentifierList": {"CID": [2244]}}
+        mock_client.return_value.get.return_value = _mock_httpx_json_response(response_json)
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"IdentifierList": {"CID": [2244]}}
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"IdentifierList": {"CID": [2244]}}
+        mock_client.return_value.get.assert_called_once()
+
+    @patch("local_app.lib.pub_chem._NOT_FOUND_TTL_SECONDS", 0)
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_not_found_cached_briefly(self, mock_client) -> None:
+        not_found = {"Fault": {"Code": "PUGREST.NotFound"}}
+        mock_client.return_value.get.return_value = Response(404, json=not_found)
+        assert _pubchem_get("name/not-a-chemical/cids/JSON") == not_found
+        # The not-found response expires immediately, so it's fetched again
+        assert _pubchem_get("name/not-a-chemical/cids/JSON") == not_found
+        assert mock_client.return_value.get.call_count == 2
+
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_error_not_cached(self, mock_client) -> None:
+        mock_client.return_value.get.side_effect = [
+            Response(500, json={"Fault": {"Code": "PUGREST.ServerError"}}),
+            _mock_httpx_json_response({"IdentifierList": {"CID": [2244]}}),
+        ]
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"Fault": {"Code": "PUGREST.ServerError"}}
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"IdentifierList": {"CID": [2244]}}
+
+    @patch("local_app.lib.pub_chem.time.sleep")
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_retries_when_busy(self, mock_client, mock_sleep) -> None:
+        mock_client.return_value.get.side_effect = [
+            Response(503, json={"Fault": {"Code": "PUGREST.ServerBusy"}}),
+            Response(429, headers={"Retry-After": "2"}, json={"Fault": {"Code": "PUGREST.ServerBusy"}}),
+            _mock_httpx_json_response({"IdentifierList": {"CID": [2244]}}),
+        ]
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"IdentifierList": {"CID": [2244]}}
+        assert mock_client.return_value.get.call_count == 3
+        # Jittered backoff, then the delay PubChem asked for
+        assert 0 <= mock_sleep.call_args_list[0].args[0] <= 0.5
+        assert mock_sleep.call_args_list[1].args[0] == 2
+
+    @patch("local_app.lib.pub_chem.time.sleep")
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_gives_up_retrying(self, mock_client, mock_sleep) -> None:
+        busy = Response(503, json={"Fault": {"Code": "PUGREST.ServerBusy"}})
+        mock_client.return_value.get.return_value = busy
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"Fault": {"Code": "PUGREST.ServerBusy"}}
+        assert mock_client.return_value.get.call_count == 4
+        assert mock_sleep.call_count == 3
+
+    @patch("local_app.lib.pub_chem.time.sleep")
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_long_retry_after(self, mock_client, mock_sleep) -> None:
+        busy = Response(429, headers={"Retry-After": "3600"}, json={"Fault": {"Code": "PUGREST.ServerBusy"}})
+        mock_client.return_value.get.return_value = busy
+        # Too long to hold a worker for, so it gives up rather than waiting
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"Fault": {"Code": "PUGREST.ServerBusy"}}
+        mock_client.return_value.get.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("local_app.lib.pub_chem.time.sleep")
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_retries_transport_errors(self, mock_client, mock_sleep) -> None:
+        mock_client.return_value.get.side_effect = [
+            httpx.ConnectError("Connection refused"),
+            httpx.ReadTimeout("Timed out"),
+            _mock_httpx_json_response({"IdentifierList": {"CID": [2244]}}),
+        ]
+        assert _pubchem_get("name/aspirin/cids/JSON") == {"IdentifierList": {"CID": [2244]}}
+        assert mock_sleep.call_count == 2
+
+    @patch("local_app.lib.pub_chem.time.sleep")
+    @patch("local_app.lib.pub_chem._client")
+    def test_pubchem_get_gives_up_on_transport_errors(self, mock_client, mock_sleep) -> None:
+        mock_client.return_value.get.side_effect = httpx.ConnectError("Connection refused")
+        with pytest.raises(httpx.ConnectError):
+            _pubchem_get("name/aspirin/cids/JSON")
+        assert mock_client.return_value.get.call_count == 4
+        assert mock_sleep.call_count == 3
+
+    @patch("local_app.lib.pub_chem._async_client")
+    def test_async_search(self, mock_async_client) -> None:
+        mock_async_client.return_value.get = AsyncMock(side_effect=_mock_pubchem_responses({
+            "name/search_cid/cids/JSON?MaxRecords=1": "search.json",
+            "cid/2244/property/Title,SMILES,MolecularWeight,MonoisotopicMass/JSON": "properties.json",
+        }))
+        result = asyncio.run(async_search("search_cid"))
+        assert [r["name"] for r in result] == ["Aspirin"]
+        assert mock_async_client.return_value.get.await_count == 2
+
+    @patch("local_app.lib.pub_chem._async_client")
+    def test_async_get_by_cid(self, mock_async_client) -> None:
+        mock_async_client.return_value.get = AsyncMock(side_effect=[
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "compound.json")),
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "title.json")),
         ])
+        result = asyncio.run(async_get_by_cid("2244"))
+        assert result["name"] == "Aspirin"
+        assert result["smiles"] == "CC(=O)OC1=CC=CC=C1C(=O)O"
+
+    @patch("local_app.lib.pub_chem._async_client")
+    @patch("local_app.lib.pub_chem._client")
+    def test_async_shares_cache(self, mock_client, mock_async_client) -> None:
+        mock_client.return_value.get.side_effect = [
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "compound.json")),
+            _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / "title.json")),
+        ]
+        mock_async_client.return_value.get = AsyncMock()
+        sync_result = get_by_cid("2244")
+        assert asyncio.run(async_get_by_cid("2244")) == sync_result
+        # The sync lookup's responses are cached, so the async lookup doesn't make requests
+        mock_async_client.return_value.get.assert_not_awaited()
+
+    @patch("local_app.lib.pub_chem._async_client")
+    def test_async_concurrent_lookups_coalesced(self, mock_async_client) -> None:
+        async def _get(_url: str) -> Response:
+            # Slow enough that every search finds the first one's request in flight
+            await asyncio.sleep(0.01)
+            return _mock_httpx_json_response({})
+
+        mock_async_client.return_value.get = AsyncMock(side_effect=_get)
+
+        async def search_many() -> list[list[dict]]:
+            return await asyncio.gather(*(async_search("not-a-chemical") for _ in range(5)))
+
+        assert asyncio.run(search_many()) == [[]] * 5
+        mock_async_client.return_value.get.assert_awaited_once()
+
+    @patch("local_app.lib.pub_chem.asyncio.sleep")
+    @patch("local_app.lib.pub_chem._async_client")
+    def test_async_retries_when_busy(self, mock_async_client, mock_sleep) -> None:
+        mock_async_client.return_value.get = AsyncMock(side_effect=[
+            Response(429, headers={"Retry-After": "2"}, json={"Fault": {"Code": "PUGREST.ServerBusy"}}),
+            _mock_httpx_json_response({}),
+        ])
+        assert asyncio.run(async_search("aspirin")) == []
+        mock_sleep.assert_awaited_once_with(2.0)
+
+    @patch("local_app.lib.pub_chem.asyncio.sleep")
+    @patch("local_app.lib.pub_chem._async_client")
+    def test_async_retries_transport_errors(self, mock_async_client, mock_sleep) -> None:
+        mock_async_client.return_value.get = AsyncMock(side_effect=[
+            httpx.ConnectTimeout("Timed out"),
+            _mock_httpx_json_response({}),
+        ])
+        assert asyncio.run(async_search("aspirin")) == []
+        mock_sleep.assert_awaited_once()
+
+    @patch("local_app.lib.pub_chem._async_client")
+    def test_async_persistent_cache_off_event_loop(
+        self,
+        mock_async_client,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        monkeypatch.setenv("PUBCHEM_CACHE_PATH", str(tmp_path / "pubchem.db"))
+        mock_async_client.return_value.get = AsyncMock(return_value=Response(404, json={}))
+        with patch("local_app.lib.pub_chem.asyncio.to_thread", wraps=asyncio.to_thread) as mock_to_thread:
+            assert asyncio.run(async_search("not-a-chemical")) == []
+        # The cache is read and written on a thread, since SQLite can wait on another process's lock
+        assert [c.args[0].__name__ for c in mock_to_thread.call_args_list] == ["get", "_cache_response"]
+
+    def test_response_cache_persistent(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+        monkeypatch.setenv("PUBCHEM_CACHE_PATH", str(tmp_path / "pubchem.db"))
+        assert isinstance(_response_cache(), SqliteCache)
 
     def test_image_url(self) -> None:
         result = image_url("CID_1234")
@@ -64,3 +343,11 @@ def _load_pubchem_json(file_path: Path) -> dict:
 
 def _mock_httpx_json_response(response_json: dict) -> Response:
     return Response(200, json=response_json)
+
+
+def _mock_pubchem_responses(file_names_by_url: dict[str, str]) -> Callable[[str], Response]:
+    def _get(url: str) -> Response:
+        file_name = file_names_by_url[url.removeprefix("https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/")]
+        return _mock_httpx_json_response(_load_pubchem_json(_TEST_FILES_PATH / file_name))
+
+    return _get
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from local_app.lib.pubchem_index import PubChemIndex
+
+_ASPIRIN = {
+    "cid": 2244,
+    "name": "Aspirin",
+    "smiles": "CC(=O)OC1=CC=CC=C1C(=O)O",
+    "molecularWeight": "180.16",
+    "monoisotopic": "180.04225873",
+}
+_SALICYLIC_ACID = {
+    "cid": 338,
+    "name": "Salicylic Acid",
+    "smiles": "C1=CC=C(C(=C1)C(=O)O)O",
+    "molecularWeight": "138.12",
+    "monoisotopic": "138.031694049",
+}
+
+
+class TestPubChemIndex:
+
+    def test_search(self, tmp_path: Path) -> None:
+        index = PubChemIndex(tmp_path / "index.db")
+        index.add("aspirin", [_ASPIRIN])
+        assert index.search("aspirin", limit=1) == [_ASPIRIN]
+        # Names are matched like PubChem matches them, ignoring case
+        assert index.search(" Aspirin ", limit=1) == [_ASPIRIN]
+
+    def test_search_miss(self, tmp_path: Path) -> None:
+        index = PubChemIndex(tmp_path / "index.db")
+        assert index.search("aspirin", limit=1) is None
+
+    def test_search_fewer_results_than_limit(self, tmp_path: Path) -> None:
+        index = PubChemIndex(tmp_path / "index.db")
+        index.add("aspirin", [_ASPIRIN])
+        assert index.search("aspirin", limit=2) is None
+
+    def test_add_replaces_results(self, tmp_path: Path) -> None:
+        index = PubChemIndex(tmp_path / "index.db")
+        index.add("aspirin", [_SALICYLIC_ACID, _ASPIRIN])
+        index.add("aspirin", [_ASPIRIN])
+        assert index.search("aspirin", limit=1) == [_ASPIRIN]
+        assert index.search("aspirin", limit=2) is None
+
+    def test_get_by_cid(self, tmp_path: Path) -> None:
+        index = PubChemIndex(tmp_path / "index.db")
+        index.add("aspirin", [_ASPIRIN])
+        assert index.get_by_cid("2244") == {**_ASPIRIN, "cid": "2244"}
+        assert index.get_by_cid("338") is None
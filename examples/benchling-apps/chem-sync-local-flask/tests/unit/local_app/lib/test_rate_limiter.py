@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from local_app.lib.rate_limiter import LocalRateLimiter, RateLimit, SqliteRateLimiter
+
+_LIMITS = (RateLimit(requests=5, per_seconds=1), RateLimit(requests=8, per_seconds=60))
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds: float) -> None:
+        self.sleep(seconds)
+
+
+class TestLocalRateLimiter:
+
+    def test_burst_within_limits(self) -> None:
+        clock = _FakeClock()
+        with patch("local_app.lib.rate_limiter.time", clock):
+            limiter = LocalRateLimiter("test", _LIMITS)
+            for _ in range(5):
+                limiter.acquire()
+        assert clock.sleeps == []
+
+    def test_waits_for_per_second_limit(self) -> None:
+        clock = _FakeClock()
+        with patch("local_app.lib.rate_limiter.time", clock):
+            limiter = LocalRateLimiter("test", _LIMITS)
+            for _ in range(6):
+                limiter.acquire()
+        # A token is refilled every 1/5th of a second
+        assert sum(clock.sleeps) == pytest.approx(0.2)
+
+    def test_waits_for_per_minute_limit(self) -> None:
+        clock = _FakeClock()
+        with patch("local_app.lib.rate_limiter.time", clock):
+            limiter = LocalRateLimiter("test", _LIMITS)
+            for _ in range(9):
+                limiter.acquire()
+        # The 9th request waits for the per-minute bucket to refill a token, every 7.5 seconds
+        assert 7.5 <= clock.now - 1000.0 < 8.0
+
+    def test_async_acquire(self) -> None:
+        clock = _FakeClock()
+
+        async def acquire_all(limiter: LocalRateLimiter) -> None:
+            for _ in range(6):
+                await limiter.async_acquire()
+
+        with patch("local_app.lib.rate_limiter.time", clock), \
+                patch("local_app.lib.rate_limiter.asyncio.sleep", clock.async_sleep):
+            asyncio.run(acquire_all(LocalRateLimiter("test", _LIMITS)))
+        assert sum(clock.sleeps) == pytest.approx(0.2)
+
+
+class TestSqliteRateLimiter:
+
+    def test_shared_between_limiters(self, tmp_path: Path) -> None:
+        clock = _FakeClock()
+        with patch("local_app.lib.rate_limiter.time", clock):
+            first = SqliteRateLimiter("test", _LIMITS, tmp_path / "limits.db")
+            second = SqliteRateLimiter("test", _LIMITS, tmp_path / "limits.db")
+            for _ in range(3):
+                first.acquire()
+                second.acquire()
+        # Together they made 6 requests, so one had to wait
+        assert sum(clock.sleeps) == pytest.approx(0.2)
+
+    def test_async_acquire_off_event_loop(self, tmp_path: Path) -> None:
+        limiter = SqliteRateLimiter("test", _LIMITS, tmp_path / "limits.db")
+        threads = []
+
+        def _try_acquire(_limiter: SqliteRateLimiter) -> float:
+            threads.append(threading.current_thread())
+            return 0
+
+        with patch.object(SqliteRateLimiter, "_try_acquire", autospec=True, side_effect=_try_acquire):
+            asyncio.run(limiter.async_acquire())
+        # Taking the file's lock can block, so it isn't done on the event loop's thread
+        assert threads
+        assert threading.main_thread() not in threads
+
+    def test_separate_services(self, tmp_path: Path) -> None:
+        clock = _FakeClock()
+        with patch("local_app.lib.rate_limiter.time", clock):
+            first = SqliteRateLimiter("first", _LIMITS, tmp_path / "limits.db")
+            second = SqliteRateLimiter("second", _LIMITS, tmp_path / "limits.db")
+            for _ in range(5):
+                first.acquire()
+                second.acquire()
+        assert clock.sleeps == []
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from local_app.lib.metrics import render
+from local_app.lib.router import Router
+
+
+class TestRouter:
+
+    def test_dispatch(self) -> None:
+        router: Router[str] = Router("test")
+        handler = MagicMock(__name__="handler")
+        router.route("key")(handler)
+        assert router.dispatch(["key"], "arg1", "arg2")
+        handler.assert_called_once_with("arg1", "arg2")
+
+    def test_dispatch_first_matching_key(self) -> None:
+        router: Router[str] = Router("test")
+        specific = MagicMock(__name__="specific")
+        general = MagicMock(__name__="general")
+        router.route("specific")(specific)
+        router.route("general")(general)
+        assert router.dispatch(["missing", "specific", "general"])
+        specific.assert_called_once_with()
+        general.assert_not_called()
+
+    def test_dispatch_no_route(self) -> None:
+        router: Router[str] = Router("test")
+        assert not router.dispatch(["missing"])
+
+    def test_duplicate_route(self) -> None:
+        router: Router[str] = Router("test")
+        router.route("key")(MagicMock(__name__="handler"))
+        with pytest.raises(AssertionError, match="A handler is already registered for key"):
+            router.route("key")(MagicMock(__name__="handler"))
+
+    @patch("local_app.lib.metrics.metrics_enabled")
+    def test_route_latency_metric(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = True
+        router: Router[str] = Router("test")
+        router.route("ok")(MagicMock(__name__="ok_handler"))
+        router.route("error")(MagicMock(__name__="error_handler", side_effect=ValueError("boom")))
+        router.dispatch(["ok"])
+        router.dispatch(["ok"])
+        with pytest.raises(ValueError, match="boom"):
+            router.dispatch(["error"])
+        rendered = render()
+        assert 'benchling_app_route_seconds_count{route="ok_handler",router="test"} 2' in rendered
+        # Failed calls are timed too
+        assert 'benchling_app_route_seconds_count{route="error_handler",router="test"} 1' in rendered
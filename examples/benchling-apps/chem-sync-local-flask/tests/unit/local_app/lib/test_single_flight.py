@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from local_app.lib.single_flight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+
+    def test_do(self) -> None:
+        single_flight: SingleFlight[str] = SingleFlight()
+        assert single_flight.do("key", lambda: "value") == ("value", False)
+
+    def test_concurrent_calls_coalesced(self) -> None:
+        single_flight: SingleFlight[str] = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow_call() -> str:
+            calls.append(1)
+            release.wait(timeout=5)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(single_flight.do, "key", slow_call)
+            # Wait for the leader's call to start, so the rest find it in flight
+            while not calls:
+                time.sleep(0.001)
+            followers = [executor.submit(single_flight.do, "key", slow_call) for _ in range(3)]
+            # Give the followers time to start waiting on the leader's call
+            time.sleep(0.1)
+            release.set()
+            assert leader.result() == ("value", False)
+            assert [f.result() for f in followers] == [("value", True)] * 3
+        assert len(calls) == 1
+
+    def test_error_shared(self) -> None:
+        single_flight: SingleFlight[str] = SingleFlight()
+        release = threading.Event()
+        started = threading.Event()
+
+        def failing_call() -> str:
+            started.set()
+            release.wait(timeout=5)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(single_flight.do, "key", failing_call)
+            started.wait(timeout=5)
+            follower = executor.submit(single_flight.do, "key", failing_call)
+            time.sleep(0.1)
+            release.set()
+            with pytest.raises(ValueError, match="boom"):
+                leader.result()
+            with pytest.raises(ValueError, match="boom"):
+                follower.result()
+
+    def test_not_coalesced_after_completion(self) -> None:
+        single_flight: SingleFlight[int] = SingleFlight()
+        results = iter([1, 2])
+        assert single_flight.do("key", lambda: next(results)) == (1, False)
+        assert single_flight.do("key", lambda: next(results)) == (2, False)
+
+
+class TestAsyncSingleFlight:
+
+    def test_concurrent_calls_coalesced(self) -> None:
+        single_flight: AsyncSingleFlight[str] = AsyncSingleFlight()
+        calls = []
+
+        async def slow_call() -> str:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def run() -> list[tuple[str, bool]]:
+            return await asyncio.gather(*(single_flight.do("key", slow_call) for _ in range(4)))
+
+        assert asyncio.run(run()) == [("value", False)] + [("value", True)] * 3
+        assert len(calls) == 1
+
+    def test_error_shared(self) -> None:
+        single_flight: AsyncSingleFlight[str] = AsyncSingleFlight()
+
+        async def failing_call() -> str:
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run() -> list[BaseException | tuple[str, bool]]:
+            return await asyncio.gather(
+                *(single_flight.do("key", failing_call) for _ in range(2)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_not_coalesced_after_completion(self) -> None:
+        single_flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+        results = iter([1, 2])
+
+        async def call() -> int:
+            return next(results)
+
+        async def run() -> list[tuple[int, bool]]:
+            return [await single_flight.do("key", call), await single_flight.do("key", call)]
+
+        assert asyncio.run(run()) == [(1, False), (2, False)]
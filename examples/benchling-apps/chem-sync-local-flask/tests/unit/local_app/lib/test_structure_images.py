@@ -0,0 +1,110 @@
+import hashlib
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from local_app.lib.structure_images import (
+    StructureImageCache,
+    _image_cache,
+    _missing_images,
+    image_url,
+    prewarm,
+    structure_image,
+)
+
+_PNG = b"\x89PNG\r\n\x1a\nnot really an image"
+
+
+@pytest.fixture(autouse=True)
+def _image_cache_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[None]:
+    monkeypatch.setenv("STRUCTURE_IMAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("APP_PUBLIC_URL", "https://my-app.example.com")
+    _image_cache.cache_clear()
+    _missing_images.cache_clear()
+    yield
+    _image_cache.cache_clear()
+    _missing_images.cache_clear()
+
+
+class TestStructureImages:
+
+    def test_image_url(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("APP_PUBLIC_URL", "https://my-app.example.com/")
+        assert image_url("2244") == "https://my-app.example.com/images/compounds/2244.png"
+
+    def test_image_url_without_public_url(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("APP_PUBLIC_URL", raising=False)
+        assert image_url("2244") == "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/2244/PNG"
+
+    @patch("local_app.lib.structure_images.pub_chem.get_image")
+    def test_structure_image_cached(self, mock_get_image) -> None:
+        mock_get_image.return_value = _PNG
+        image_url("2244")
+        result = structure_image("2244")
+        assert result is not None
+        assert result[1] == _PNG
+        assert structure_image("2244") == result
+        mock_get_image.assert_called_once_with("2244")
+
+    @patch("local_app.lib.structure_images.pub_chem.get_image")
+    def test_structure_image_not_found(self, mock_get_image) -> None:
+        mock_get_image.return_value = None
+        image_url("2244")
+        assert structure_image("2244") is None
+        # Misses are cached for a while too
+        assert structure_image("2244") is None
+        mock_get_image.assert_called_once_with("2244")
+
+    @patch("local_app.lib.structure_images.pub_chem.get_image")
+    def test_structure_image_not_shown(self, mock_get_image) -> None:
+        # Only CIDs the App has put on a canvas are served
+        assert structure_image("2244") is None
+        mock_get_image.assert_not_called()
+
+    @patch("local_app.lib.structure_images.pub_chem.get_image")
+    def test_structure_image_invalid_cid(self, mock_get_image) -> None:
+        assert structure_image("../../etc/passwd") is None
+        mock_get_image.assert_not_called()
+
+    @patch("local_app.lib.structure_images._prewarm_executor")
+    def test_prewarm(self, mock_prewarm_executor) -> None:
+        prewarm(["2244", "1983"])
+        assert mock_prewarm_executor.return_value.submit.call_count == 2
+        assert _image_cache().is_allowed("2244")
+
+    @patch("local_app.lib.structure_images._prewarm_executor")
+    def test_prewarm_without_public_url(self, mock_prewarm_executor, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("APP_PUBLIC_URL", raising=False)
+        prewarm(["2244"])
+        mock_prewarm_executor.assert_not_called()
+
+
+class TestStructureImageCache:
+
+    def test_identical_images_stored_once(self, tmp_path: Path) -> None:
+        cache = StructureImageCache(tmp_path)
+        assert cache.put("1", _PNG) == cache.put("2", _PNG)
+        assert cache.get("1") == cache.get("2")
+        assert len(list((tmp_path / "objects").iterdir())) == 1
+
+    def test_get_missing(self, tmp_path: Path) -> None:
+        assert StructureImageCache(tmp_path).get("2244") is None
+
+    def test_prune(self, tmp_path: Path) -> None:
+        cache = StructureImageCache(tmp_path, max_entries=2)
+        cache.put("1", b"image 1")
+        cache.put("2", b"image 2")
+        cache.put("3", _PNG)
+        for cid in ("1", "2", "3"):
+            cache.allow(cid)
+        # Ensure 1 is the oldest, whatever the filesystem's timestamp resolution
+        for directory in ("cids", "allowed"):
+            os.utime(tmp_path / directory / "1", (0, 0))
+        cache.prune()
+        assert cache.get("1") is None
+        assert not cache.is_allowed("1")
+        assert cache.get("3") == (hashlib.sha256(_PNG).hexdigest(), _PNG)
+        assert len(list((tmp_path / "objects").iterdir())) == 2
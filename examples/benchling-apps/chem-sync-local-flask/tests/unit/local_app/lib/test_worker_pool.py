@@ -0,0 +1,71 @@
+import threading
+from unittest.mock import MagicMock
+
+from local_app.lib.worker_pool import WorkerPool, WorkerPoolStats, webhook_worker_pool
+
+
+class TestWorkerPool:
+
+    def setup_method(self) -> None:
+        webhook_worker_pool.cache_clear()
+
+    def test_try_submit_runs_work(self) -> None:
+        pool = WorkerPool(max_workers=2, max_queue_depth=5)
+        done = threading.Event()
+        work = MagicMock(side_effect=lambda _: done.set())
+        assert pool.try_submit(work, "payload")
+        assert done.wait(timeout=5)
+        work.assert_called_once_with("payload")
+
+    def test_try_submit_rejects_when_saturated(self) -> None:
+        pool = WorkerPool(max_workers=1, max_queue_depth=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def _blocking_work() -> None:
+            started.set()
+            release.wait(timeout=5)
+
+        assert pool.try_submit(_blocking_work)
+        assert started.wait(timeout=5)
+        # The single worker is busy, so one more item fills the queue and the next is rejected
+        assert pool.try_submit(_blocking_work)
+        assert not pool.try_submit(_blocking_work)
+        assert pool.stats() == WorkerPoolStats(
+            max_workers=1,
+            max_queue_depth=1,
+            queue_depth=1,
+            active_workers=1,
+            rejected=1,
+        )
+        release.set()
+
+    def test_idle_workers(self) -> None:
+        pool = WorkerPool(max_workers=2, max_queue_depth=5)
+        assert pool.idle_workers() == 2
+        started = threading.Event()
+        release = threading.Event()
+
+        def _blocking_work() -> None:
+            started.set()
+            release.wait(timeout=5)
+
+        assert pool.try_submit(_blocking_work)
+        assert started.wait(timeout=5)
+        assert pool.idle_workers() == 1
+        release.set()
+
+    def test_worker_survives_errors(self) -> None:
+        pool = WorkerPool(max_workers=1, max_queue_depth=5)
+        done = threading.Event()
+        assert pool.try_submit(MagicMock(side_effect=ValueError("boom")))
+        assert pool.try_submit(done.set)
+        assert done.wait(timeout=5)
+
+    def test_webhook_worker_pool_from_environment(self, monkeypatch) -> None:
+        with monkeypatch.context() as context:
+            context.setenv("WEBHOOK_MAX_WORKERS", "3")
+            context.setenv("WEBHOOK_MAX_QUEUE_DEPTH", "7")
+            stats = webhook_worker_pool().stats()
+        assert stats.max_workers == 3
+        assert stats.max_queue_depth == 7
@@ -1,3 +1,4 @@
+import sqlite3
 from pathlib import Path
 from unittest.mock import patch
 
@@ -6,6 +7,7 @@ from flask import Flask
 from flask.testing import FlaskClient
 
 from local_app.app import create_app
+from local_app.lib.worker_pool import WorkerPoolStats
 from tests.helpers import load_webhook_json
 
 _TEST_FILES_PATH = Path(__file__).parent.parent.parent / "files/webhooks"
@@ -26,9 +28,9 @@ def client(app: Flask) -> FlaskClient:
 
 
 class TestApp:
-    @patch("local_app.app._enqueue_work")
-    @patch("local_app.app.app_definition_id")
-    @patch("local_app.app.verify")
+    @patch("local_app.receiver._enqueue_work")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
     def test_app_receive_webhook(
         self,
         mock_verify,
@@ -52,3 +54,147 @@ class TestApp:
         assert "webhook-id" in mock_verify.call_args.args[2]
         mock_app_definition_id.assert_called_once()
         mock_enqueue_work.assert_called_once()
+
+    @patch("local_app.receiver._enqueue_work")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_app_receive_webhook_duplicate(
+        self,
+        mock_verify,  # noqa: ARG002
+        mock_app_definition_id,
+        mock_enqueue_work,
+        client,
+    ) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
+        for _ in range(2):
+            response = client.post(
+                "1/webhooks/canvas",
+                json=webhook.to_dict(),
+                headers={"Webhook-Id": "msg_123"},
+            )
+            assert response.status_code == 200
+        mock_enqueue_work.assert_called_once()
+
+    @patch("local_app.receiver._enqueue_work")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_app_receive_webhook_retry_after_saturated(
+        self,
+        mock_verify,  # noqa: ARG002
+        mock_app_definition_id,
+        mock_enqueue_work,
+        client,
+    ) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        mock_enqueue_work.side_effect = [False, True]
+        webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
+        response = client.post("1/webhooks/canvas", json=webhook.to_dict(), headers={"Webhook-Id": "msg_123"})
+        assert response.status_code == 503
+        response = client.post("1/webhooks/canvas", json=webhook.to_dict(), headers={"Webhook-Id": "msg_123"})
+        assert response.status_code == 200
+        assert mock_enqueue_work.call_count == 2
+
+    @patch("local_app.receiver.webhook_job_queue")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_app_receive_webhook_retry_after_enqueue_error(
+        self,
+        mock_verify,  # noqa: ARG002
+        mock_app_definition_id,
+        mock_webhook_job_queue,
+        client,
+    ) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        mock_put = mock_webhook_job_queue.return_value.put
+        mock_put.side_effect = [sqlite3.OperationalError("database is locked"), None]
+        webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
+        with pytest.raises(sqlite3.OperationalError):
+            client.post("1/webhooks/canvas", json=webhook.to_dict(), headers={"Webhook-Id": "msg_123"})
+        response = client.post("1/webhooks/canvas", json=webhook.to_dict(), headers={"Webhook-Id": "msg_123"})
+        assert response.status_code == 200
+        assert mock_put.call_count == 2
+
+    @patch("local_app.receiver._enqueue_work")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_app_receive_webhook_queue_saturated(
+        self,
+        mock_verify,  # noqa: ARG002
+        mock_app_definition_id,
+        mock_enqueue_work,
+        client,
+    ) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        mock_enqueue_work.return_value = False
+        webhook = load_webhook_json(_TEST_FILES_PATH / "canvas_initialize_webhook.json")
+        response = client.post("1/webhooks/canvas", json=webhook.to_dict())
+        assert response.status_code == 503
+
+    @patch("local_app.receiver.webhook_job_queue")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_app_receive_webhook_persistent_queue(
+        self,
+        mock_verify,  # noqa: ARG002
+        mock_app_definition_id,
+        mock_webhook_job_queue,
+        client,
+    ) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        body = (_TEST_FILES_PATH / "canvas_initialize_webhook.json").read_text()
+        response = client.post("1/webhooks/canvas", data=body, content_type="application/json")
+        assert response.status_code == 200
+        mock_webhook_job_queue.return_value.put.assert_called_once_with(body)
+
+    @patch("local_app.app.webhook_worker_pool")
+    def test_app_stats(self, mock_webhook_worker_pool, client) -> None:
+        mock_webhook_worker_pool.return_value.stats.return_value = WorkerPoolStats(
+            max_workers=8,
+            max_queue_depth=100,
+            queue_depth=3,
+            active_workers=8,
+            rejected=2,
+        )
+        response = client.get("stats")
+        assert response.status_code == 200
+        assert response.json == {
+            "max_workers": 8,
+            "max_queue_depth": 100,
+            "queue_depth": 3,
+            "active_workers": 8,
+            "rejected": 2,
+        }
+
+    @patch("local_app.app.metrics.metrics_enabled")
+    def test_app_metrics(self, mock_metrics_enabled, client) -> None:
+        mock_metrics_enabled.return_value = True
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type == "text/plain; version=0.0.4; charset=utf-8"
+        assert "# TYPE benchling_app_webhook_verify_seconds histogram" in response.text
+
+    @patch("local_app.app.metrics.metrics_enabled")
+    def test_app_metrics_disabled(self, mock_metrics_enabled, client) -> None:
+        mock_metrics_enabled.return_value = False
+        response = client.get("/metrics")
+        assert response.status_code == 404
+
+    @patch("local_app.app.structure_image")
+    def test_app_compound_image(self, mock_structure_image, client) -> None:
+        mock_structure_image.return_value = ("abc123", b"png bytes")
+        response = client.get("/images/compounds/2244.png")
+        assert response.status_code == 200
+        assert response.content_type == "image/png"
+        assert response.data == b"png bytes"
+        assert response.headers["ETag"] == '"abc123"'
+        mock_structure_image.assert_called_once_with("2244")
+        # Browsers which already have the image don't download it again
+        response = client.get("/images/compounds/2244.png", headers={"If-None-Match": '"abc123"'})
+        assert response.status_code == 304
+
+    @patch("local_app.app.structure_image")
+    def test_app_compound_image_not_found(self, mock_structure_image, client) -> None:
+        mock_structure_image.return_value = None
+        response = client.get("/images/compounds/2244.png")
+        assert response.status_code == 404
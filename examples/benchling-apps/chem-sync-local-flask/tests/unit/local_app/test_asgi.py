@@ -0,0 +1,125 @@
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from local_app.asgi import ASGIApp, Message, create_asgi_app
+from local_app.lib.worker_pool import WorkerPoolStats
+
+_TEST_FILES_PATH = Path(__file__).parent.parent.parent / "files/webhooks"
+
+
+class TestAsgiApp:
+
+    def test_health(self) -> None:
+        status, body = _request(create_asgi_app(), "GET", "/health")
+        assert status == 200
+        assert body == b"OK"
+
+    def test_not_found(self) -> None:
+        status, _ = _request(create_asgi_app(), "GET", "/not-a-route")
+        assert status == 404
+
+    @patch("local_app.asgi.metrics.metrics_enabled")
+    def test_metrics(self, mock_metrics_enabled) -> None:
+        mock_metrics_enabled.return_value = True
+        status, body = _request(create_asgi_app(), "GET", "/metrics")
+        assert status == 200
+        assert b"# TYPE benchling_app_route_seconds histogram" in body
+
+    @patch("local_app.asgi.structure_image")
+    def test_compound_image(self, mock_structure_image) -> None:
+        mock_structure_image.return_value = ("abc123", b"png bytes")
+        status, body = _request(create_asgi_app(), "GET", "/images/compounds/2244.png")
+        assert status == 200
+        assert body == b"png bytes"
+        mock_structure_image.assert_called_once_with("2244")
+        status, body = _request(
+            create_asgi_app(),
+            "GET",
+            "/images/compounds/2244.png",
+            headers={"if-none-match": '"abc123"'},
+        )
+        assert status == 304
+        assert body == b""
+
+    @patch("local_app.asgi.webhook_worker_pool")
+    def test_stats(self, mock_webhook_worker_pool) -> None:
+        mock_webhook_worker_pool.return_value.stats.return_value = WorkerPoolStats(
+            max_workers=8,
+            max_queue_depth=100,
+            queue_depth=3,
+            active_workers=8,
+            rejected=2,
+        )
+        status, body = _request(create_asgi_app(), "GET", "/stats")
+        assert status == 200
+        assert json.loads(body) == {
+            "max_workers": 8,
+            "max_queue_depth": 100,
+            "queue_depth": 3,
+            "active_workers": 8,
+            "rejected": 2,
+        }
+
+    @patch("local_app.receiver._enqueue_work")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_receive_webhook(self, mock_verify, mock_app_definition_id, mock_enqueue_work) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        body = (_TEST_FILES_PATH / "canvas_initialize_webhook.json").read_bytes()
+        status, response_body = _request(
+            create_asgi_app(),
+            "POST",
+            "/1/webhooks/canvas",
+            body=body,
+            headers={"webhook-id": "msg_123"},
+        )
+        assert status == 200
+        assert response_body == b"OK"
+        assert mock_verify.call_args.args == ("appdef_123", body.decode("utf-8"), {"webhook-id": "msg_123"})
+        mock_enqueue_work.assert_called_once_with(body.decode("utf-8"))
+
+    @patch("local_app.receiver._enqueue_work")
+    @patch("local_app.receiver.app_definition_id")
+    @patch("local_app.receiver.verify_webhook")
+    def test_receive_webhook_queue_saturated(
+        self,
+        mock_verify,  # noqa: ARG002
+        mock_app_definition_id,
+        mock_enqueue_work,
+    ) -> None:
+        mock_app_definition_id.return_value = "appdef_123"
+        mock_enqueue_work.return_value = False
+        status, _ = _request(create_asgi_app(), "POST", "/1/webhooks/canvas", body=b"{}")
+        assert status == 503
+
+
+def _request(
+    app: ASGIApp,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: dict[str, str] | None = None,
+) -> tuple[int, bytes]:
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    # Deliver the body in two chunks, as a server may
+    incoming = [
+        {"type": "http.request", "body": body[:10], "more_body": True},
+        {"type": "http.request", "body": body[10:], "more_body": False},
+    ]
+    sent = []
+
+    async def receive() -> Message:
+        return incoming.pop(0)
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], sent[1]["body"]